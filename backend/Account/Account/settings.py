@@ -74,6 +74,7 @@ SIMPLE_JWT = {
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "Account_Service.deadline.DeadlineMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -102,6 +103,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "Account.wsgi.application"
 
+# Connections are kept open for SQL_CONN_MAX_AGE seconds (0 closes them after
+# every request) and checked before reuse. When SQL_HOST points at a pooler
+# such as PgBouncer in transaction mode, set SQL_POOLER=transaction: server-side
+# cursors cannot span the pooler's transactions.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -110,6 +115,9 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD"),
         "HOST": os.environ.get("SQL_HOST"),
         "PORT": os.environ.get("SQL_PORT"),
+        "CONN_MAX_AGE": int(os.environ.get("SQL_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.environ.get("SQL_CONN_HEALTH_CHECKS", "true") == "true",
+        "DISABLE_SERVER_SIDE_CURSORS": os.environ.get("SQL_POOLER") == "transaction",
     }
 }
 
@@ -1,9 +1,26 @@
 #!/bin/sh
 
-echo "###   Applying database migrations for Account Service  ###"
-python manage.py makemigrations
-python manage.py migrate
+# "docker-entrypoint.sh migrate" is the one-off migration job; app containers
+# only check that the schema is current and refuse to start otherwise.
+# It runs after the dogs, payment and walks jobs and applies the Django apps'
+# migrations that all services share.
+if [ "$1" = "migrate" ]; then
+    echo "###   Applying database migrations for Account Service  ###"
+    exec python manage.py migrate --noinput
+fi
+
+export BOOT_STARTED_AT=$(python -c "import time; print(time.time())")
+
+echo "###   Checking Database Migrations for Account Service   ###"
+if ! python manage.py migrate --check; then
+    echo "###   Unapplied migrations, run the account-migrate job first   ###"
+    exit 1
+fi
 
 echo "###   Starting Account Service server   ###"
-python manage.py runserver 0.0.0.0:8000
+if [ "$SERVER_MODE" = "development" ]; then
+    python manage.py runserver 0.0.0.0:8000
+else
+    exec gunicorn -c gunicorn.conf.py Account.wsgi:application
+fi
 
@@ -0,0 +1,54 @@
+import multiprocessing
+import os
+import time
+
+# Gunicorn settings for the Account Service, used when SERVER_MODE is not
+# "development". Each setting can be overridden through the environment.
+
+bind = '0.0.0.0:8000'
+
+# Total memory the workers may use. docker-compose.yml caps each container at
+# 600mb; the cgroup limit is read when GUNICORN_MEMORY_LIMIT_MB is not set.
+def memory_limit_mb():
+    if os.environ.get('GUNICORN_MEMORY_LIMIT_MB'):
+        return int(os.environ['GUNICORN_MEMORY_LIMIT_MB'])
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" or a huge number means no limit
+        if value.isdigit() and int(value) < 1 << 40:
+            return int(value) // (1024 * 1024)
+    return 600
+
+# 2 x CPUs + 1 workers by default, but never more than fit in the memory limit
+# next to the master process
+def default_workers():
+    worker_memory_mb = int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', 120))
+    fit = memory_limit_mb() // worker_memory_mb - 1
+    return max(1, min(multiprocessing.cpu_count() * 2 + 1, fit))
+
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# recycle workers after a number of requests (plus jitter, so they don't all
+# restart at once) to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = '-'
+errorlog = '-'
+
+# Cold start: time from the container entrypoint starting (BOOT_STARTED_AT) to
+# each worker of the first generation having loaded Django
+def post_worker_init(worker):
+    started = os.environ.get('BOOT_STARTED_AT')
+    if started and worker.age <= worker.cfg.workers:
+        worker.log.info('Account Service worker ready %.2fs after container start', time.time() - float(started))
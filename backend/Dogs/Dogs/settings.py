@@ -28,6 +28,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     "corsheaders.middleware.CorsMiddleware",
+    'Dogs_Service.deadline.DeadlineMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -65,6 +66,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Dogs.wsgi.application'
 
+# Connections are kept open for SQL_CONN_MAX_AGE seconds (0 closes them after
+# every request) and checked before reuse. When SQL_HOST points at a pooler
+# such as PgBouncer in transaction mode, set SQL_POOLER=transaction: server-side
+# cursors cannot span the pooler's transactions.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -73,6 +78,9 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD"),
         "HOST": os.environ.get("SQL_HOST"),
         "PORT": os.environ.get("SQL_PORT"),
+        "CONN_MAX_AGE": int(os.environ.get("SQL_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.environ.get("SQL_CONN_HEALTH_CHECKS", "true") == "true",
+        "DISABLE_SERVER_SIDE_CURSORS": os.environ.get("SQL_POOLER") == "transaction",
     }
 }
 
@@ -107,6 +115,8 @@ AWS_ACCESS_KEY_ID = os.environ.get("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.environ.get("AWS_SECRET_ACCESS_KEY")
 AWS_STORAGE_BUCKET_NAME = os.environ.get("AWS_STORAGE_BUCKET_NAME")
 AWS_QUERYSTRING_AUTH = False
+# an S3-compatible server instead of AWS, e.g. MinIO at http://minio:9000
+AWS_S3_ENDPOINT_URL = os.environ.get("AWS_S3_ENDPOINT_URL")
 STORAGES = {
     "default": {
         "BACKEND": "storages.backends.s3boto3.S3Boto3Storage"
@@ -120,4 +130,83 @@ MEDIA_ROOT = ''
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATIC_URL = '/static/'
 
-AUTH_USER_MODEL = "Dogs_Service.CustomUser"
\ No newline at end of file
+AUTH_USER_MODEL = "Dogs_Service.CustomUser"
+
+# Cache for the public dog endpoints: a Redis-compatible server when CACHE_URL
+# (e.g. redis://localhost:6379/0) is set, shared by every worker, otherwise a
+# per-process local memory cache. docker-compose.yml runs Redis and sets
+# CACHE_URL. Cached responses live PUBLIC_CACHE_TTL seconds at most and are
+# invalidated in every worker as soon as dogs or categories change, with either
+# backend (the versions they are keyed on live in the database); the local
+# memory cache only costs each worker its own copy and its own misses.
+if os.environ.get("CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("CACHE_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 1000},
+        }
+    }
+PUBLIC_CACHE_TTL = int(os.environ.get("PUBLIC_CACHE_TTL", 300))
+
+TEST_RUNNER = "Dogs_Service.test_runner.UnmanagedModelTestRunner"
+
+# Token verification used by CustomJWTAuthentication. In "local" mode tokens are
+# checked in-process with the same key and algorithm as Account's SIMPLE_JWT
+# (JWT_SIGNING_KEY must be the Account service's SECRET_KEY); without a signing
+# key, or in "remote" mode, the orchestrator's verifyToken/ is asked instead.
+JWT_VERIFICATION = os.environ.get("JWT_VERIFICATION", "local")
+JWT_SIGNING_KEY = os.environ.get("JWT_SIGNING_KEY")
+JWT_ALGORITHM = "HS256"
+JWT_LEEWAY = 0
+
+# Verified-token cache in CustomJWTAuthentication (JWT_CACHE_SIZE=0 disables it).
+# Entries never outlive the token's exp; blacklisted tokens are evicted within
+# JWT_CACHE_BLACKLIST_INTERVAL seconds. Logging out blacklists the refresh token
+# only, so its access token is accepted until exp either way (see auth/cache.py).
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE", 1024))
+JWT_CACHE_TTL = int(os.environ.get("JWT_CACHE_TTL", 300))
+JWT_CACHE_BLACKLIST_INTERVAL = int(os.environ.get("JWT_CACHE_BLACKLIST_INTERVAL", 5))
+
+# Sponsor expiry scheduler (Dogs_Service/cron.py). "embedded" runs it inside the
+# server processes, "standalone" leaves it to `manage.py run_scheduler`, "off"
+# disables it. Either way only the process holding the Postgres advisory lock
+# SCHEDULER_LOCK_ID runs jobs; the others retry every SCHEDULER_LOCK_RETRY seconds.
+SCHEDULER_MODE = os.environ.get("SCHEDULER_MODE", "embedded")
+# Set by docker-entrypoint.sh for the app server only: nothing else, whether
+# manage.py, django-admin or the test runner, starts the embedded scheduler.
+RUN_SCHEDULER = os.environ.get("RUN_SCHEDULER", "false") == "true"
+SCHEDULER_LOCK_ID = int(os.environ.get("SCHEDULER_LOCK_ID", 8001))
+SCHEDULER_LOCK_RETRY = int(os.environ.get("SCHEDULER_LOCK_RETRY", 30))
+# The advisory lock is tied to its session, so behind a transaction pooler it
+# has to be taken on a direct connection: SQL_DIRECT_HOST/SQL_DIRECT_PORT.
+SCHEDULER_LOCK_HOST = os.environ.get("SQL_DIRECT_HOST")
+SCHEDULER_LOCK_PORT = os.environ.get("SQL_DIRECT_PORT")
+
+# Resized copies of the dog and category images (Dogs_Service/images.py):
+# widths in pixels by variant name, WebP/JPEG quality, and whether they are
+# built on IMAGE_VARIANT_WORKERS background threads ("background") or within
+# the upload request ("inline").
+IMAGE_VARIANTS = {
+    "thumb": int(os.environ.get("IMAGE_THUMB_WIDTH", 160)),
+    "card": int(os.environ.get("IMAGE_CARD_WIDTH", 480)),
+    "large": int(os.environ.get("IMAGE_LARGE_WIDTH", 1024)),
+}
+IMAGE_VARIANT_QUALITY = int(os.environ.get("IMAGE_VARIANT_QUALITY", 80))
+IMAGE_VARIANTS_MODE = os.environ.get("IMAGE_VARIANTS_MODE", "background")
+IMAGE_VARIANT_WORKERS = int(os.environ.get("IMAGE_VARIANT_WORKERS", 2))
+
+# Direct-to-bucket image uploads (Dogs_Service/uploads.py): how long a ticket's
+# presigned target stays valid, the largest image accepted, the image types
+# accepted, and the storage endpoint as browsers reach it when it differs from
+# AWS_S3_ENDPOINT_URL (e.g. http://localhost:9000 for MinIO in docker compose).
+UPLOAD_TICKET_TTL = int(os.environ.get("UPLOAD_TICKET_TTL", 900))
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", 20 * 1024 * 1024))
+UPLOAD_CONTENT_TYPES = ("image/jpeg", "image/png", "image/webp", "image/gif")
+UPLOAD_ENDPOINT_URL = os.environ.get("UPLOAD_ENDPOINT_URL")
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.conf import settings
+from django.db.models.signals import post_migrate, pre_save, post_save, post_delete, m2m_changed
 
 class DogsServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -9,5 +10,21 @@ class DogsServiceConfig(AppConfig):
         from .signals import initial_web_app_group
         post_migrate.connect(initial_web_app_group, sender=self)
 
-        from Dogs_Service import cron
-        cron.start()
\ No newline at end of file
+        from .models import Dog, DogCategory
+        from .signals import invalidate_dogs, invalidate_dog_categories, invalidate_deleted_dog_category, invalidate_dog_links
+        post_save.connect(invalidate_dogs, sender=Dog)
+        post_delete.connect(invalidate_dogs, sender=Dog)
+        post_save.connect(invalidate_dog_categories, sender=DogCategory)
+        post_delete.connect(invalidate_deleted_dog_category, sender=DogCategory)
+        m2m_changed.connect(invalidate_dog_links, sender=Dog.categories.through)
+
+        from .signals import reset_image_variants, build_image_variants
+        for model in (Dog, DogCategory):
+            pre_save.connect(reset_image_variants, sender=model)
+            post_save.connect(build_image_variants, sender=model)
+
+        # only the app server runs the embedded scheduler (RUN_SCHEDULER), not
+        # migrate, shell, the tests or any other command
+        if settings.RUN_SCHEDULER and settings.SCHEDULER_MODE == 'embedded':
+            from Dogs_Service import cron
+            cron.start()
\ No newline at end of file
@@ -1,26 +1,124 @@
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, close_old_connections, connections
 from django.utils import timezone
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 import logging
+import threading
+import time
 
-from .models import Dog
+from .models import Dog, JobRun
+from .response_cache import response_cache
 
+# Sponsorship expiry dates are Singapore dates (see UpdateDogSponsorAPIView),
+# so a sponsorship can only expire when the local date changes. One UPDATE
+# clears every sponsorship that ended before today; it is recorded in JobRun:
+# when it ran, how many dogs it unsponsored and how long the UPDATE took.
 def renewSponsors():
-    currentDate = timezone.now().date()
-    expiredSponsorsDogs = Dog.objects.filter(sponsorExpirationDate__lt=currentDate)
-    for dog in expiredSponsorsDogs:
-        dog.is_sponsored = False
-        dog.sponsorExpirationDate = None
-        dog.save()
+    # job threads outlive any request, so drop a connection the database closed
+    close_old_connections()
+    startedAt = timezone.now()
+    start = time.monotonic()
+    rowsUpdated = Dog.objects.filter(
+        sponsorExpirationDate__lt=timezone.localdate()
+    ).update(
+        is_sponsored=False,
+        sponsorExpirationDate=None,
+        updatedAt=timezone.now()
+    )
+    if rowsUpdated:
+        response_cache.invalidate('dogs')
+    durationMs = round((time.monotonic() - start) * 1000, 1)
+    JobRun.objects.update_or_create(
+        name='renewSponsors',
+        defaults={'startedAt': startedAt, 'rowsUpdated': rowsUpdated, 'durationMs': durationMs},
+    )
+    print('### renewSponsors: {} dog(s) unsponsored in {} ms ###'.format(rowsUpdated, durationMs))
 
-def start():
-    print('###   Running APScheduler for Dogs Service   ###')
+def create_scheduler():
     # logging.basicConfig()
     # logging.getLogger('apscheduler').setLevel(logging.DEBUG)
-    scheduler = BackgroundScheduler()
+    scheduler = BackgroundScheduler(timezone=settings.TIME_ZONE)
+    # daily just after local midnight, plus once on startup to catch up on
+    # any midnight missed while the service was down
     scheduler.add_job(
         renewSponsors, 
-        trigger=CronTrigger.from_crontab('* * * * *'), 
-        max_instances=1
+        trigger=CronTrigger.from_crontab('0 0 * * *', timezone=settings.TIME_ZONE), 
+        next_run_time=timezone.now(),
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=None
     )
-    scheduler.start()
\ No newline at end of file
+    return scheduler
+
+# Own connection for the advisory lock, bypassing the pooler if a direct host
+# is configured
+def lock_connection():
+    settings_dict = dict(connections.settings['default'])
+    if settings.SCHEDULER_LOCK_HOST:
+        settings_dict.update(HOST=settings.SCHEDULER_LOCK_HOST, PORT=settings.SCHEDULER_LOCK_PORT or '')
+    return connections['default'].__class__(settings_dict, 'default')
+
+# Leader election across every Dogs process and replica. The leader holds the
+# session-level advisory lock SCHEDULER_LOCK_ID on a connection of its own and
+# is the only one running the scheduler; the lock is released when that
+# connection closes, so a standby takes over within SCHEDULER_LOCK_RETRY seconds
+# of the leader dying.
+class SchedulerLeader:
+    def __init__(self):
+        self.connection = None
+        self.scheduler = None
+        self.stopped = threading.Event()
+
+    def acquire(self):
+        if self.connection is None:
+            self.connection = lock_connection()
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [settings.SCHEDULER_LOCK_ID])
+            return cursor.fetchone()[0]
+
+    def check(self):
+        # fails if the connection, and with it the lock, is gone
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def release(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except DatabaseError:
+                pass
+            self.connection = None
+
+    # take the lead if free, or check it is still held
+    def step(self):
+        try:
+            if self.scheduler is None:
+                if self.acquire():
+                    print('###   Running APScheduler for Dogs Service   ###')
+                    self.scheduler = create_scheduler()
+                    self.scheduler.start()
+            else:
+                self.check()
+        except (DatabaseError, InterfaceError):
+            if self.scheduler is not None:
+                print('###   APScheduler for Dogs Service lost its lock   ###')
+            self.release()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.step()
+            self.stopped.wait(settings.SCHEDULER_LOCK_RETRY)
+        self.release()
+
+    def stop(self):
+        self.stopped.set()
+
+leader = SchedulerLeader()
+
+# Embedded mode: contend for the leadership from a background thread
+def start():
+    threading.Thread(target=leader.run, name='scheduler-leader', daemon=True).start()
@@ -0,0 +1,45 @@
+from rest_framework.filters import BaseFilterBackend
+from datetime import date
+
+from .models import Dog
+
+# Server-side filters for the dog list endpoints, all optional:
+#   name       - case-insensitive name prefix
+#   gender     - exact gender
+#   category   - dog category id, repeat for dogs in any of several categories
+#   minAge     - minimum age in years (age is counted from the DOB year)
+#   maxAge     - maximum age in years
+#   sponsored  - "true" or "false"
+class DogFilterBackend(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        name = params.get('name')
+        if name:
+            queryset = queryset.filter(name__istartswith=name)
+
+        gender = params.get('gender')
+        if gender:
+            queryset = queryset.filter(gender=gender)
+
+        categories = [i for i in params.getlist('category') if i.isdigit()]
+        if categories:
+            queryset = queryset.filter(
+                id__in=Dog.categories.through.objects.filter(
+                    dogcategory_id__in=categories
+                ).values('dog_id')
+            )
+
+        current_year = date.today().year
+        min_age = params.get('minAge')
+        if min_age and min_age.isdigit():
+            queryset = queryset.filter(DOB__lt=date(current_year - int(min_age) + 1, 1, 1))
+        max_age = params.get('maxAge')
+        if max_age and max_age.isdigit():
+            queryset = queryset.filter(DOB__gte=date(current_year - int(max_age), 1, 1))
+
+        sponsored = params.get('sponsored')
+        if sponsored in ('true', 'false'):
+            queryset = queryset.filter(is_sponsored=sponsored == 'true')
+
+        return queryset
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+import io
+import logging
+import posixpath
+import threading
+
+from .response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Resized variants of the dog and category images. Once an upload is committed,
+# the original is decoded once and saved again at each IMAGE_VARIANTS width as
+# WebP and JPEG, next to it in the model's storage (S3, or the local filesystem
+# in tests). The names are kept in the model's imageVariants, which stays empty
+# until they are built, so clients fall back to the original meanwhile. Variants
+# are built on a small thread pool (IMAGE_VARIANTS_MODE=background) or in the
+# request itself (inline); `manage.py build_image_variants` builds missing ones.
+
+FORMATS = (
+    ('webp', 'WEBP', {'method': 4}),
+    ('jpeg', 'JPEG', {'optimize': True, 'progressive': True}),
+)
+# cache namespace of the responses embedding each model's images
+NAMESPACES = {
+    'Dog': 'dogs',
+    'DogCategory': 'categories',
+}
+
+
+def variant_name(name, variant, extension):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'variants', '{}-{}.{}'.format(stem, variant, extension))
+
+def load(field):
+    with field.storage.open(field.name, 'rb') as f:
+        image = Image.open(f)
+        # JPEGs can be decoded at a fraction of their size, enough for the largest variant
+        widest = max(settings.IMAGE_VARIANTS.values())
+        image.draft('RGB', (widest, widest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            return background
+        return image.convert('RGB')
+
+# Save the variants of an image field and return them by name, each with its
+# size and the storage name of every format. Images are never scaled up.
+def build_variants(field):
+    image = load(field)
+    variants = {}
+    for variant, width in sorted(settings.IMAGE_VARIANTS.items(), key=lambda item: -item[1]):
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        entry = {'width': image.width, 'height': image.height}
+        for extension, encoder, options in FORMATS:
+            buffer = io.BytesIO()
+            image.save(buffer, encoder, quality=settings.IMAGE_VARIANT_QUALITY, **options)
+            entry[extension] = field.storage.save(
+                variant_name(field.name, variant, extension), ContentFile(buffer.getvalue()),
+            )
+        variants[variant] = entry
+    return variants
+
+# Build and store the variants of one object's image, unless the image was
+# replaced in the meantime. Queryset .update() sends no signals, so the cached
+# responses are dropped here.
+def generate(model, pk, name):
+    obj = model.objects.filter(pk=pk, image=name).first()
+    if obj is None:
+        return None
+    variants = build_variants(obj.image)
+    updated = model.objects.filter(pk=pk, image=name).update(imageVariants=variants, updatedAt=timezone.now())
+    if updated:
+        response_cache.invalidate(NAMESPACES[model.__name__])
+    return variants
+
+# URLs of the variants for the serializers, absolute like DRF's ImageField
+def variant_urls(field, variants, request=None):
+    urls = {}
+    for variant, entry in (variants or {}).items():
+        urls[variant] = dict(entry)
+        for extension, encoder, options in FORMATS:
+            if entry.get(extension):
+                url = field.storage.url(entry[extension])
+                urls[variant][extension] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+### START OF BACKGROUND BUILDS ###
+
+
+executor = None
+executor_lock = threading.Lock()
+
+def run(model, pk, name):
+    close_old_connections()
+    try:
+        generate(model, pk, name)
+    except Exception:
+        logger.exception('Building the image variants of %s %s failed', model.__name__, pk)
+    finally:
+        close_old_connections()
+
+def submit(model, pk, name):
+    global executor
+    if settings.IMAGE_VARIANTS_MODE == 'inline':
+        generate(model, pk, name)
+        return
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(settings.IMAGE_VARIANT_WORKERS, thread_name_prefix='image-variants')
+    executor.submit(run, model, pk, name)
+
+# build once the transaction storing the image commits
+def build_on_commit(instance):
+    model, pk, name = type(instance), instance.pk, instance.image.name
+    transaction.on_commit(lambda: submit(model, pk, name))
+
+
+### END OF BACKGROUND BUILDS ###
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from Dogs_Service.images import generate
+from Dogs_Service.models import Dog, DogCategory
+
+# Builds the image variants of dogs and categories uploaded before they existed,
+# or whose background build failed; --all rebuilds every one of them.
+class Command(BaseCommand):
+    help = 'Builds the resized variants of the dog and category images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild the variants that already exist too')
+
+    def handle(self, *args, **options):
+        for model in (DogCategory, Dog):
+            objs = model.objects.exclude(image='').exclude(image__isnull=True)
+            if not options['all']:
+                objs = objs.filter(imageVariants={})
+            built = 0
+            for pk, name in objs.values_list('pk', 'image').iterator():
+                try:
+                    generate(model, pk, name)
+                    built += 1
+                except Exception as e:
+                    self.stderr.write('{} {}: {!r}'.format(model.__name__, pk, e))
+            self.stdout.write('Built the image variants of {} {} objects'.format(built, model.__name__))
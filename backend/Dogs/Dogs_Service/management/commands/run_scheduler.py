@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+import signal
+
+from Dogs_Service import cron
+
+# Standalone scheduler entry point (SCHEDULER_MODE=standalone). Several copies
+# can run; the advisory lock still lets only one of them run jobs.
+class Command(BaseCommand):
+    help = 'Runs the Dogs Service scheduler in the foreground'
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGTERM, lambda signum, frame: cron.leader.stop())
+        try:
+            cron.leader.run()
+        except KeyboardInterrupt:
+            cron.leader.release()
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dogs_Service', '0003_blacklist_tokens'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dog',
+            index=models.Index(fields=['name', 'id'], name='dog_name_id_idx'),
+        ),
+    ]
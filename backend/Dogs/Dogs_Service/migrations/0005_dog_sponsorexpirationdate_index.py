@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dogs_Service', '0004_dog_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dog',
+            name='sponsorExpirationDate',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
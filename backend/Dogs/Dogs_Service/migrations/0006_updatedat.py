@@ -0,0 +1,23 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dogs_Service', '0005_dog_sponsorexpirationdate_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dog',
+            name='updatedAt',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='dogcategory',
+            name='updatedAt',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dogs_Service', '0006_updatedat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dog',
+            name='imageVariants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dogcategory',
+            name='imageVariants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
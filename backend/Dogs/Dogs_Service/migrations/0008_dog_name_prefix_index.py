@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+# Backs the name filter of the dog lists, a case-insensitive prefix match that
+# Django writes as UPPER("name"::text) LIKE UPPER('X%'). The pattern ops let
+# LIKE use the index whatever the database collation. Written as SQL because
+# Django 4.2.3 wraps an OpClass index expression in parentheses Postgres rejects.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dogs_Service', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX "dog_name_upper_prefix_idx" ON "Dogs_Service_dog" ((UPPER("name"::text)) text_pattern_ops);',
+            'DROP INDEX IF EXISTS "dog_name_upper_prefix_idx";',
+        ),
+    ]
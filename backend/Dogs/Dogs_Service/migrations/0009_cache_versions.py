@@ -0,0 +1,29 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:23
+
+from django.db import migrations, models
+import uuid
+
+
+# fresh versions, so no response cached before the table existed is served
+def create_versions(apps, schema_editor):
+    CacheVersion = apps.get_model('Dogs_Service', 'CacheVersion')
+    for namespace in ('dogs', 'categories'):
+        CacheVersion.objects.create(namespace=namespace, token=uuid.uuid4().hex)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dogs_Service', '0008_dog_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('namespace', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('token', models.CharField(max_length=32)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Dogs_Service', '0009_cache_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('startedAt', models.DateTimeField()),
+                ('rowsUpdated', models.IntegerField()),
+                ('durationMs', models.FloatField()),
+            ],
+        ),
+    ]
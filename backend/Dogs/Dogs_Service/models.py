@@ -14,10 +14,27 @@ class Walk(models.Model):
     class Meta:
         managed = False
 
+class OutstandingToken(models.Model):
+    jti = models.CharField(unique=True, max_length=255)
+
+    class Meta:
+        managed = False
+        db_table = 'token_blacklist_outstandingtoken'
+
+class BlacklistedToken(models.Model):
+    token = models.OneToOneField(OutstandingToken, on_delete=models.CASCADE)
+
+    class Meta:
+        managed = False
+        db_table = 'token_blacklist_blacklistedtoken'
+
 class DogCategory(models.Model):
     name = models.CharField(max_length=100)
     desc = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to='Dogs_Service/category/images', blank=True, null=True)
+    # resized copies of the image, see images.py
+    imageVariants = models.JSONField(default=dict, blank=True, editable=False)
+    updatedAt = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.name
@@ -27,10 +44,33 @@ class Dog(models.Model):
     name = models.CharField(max_length=50)
     desc = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to='Dogs_Service/dog/images', blank=True, null=True)
+    # resized copies of the image, see images.py
+    imageVariants = models.JSONField(default=dict, blank=True, editable=False)
     is_sponsored = models.BooleanField(default=False)
     vaccinationDate = models.DateField(blank=True, null=True)
     categories = models.ManyToManyField(DogCategory, blank=True)
     DOB = models.DateField(blank=True, null=True)
     gender = models.CharField(max_length=6, blank=True, null=True)
-    sponsorExpirationDate = models.DateField(blank=True, null=True)
-    
+    sponsorExpirationDate = models.DateField(blank=True, null=True, db_index=True)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # ordering/cursor pagination of the dog lists
+            models.Index(fields=['name', 'id'], name='dog_name_id_idx'),
+        ]
+
+# Current version of each namespace of the public response cache ("dogs",
+# "categories"), replaced in the same transaction as the writes that change
+# it; see response_cache.py
+class CacheVersion(models.Model):
+    namespace = models.CharField(max_length=32, primary_key=True)
+    token = models.CharField(max_length=32)
+
+# Latest run of each scheduled job (cron.py), written by whichever process ran
+# it, so every worker reports the same one
+class JobRun(models.Model):
+    name = models.CharField(max_length=64, primary_key=True)
+    startedAt = models.DateTimeField()
+    rowsUpdated = models.IntegerField()
+    durationMs = models.FloatField()
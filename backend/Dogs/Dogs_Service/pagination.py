@@ -0,0 +1,100 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from urllib.parse import urlparse, parse_qs
+import json
+
+# Cursor pagination that seeks on the whole ordering rather than on its first
+# field: the position is the value of every ordering field of the row, and the
+# next page starts after it in that order. The id always ends the ordering, so
+# the position is unique and rows sharing the leading value (e.g. dogs with the
+# same name) are never repeated or skipped, in either direction. The offset
+# DRF keeps for such ties is therefore always 0 and not used.
+class KeysetCursorPagination(CursorPagination):
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        if reverse:
+            queryset = queryset.order_by(*[field[1:] if field.startswith('-') else '-' + field for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.after(position, reverse))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # one extra row tells whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = self._get_position_from_instance(results[-1], self.ordering) if len(results) > len(self.page) else None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = position is not None, position
+            self.has_previous, self.previous_position = following is not None, following
+        else:
+            self.has_next, self.next_position = following is not None, following
+            self.has_previous, self.previous_position = position is not None, position
+        return self.page
+
+    # rows after the position in the order of the page: greater in the first
+    # field that differs, or less where that field descends
+    def after(self, position, reverse):
+        values = json.loads(position)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValueError(position)
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+            equal = {self.ordering[i].lstrip('-'): values[i] for i in range(index)}
+            condition |= Q(**equal, **{name + ('__lt' if descending else '__gt'): values[index]})
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            values.append(str(instance[name] if isinstance(instance, dict) else getattr(instance, name)))
+        return json.dumps(values)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_cursor_token(self.get_next_link()),
+            'previous': self.get_cursor_token(self.get_previous_link()),
+            'results': data,
+        })
+
+    def get_cursor_token(self, link):
+        if link is None:
+            return None
+        return parse_qs(urlparse(link).query).get(self.cursor_query_param, [None])[0]
+
+# Cursor pagination for the dog lists. It is opt-in: requests without a cursor
+# or pageSize parameter still get the plain list that existing pages expect.
+# Cursors are returned as bare tokens rather than links, since the links would
+# point at the Dogs service instead of the orchestrator in front of it.
+class DogCursorPagination(KeysetCursorPagination):
+    page_size = 24
+    page_size_query_param = 'pageSize'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from redis.exceptions import RedisError
+import hashlib
+import threading
+import uuid
+
+from .models import CacheVersion
+
+# Response cache for the anonymous read endpoints. Entries are keyed on the
+# current version of their namespace ("dogs" or "categories"), so replacing a
+# version drops every cached response of that namespace at once. Versions are
+# replaced by the model signals in signals.py and after bulk .update() calls,
+# which send no signals.
+#
+# The versions live in the database (CacheVersion) and are replaced in the
+# transaction of the write, so every worker sees them change when the write
+# commits, whatever the cache backend, and a response built from the old rows
+# can only be cached under the old version. Each request reads them once, in
+# one primary key lookup, and uses them for both its ETag (etags.py) and its
+# cache key, so a body is never sent with the validator of another version.
+# Writes to one namespace queue on its version row until they commit.
+class ResponseCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # the namespaces' versions as of the request's first call
+    def versions(self, request, namespaces):
+        request = getattr(request, '_request', request)
+        if not hasattr(request, 'cache_versions'):
+            request.cache_versions = dict(CacheVersion.objects.values_list('namespace', 'token'))
+        return [request.cache_versions.get(namespace, '') for namespace in namespaces]
+
+    def key(self, request, namespace, *parts):
+        version, = self.versions(request, [namespace])
+        digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+        return 'dogs:response:{}:{}:{}'.format(namespace, version, digest)
+
+    # a cache server that cannot be reached is a miss, not an error
+    def get(self, key):
+        try:
+            data = cache.get(key)
+        except RedisError:
+            data = None
+        with self.lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def set(self, key, data):
+        try:
+            cache.set(key, data, settings.PUBLIC_CACHE_TTL)
+        except RedisError:
+            pass
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            CacheVersion.objects.update_or_create(namespace=namespace, defaults={'token': uuid.uuid4().hex})
+        with self.lock:
+            self.invalidations += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1],
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+response_cache = ResponseCache()
+
+
+# Caches list() responses of a generic view under cache_namespace, keyed by
+# the full path so filters, ordering and cursors are cached separately
+class CachedListMixin:
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        key = response_cache.key(request, self.cache_namespace, request.get_full_path())
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        response_cache.set(key, response.data)
+        return response
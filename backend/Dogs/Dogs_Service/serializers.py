@@ -1,14 +1,39 @@
 from rest_framework import serializers
+from rest_framework.fields import empty
 from datetime import datetime
 
+from .images import variant_urls
 from .models import Dog, DogCategory
 
+# Category ids of a dog. Forms may send them as repeated fields or as one
+# comma-separated field ("1,2"), which is what the admin pages send.
+class CategoryIDsField(serializers.ManyRelatedField):
+    def get_value(self, dictionary):
+        value = super().get_value(dictionary)
+        if isinstance(value, list):
+            value = [i.strip() for item in value for i in str(item).split(',') if i.strip()]
+        return value
+
+# An empty image field in a form means "no new image", not "remove the image"
+class UploadedImageField(serializers.ImageField):
+    def get_value(self, dictionary):
+        if dictionary.get(self.field_name) == '':
+            return empty
+        return super().get_value(dictionary)
+
 class DogSerializer(serializers.ModelSerializer):    
     age = serializers.SerializerMethodField()
+    image = UploadedImageField(required=False, allow_null=True)
+    categories = CategoryIDsField(
+        child_relation=serializers.PrimaryKeyRelatedField(queryset=DogCategory.objects.all()),
+        required=False,
+        allow_empty=True,
+    )
+    imageVariants = serializers.SerializerMethodField()
     
     class Meta:
         model = Dog
-        fields = ['id', 'microchipID', 'name', 'desc', 'image', 'is_sponsored', 'vaccinationDate', 'categories', 'DOB', 'age', 'gender', 'sponsorExpirationDate']
+        fields = ['id', 'microchipID', 'name', 'desc', 'image', 'imageVariants', 'is_sponsored', 'vaccinationDate', 'categories', 'DOB', 'age', 'gender', 'sponsorExpirationDate']
     
     def get_age(self, obj):
         if obj.DOB:
@@ -17,8 +42,17 @@ class DogSerializer(serializers.ModelSerializer):
             age_in_years = current_year - birth_year
             return age_in_years
         return None
+
+    def get_imageVariants(self, obj):
+        return variant_urls(obj.image, obj.imageVariants, self.context.get('request'))
         
 class DogCategorySerializer(serializers.ModelSerializer):    
+    image = UploadedImageField(required=False, allow_null=True)
+    imageVariants = serializers.SerializerMethodField()
+
     class Meta:
         model = DogCategory
-        fields = '__all__'
\ No newline at end of file
+        fields = ['id', 'name', 'desc', 'image', 'imageVariants']
+
+    def get_imageVariants(self, obj):
+        return variant_urls(obj.image, obj.imageVariants, self.context.get('request'))
\ No newline at end of file
@@ -82,4 +82,36 @@ def initial_web_app_group(sender, **kwargs):
             else:
                 dog.categories.add(categories[i])
     
-    ### END OF SEEDING DOGS SERVICE DATA ###
\ No newline at end of file
+    ### END OF SEEDING DOGS SERVICE DATA ###
+
+
+# Invalidate the cached public responses when dogs or categories change.
+# Dog lists embed category ids, and deleting a category removes its dog links
+# without an m2m_changed signal, so category deletes drop the dog lists too.
+def invalidate_dogs(sender, **kwargs):
+    from .response_cache import response_cache
+    response_cache.invalidate('dogs')
+
+def invalidate_dog_categories(sender, **kwargs):
+    from .response_cache import response_cache
+    response_cache.invalidate('categories')
+
+def invalidate_deleted_dog_category(sender, **kwargs):
+    from .response_cache import response_cache
+    response_cache.invalidate('categories', 'dogs')
+
+def invalidate_dog_links(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_dogs(sender)
+
+
+# A new or cleared image drops the variants of the old one; an image without
+# variants gets them built once the save commits (see images.py).
+def reset_image_variants(sender, instance, **kwargs):
+    if not instance.image or not instance.image._committed:
+        instance.imageVariants = {}
+
+def build_image_variants(sender, instance, **kwargs):
+    if instance.image and not instance.imageVariants:
+        from .images import build_on_commit
+        build_on_commit(instance)
\ No newline at end of file
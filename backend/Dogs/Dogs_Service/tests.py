@@ -1,3 +1,730 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from unittest import mock
+from PIL import Image
+import base64
+import boto3
+from datetime import date, timedelta
+import importlib
+import io
+import json
+import jwt
+import requests
+import shutil
+import tempfile
+import time
+import unittest
+import uuid
 
-# Create your tests here.
+try:
+    from moto import mock_s3
+except ImportError:
+    mock_s3 = None
+
+from . import cron, deadline
+from .auth.auth import CustomJWTAuthentication
+from .auth.cache import VerifiedTokenCache, token_cache
+from .models import BlacklistedToken, CacheVersion, Dog, DogCategory, JobRun, OutstandingToken
+
+# The dog list endpoints serialize each dog's categories, which must be fetched
+# in bulk: one query for the dogs and one for all of their categories. The
+# public list also reads the cache versions its ETag and cache key are built from.
+class DogListQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categories = [DogCategory.objects.create(name='Category {}'.format(i)) for i in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def add_dogs(self, count):
+        for i in range(count):
+            dog = Dog.objects.create(name='Dog {}'.format(i))
+            dog.categories.add(*self.categories)
+
+    def count_queries(self, method, path, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path, data, format='json')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_public_list_query_count_is_constant(self):
+        self.add_dogs(2)
+        few = self.count_queries('get', '/api/dogs/public/')
+        self.add_dogs(20)
+        many = self.count_queries('get', '/api/dogs/public/')
+        self.assertEqual(few, 3)
+        self.assertEqual(many, few)
+
+    def test_paginated_public_list_query_count_is_constant(self):
+        self.add_dogs(2)
+        few = self.count_queries('get', '/api/dogs/public/', {'pageSize': 50})
+        self.add_dogs(20)
+        many = self.count_queries('get', '/api/dogs/public/', {'pageSize': 50})
+        self.assertEqual(few, 3)
+        self.assertEqual(many, few)
+
+    def test_dogs_by_category_query_count_is_constant(self):
+        category_id = self.categories[0].id
+        self.add_dogs(2)
+        few = self.count_queries('post', '/api/dogs/byCategory/', {'category_id': category_id})
+        self.add_dogs(20)
+        many = self.count_queries('post', '/api/dogs/byCategory/', {'category_id': category_id})
+        self.assertEqual(few, 3)
+        self.assertEqual(many, few)
+
+# The public lists are cached, and their ETag is the version of the cache
+# namespace the body was cached under: a write replaces the version, so neither
+# the cached body nor the ETag of the old rows is used again.
+class PublicListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_cached_list_is_revalidated_with_one_query(self):
+        Dog.objects.create(name='Rex')
+        first = self.client.get('/api/dogs/public/')
+        etag = first['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get('/api/dogs/public/')
+            revalidated = self.client.get('/api/dogs/public/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.json(), first.json())
+        self.assertEqual(cached['ETag'], etag)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(len(queries), 2)
+
+    def test_write_changes_body_and_etag(self):
+        Dog.objects.create(name='Rex')
+        first = self.client.get('/api/dogs/public/')
+        Dog.objects.create(name='Bella')
+        second = self.client.get('/api/dogs/public/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertIn('Bella', [dog['name'] for dog in second.json()])
+
+    def test_category_link_changes_dog_list(self):
+        dog = Dog.objects.create(name='Rex')
+        category = DogCategory.objects.create(name='Senior')
+        first = self.client.get('/api/dogs/public/')
+        dog.categories.add(category)
+        second = self.client.get('/api/dogs/public/')
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(next(d for d in second.json() if d['id'] == dog.id)['categories'], [category.id])
+
+# X-Request-Budget is the milliseconds the orchestrator still waits for the
+# answer; it becomes a deadline on this service's monotonic clock, checked
+# before every query.
+class DeadlineMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Dog.objects.create(name='Rex')
+
+    def test_spent_budget_is_answered_straight_away(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/dogs/public/', HTTP_X_REQUEST_BUDGET='0')
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(response.json(), {'error': 'Request deadline exceeded!'})
+        self.assertEqual(len(queries), 0)
+
+    def test_request_within_budget(self):
+        response = self.client.get('/api/dogs/public/', HTTP_X_REQUEST_BUDGET='5000')
+        self.assertEqual(response.status_code, 200)
+
+    def test_request_stops_at_the_deadline(self):
+        # every reading of the clock is a second later
+        clock = mock.Mock()
+        clock.monotonic.side_effect = iter(range(1000, 2000))
+        with mock.patch.object(deadline, 'time', clock):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/dogs/public/', HTTP_X_REQUEST_BUDGET='1500')
+        self.assertEqual(response.status_code, 504)
+        # the cache version was read, the dogs were not
+        ran = [query['sql'] for query in queries.captured_queries if query['sql']]
+        self.assertEqual(len(ran), 1)
+        self.assertIn('Dogs_Service_cacheversion', ran[0])
+
+    def test_malformed_budget_is_ignored(self):
+        for value in ('soon', 'nan'):
+            response = self.client.get('/api/dogs/public/', HTTP_X_REQUEST_BUDGET=value)
+            self.assertEqual(response.status_code, 200)
+
+# Uploaded images get resized WebP and JPEG variants, stored next to the
+# original and listed by the serializers once the upload commits.
+MEDIA_ROOT = tempfile.mkdtemp()
+
+@override_settings(
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    MEDIA_ROOT=MEDIA_ROOT,
+    MEDIA_URL='/media/',
+    IMAGE_VARIANTS={'thumb': 160, 'card': 480},
+    IMAGE_VARIANTS_MODE='inline',
+)
+class ImageVariantTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def upload(self, size, mode='RGB'):
+        buffer = io.BytesIO()
+        Image.new(mode, size, 'red').save(buffer, 'PNG')
+        return SimpleUploadedFile('dog.png', buffer.getvalue(), content_type='image/png')
+
+    def test_variants_are_built_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dog = Dog.objects.create(name='Rex', image=self.upload((1200, 800), 'RGBA'))
+        dog.refresh_from_db()
+        self.assertEqual(dog.imageVariants['card']['width'], 480)
+        self.assertEqual(dog.imageVariants['card']['height'], 320)
+        self.assertEqual(dog.imageVariants['thumb']['width'], 160)
+        with dog.image.storage.open(dog.imageVariants['thumb']['webp']) as f:
+            self.assertEqual(Image.open(f).format, 'WEBP')
+
+        data = APIClient().get('/api/dogs/public/').json()
+        card = next(d for d in data if d['id'] == dog.id)['imageVariants']['card']
+        self.assertTrue(card['jpeg'].startswith('http://testserver/media/Dogs_Service/dog/images/variants/dog'))
+        self.assertTrue(card['jpeg'].endswith('-card.jpeg'))
+
+    def test_small_images_are_not_scaled_up(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = DogCategory.objects.create(name='Small', image=self.upload((300, 200)))
+        category.refresh_from_db()
+        self.assertEqual(category.imageVariants['card']['width'], 300)
+        self.assertEqual(category.imageVariants['thumb']['width'], 160)
+
+    def test_new_image_replaces_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dog = Dog.objects.create(name='Rex', image=self.upload((600, 600)))
+        dog.refresh_from_db()
+        old = dog.imageVariants['card']['jpeg']
+        dog.image = self.upload((800, 400))
+        with self.captureOnCommitCallbacks(execute=True):
+            dog.save()
+        dog.refresh_from_db()
+        self.assertNotEqual(dog.imageVariants['card']['jpeg'], old)
+        self.assertEqual(dog.imageVariants['card']['height'], 240)
+
+        dog.image = None
+        dog.save()
+        self.assertEqual(dog.imageVariants, {})
+
+# Access tokens are verified in-process like Account's SIMPLE_JWT does, and the
+# Account service (through the orchestrator) is only asked when that cannot be
+# done: no signing key, or the blacklist could not be read.
+SIGNING_KEY = 'k' * 32
+
+def make_token(key=SIGNING_KEY, lifetime=600, **claims):
+    payload = {'token_type': 'access', 'exp': int(time.time()) + lifetime, 'jti': uuid.uuid4().hex}
+    payload.update(claims)
+    payload = {name: value for name, value in payload.items() if value is not None}
+    return jwt.encode(payload, key, algorithm='HS256')
+
+def blacklist(jti):
+    BlacklistedToken.objects.create(token=OutstandingToken.objects.create(jti=jti))
+
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class LocalTokenVerificationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        remote = mock.patch.object(CustomJWTAuthentication, 'verify_remotely', return_value=False)
+        self.verify_remotely = remote.start()
+        self.addCleanup(remote.stop)
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer {}'.format(token))
+        return CustomJWTAuthentication().authenticate(request)
+
+    def assertRejected(self, token):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+        self.verify_remotely.assert_not_called()
+
+    def test_valid_token_is_accepted_without_remote_call(self):
+        token = make_token()
+        self.assertEqual(self.authenticate(token), (None, token))
+        self.verify_remotely.assert_not_called()
+
+    def test_expired_token_is_rejected(self):
+        self.assertRejected(make_token(lifetime=-1))
+
+    def test_token_without_exp_or_jti_is_rejected(self):
+        self.assertRejected(make_token(exp=None))
+        self.assertRejected(make_token(jti=None))
+
+    def test_refresh_token_is_rejected(self):
+        self.assertRejected(make_token(token_type='refresh'))
+
+    def test_bad_signature_is_rejected(self):
+        self.assertRejected(make_token(key='x' * 32))
+
+    def test_blacklisted_token_is_rejected(self):
+        jti = uuid.uuid4().hex
+        blacklist(jti)
+        self.assertRejected(make_token(jti=jti))
+
+    @override_settings(JWT_SIGNING_KEY=None)
+    def test_without_signing_key_account_decides(self):
+        token = make_token()
+        self.verify_remotely.return_value = True
+        self.assertEqual(self.authenticate(token), (None, token))
+        self.verify_remotely.assert_called_once_with(token)
+
+        self.verify_remotely.return_value = False
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(make_token())
+
+    def test_unreadable_blacklist_falls_back_to_account(self):
+        token = make_token()
+        self.verify_remotely.return_value = True
+        with mock.patch.object(BlacklistedToken.objects, 'filter', side_effect=DatabaseError):
+            self.assertEqual(self.authenticate(token), (None, token))
+        self.verify_remotely.assert_called_once_with(token)
+
+# The verified-token cache keeps the most recently used tokens, each until the
+# TTL or its exp, whichever comes first, and drops blacklisted ones on the
+# next blacklist poll.
+class VerifiedTokenCacheTests(TestCase):
+    def setUp(self):
+        self.now = 1000000.0
+        clock = mock.patch(VerifiedTokenCache.__module__ + '.time')
+        self.clock = clock.start()
+        self.clock.time.return_value = self.now
+        self.addCleanup(clock.stop)
+
+    def tick(self, seconds):
+        self.clock.time.return_value += seconds
+
+    def payload(self, lifetime=600):
+        return {'exp': self.now + lifetime, 'jti': uuid.uuid4().hex}
+
+    def test_least_recently_used_token_is_evicted(self):
+        cache = VerifiedTokenCache(max_size=2, ttl=60, blacklist_interval=60)
+        cache.add('a', self.payload())
+        cache.add('b', self.payload())
+        self.assertTrue(cache.get('a'))
+        cache.add('c', self.payload())
+        self.assertTrue(cache.get('a'))
+        self.assertTrue(cache.get('c'))
+        self.assertFalse(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_entry_expires_after_ttl(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=60, blacklist_interval=600)
+        cache.add('a', self.payload(lifetime=600))
+        self.tick(59)
+        self.assertTrue(cache.get('a'))
+        self.tick(2)
+        self.assertFalse(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_entry_never_outlives_token_exp(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=300, blacklist_interval=600)
+        cache.add('a', self.payload(lifetime=30))
+        cache.add('expired', self.payload(lifetime=-1))
+        self.assertEqual(cache.stats()['size'], 1)
+        self.tick(29)
+        self.assertTrue(cache.get('a'))
+        self.tick(2)
+        self.assertFalse(cache.get('a'))
+
+    def test_blacklisted_token_is_evicted_on_next_poll(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=300, blacklist_interval=5)
+        payload = self.payload()
+        cache.add('a', payload)
+        self.assertTrue(cache.get('a'))
+        blacklist(payload['jti'])
+        # still accepted until the next poll of the blacklist
+        self.assertTrue(cache.get('a'))
+        self.tick(5)
+        self.assertFalse(cache.get('a'))
+
+# renewSponsors clears the sponsorships that ended before today in one UPDATE,
+# runs at startup to catch up on a missed midnight, and records its latest run
+# in the database for every worker's metrics. Only the process holding the
+# advisory lock runs the scheduler.
+class RenewSponsorsTests(TestCase):
+    def setUp(self):
+        # it would close the connection of the test's transaction
+        patcher = mock.patch.object(cron, 'close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        today = timezone.localdate()
+        self.expired = Dog.objects.create(name='Rex', is_sponsored=True, sponsorExpirationDate=today - timedelta(days=1))
+        self.current = Dog.objects.create(name='Bella', is_sponsored=True, sponsorExpirationDate=today)
+
+    def test_expired_sponsorships_are_cleared_once(self):
+        cron.renewSponsors()
+        self.expired.refresh_from_db()
+        self.current.refresh_from_db()
+        self.assertEqual((self.expired.is_sponsored, self.expired.sponsorExpirationDate), (False, None))
+        self.assertTrue(self.current.is_sponsored)
+        self.assertEqual(JobRun.objects.get(name='renewSponsors').rowsUpdated, 1)
+
+        version = CacheVersion.objects.get(namespace='dogs').token
+        updatedAt = self.expired.updatedAt
+        cron.renewSponsors()
+        self.expired.refresh_from_db()
+        self.assertEqual(self.expired.updatedAt, updatedAt)
+        self.assertEqual(CacheVersion.objects.get(namespace='dogs').token, version)
+        self.assertEqual(JobRun.objects.get(name='renewSponsors').rowsUpdated, 0)
+
+    def test_metrics_report_the_latest_run(self):
+        response = self.client.get('/api/dogs/metrics/')
+        self.assertIsNone(response.json()['renewSponsors'])
+        cron.renewSponsors()
+        run = self.client.get('/api/dogs/metrics/').json()['renewSponsors']
+        self.assertEqual(run['rowsUpdated'], 1)
+        self.assertEqual(set(run), {'startedAt', 'rowsUpdated', 'durationMs'})
+
+    def test_scheduler_catches_up_at_startup(self):
+        scheduler = cron.create_scheduler()
+        job, = scheduler.get_jobs()
+        self.assertIs(job.func, cron.renewSponsors)
+        self.assertLessEqual(job.next_run_time, timezone.now())
+        self.assertEqual(str(job.trigger.fields[5]), '0')
+        self.assertEqual(job.max_instances, 1)
+
+class SchedulerLeaderTests(TestCase):
+    def setUp(self):
+        scheduler = mock.patch.object(cron, 'create_scheduler')
+        self.create_scheduler = scheduler.start()
+        self.addCleanup(scheduler.stop)
+        self.leaders = [cron.SchedulerLeader(), cron.SchedulerLeader()]
+        for leader in self.leaders:
+            self.addCleanup(leader.release)
+
+    # the server drops the lock of a closed session once its backend exits
+    def take_lead(self, leader):
+        for i in range(50):
+            leader.step()
+            if leader.scheduler is not None:
+                return
+            time.sleep(0.05)
+        self.fail('the lock was not released')
+
+    def test_one_leader_holds_the_lock(self):
+        first, second = self.leaders
+        first.step()
+        second.step()
+        self.assertIsNotNone(first.scheduler)
+        self.assertIsNone(second.scheduler)
+        self.create_scheduler.return_value.start.assert_called_once_with()
+
+        first.release()
+        self.take_lead(second)
+
+    def test_leader_stops_when_its_lock_is_lost(self):
+        first, second = self.leaders
+        first.step()
+        scheduler = first.scheduler
+        with first.connection.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            pid = cursor.fetchone()[0]
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+
+        first.step()
+        self.assertIsNone(first.scheduler)
+        scheduler.shutdown.assert_called_once_with(wait=False)
+        self.take_lead(second)
+
+    def test_scheduler_is_not_started_outside_the_app_server(self):
+        from django.apps import apps
+        with mock.patch.object(cron, 'start') as start:
+            apps.get_app_config('Dogs_Service').ready()
+            start.assert_not_called()
+            with override_settings(RUN_SCHEDULER=True):
+                apps.get_app_config('Dogs_Service').ready()
+            start.assert_called_once_with()
+
+# Direct uploads against an in-memory S3 (moto): a ticket is issued for one
+# dog or category, the client uploads to the presigned target, and completing
+# the upload attaches the key to that object only, once it is in the bucket
+# within the size announced.
+BUCKET = 'dogs-uploads'
+
+@unittest.skipIf(mock_s3 is None, 'moto is not installed')
+@override_settings(
+    STORAGES={
+        'default': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    AWS_ACCESS_KEY_ID='testing',
+    AWS_SECRET_ACCESS_KEY='testing',
+    AWS_STORAGE_BUCKET_NAME=BUCKET,
+    AWS_S3_REGION_NAME='us-east-1',
+    AWS_S3_ENDPOINT_URL=None,
+    UPLOAD_ENDPOINT_URL=None,
+    UPLOAD_MAX_SIZE=1024,
+    JWT_VERIFICATION='local',
+    JWT_SIGNING_KEY=SIGNING_KEY,
+)
+class DirectUploadTests(TestCase):
+    def setUp(self):
+        s3 = mock_s3()
+        s3.start()
+        self.addCleanup(s3.stop)
+        self.s3 = boto3.client('s3', region_name='us-east-1', aws_access_key_id='testing', aws_secret_access_key='testing')
+        self.s3.create_bucket(Bucket=BUCKET)
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        self.dog = Dog.objects.create(name='Rex')
+
+    def ticket(self, **data):
+        data = dict({'target': 'dog', 'id': self.dog.id, 'filename': 'rex.png', 'contentType': 'image/png', 'size': 100}, **data)
+        return self.client.post('/api/dogs/uploads/', data, format='json')
+
+    def complete(self, ticket, id):
+        return self.client.post('/api/dogs/uploads/complete/', {'ticket': ticket, 'id': id}, format='json')
+
+    def test_post_form_upload(self):
+        response = self.ticket()
+        self.assertEqual(response.status_code, 201)
+        ticket = response.json()
+        self.assertEqual(ticket['method'], 'POST')
+        self.assertTrue(ticket['name'].startswith('Dogs_Service/dog/images/'))
+        self.assertTrue(ticket['name'].endswith('/rex.png'))
+        policy = json.loads(base64.b64decode(ticket['fields']['policy']))
+        self.assertIn(['content-length-range', 1, 100], policy['conditions'])
+
+        self.assertEqual(self.complete(ticket['ticket'], self.dog.id).json(), {'error': 'Image has not been uploaded yet!'})
+        upload = requests.post(ticket['url'], data=ticket['fields'], files={'file': ('rex.png', b'x' * 100)})
+        self.assertLess(upload.status_code, 300)
+
+        response = self.complete(ticket['ticket'], self.dog.id)
+        self.assertEqual(response.status_code, 200)
+        self.dog.refresh_from_db()
+        self.assertEqual(self.dog.image.name, ticket['name'])
+
+    def test_put_upload(self):
+        ticket = self.ticket(method='PUT').json()
+        self.assertEqual(ticket['method'], 'PUT')
+        upload = requests.put(ticket['url'], data=b'x' * 100, headers=ticket['headers'])
+        self.assertEqual(upload.status_code, 200)
+        self.assertEqual(self.complete(ticket['ticket'], self.dog.id).status_code, 200)
+
+    def test_oversize_upload_is_rejected_and_deleted(self):
+        ticket = self.ticket(size=10).json()
+        self.s3.put_object(Bucket=BUCKET, Key=ticket['name'], Body=b'x' * 11)
+        response = self.complete(ticket['ticket'], self.dog.id)
+        self.assertEqual(response.json(), {'error': 'Uploaded image is larger than announced!'})
+        self.assertEqual(self.s3.list_objects_v2(Bucket=BUCKET)['KeyCount'], 0)
+        self.dog.refresh_from_db()
+        self.assertFalse(self.dog.image)
+
+    def test_ticket_is_bound_to_its_object(self):
+        other = Dog.objects.create(name='Bella')
+        ticket = self.ticket().json()
+        self.s3.put_object(Bucket=BUCKET, Key=ticket['name'], Body=b'x' * 100)
+
+        response = self.complete(ticket['ticket'], other.id)
+        self.assertEqual(response.json(), {'error': 'Upload ticket was issued for another dog!'})
+        self.assertEqual(self.complete(ticket['ticket'][:-2] + 'xx', self.dog.id).json(), {'error': 'Invalid or expired upload ticket!'})
+        other.refresh_from_db()
+        self.assertFalse(other.image)
+
+        category = DogCategory.objects.create(name='Senior')
+        ticket = self.ticket(target='category', id=category.id).json()
+        self.s3.put_object(Bucket=BUCKET, Key=ticket['name'], Body=b'x' * 100)
+        self.assertEqual(self.complete(ticket['ticket'], category.id).status_code, 200)
+        category.refresh_from_db()
+        self.assertEqual(category.image.name, ticket['name'])
+        self.assertTrue(ticket['name'].startswith('Dogs_Service/category/images/'))
+
+    def test_invalid_ticket_requests(self):
+        self.assertEqual(self.ticket(id=self.dog.id + 1000).status_code, 404)
+        self.assertEqual(self.ticket(id='rex').status_code, 400)
+        self.assertEqual(self.ticket(contentType='text/html').status_code, 400)
+        self.assertEqual(self.ticket(size=1025).status_code, 400)
+        self.assertEqual(self.ticket(target='walk').status_code, 400)
+
+# Dog and category forms as the orchestrator relays them: categories as one
+# comma-separated field or repeated fields, an empty one clearing them, and an
+# empty image field keeping the current image.
+@override_settings(
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    MEDIA_URL='/media/',
+    JWT_VERIFICATION='local',
+    JWT_SIGNING_KEY=SIGNING_KEY,
+)
+class DogFormTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = self.settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        self.categories = [DogCategory.objects.create(name=name) for name in ('Senior', 'Puppy', 'Shy')]
+
+    def image(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10), 'red').save(buffer, 'PNG')
+        return SimpleUploadedFile('rex.png', buffer.getvalue(), content_type='image/png')
+
+    def categoryIDs(self, dog):
+        return sorted(dog.categories.values_list('id', flat=True))
+
+    def test_comma_separated_and_repeated_categories(self):
+        first, second, third = (category.id for category in self.categories)
+        response = self.client.post('/api/dogs/', {'name': 'Rex', 'categories': '{}, {}'.format(first, second)}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.categoryIDs(Dog.objects.get(pk=response.json()['id'])), [first, second])
+
+        response = self.client.post('/api/dogs/', {'name': 'Bella', 'categories': [str(first), '{},{}'.format(second, third)]}, format='multipart')
+        self.assertEqual(self.categoryIDs(Dog.objects.get(pk=response.json()['id'])), [first, second, third])
+
+        response = self.client.post('/api/dogs/', {'name': 'Max', 'categories': '1,rex'}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('categories', response.json())
+
+    def test_responses_leave_out_updated_at(self):
+        dog = self.client.post('/api/dogs/', {'name': 'Rex'}, format='multipart').json()
+        category = self.client.get('/api/dogs/categories/{}/'.format(self.categories[0].id)).json()
+        self.assertNotIn('updatedAt', dog)
+        self.assertEqual(sorted(category), ['desc', 'id', 'image', 'imageVariants', 'name'])
+
+    def test_empty_categories_clear_them(self):
+        dog = Dog.objects.create(name='Rex')
+        dog.categories.set(self.categories)
+        response = self.client.put('/api/dogs/{}/update/'.format(dog.id), {'name': 'Rex', 'categories': ''}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['categories'], [])
+        self.assertEqual(self.categoryIDs(dog), [])
+
+    def test_update_without_image_keeps_it(self):
+        response = self.client.post('/api/dogs/', {'name': 'Rex', 'image': self.image()}, format='multipart')
+        dog = Dog.objects.get(pk=response.json()['id'])
+        image = dog.image.name
+        self.assertTrue(image)
+
+        response = self.client.put('/api/dogs/{}/update/'.format(dog.id), {'name': 'Rexy', 'image': ''}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        dog.refresh_from_db()
+        self.assertEqual((dog.name, dog.image.name), ('Rexy', image))
+
+        category = self.categories[0]
+        response = self.client.put('/api/dogs/categories/{}/update/'.format(category.id), {'name': 'Seniors', 'image': ''}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        category.refresh_from_db()
+        self.assertEqual(category.name, 'Seniors')
+        self.assertFalse(category.image)
+
+# The list filters run in the database; each narrows the public list on its own.
+class DogFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Dog.objects.all().delete()
+        year = date.today().year
+        self.senior, self.puppy = (DogCategory.objects.create(name=name) for name in ('Senior', 'Puppy'))
+        self.rex = Dog.objects.create(name='Rex', gender='Male', DOB=date(year - 6, 6, 1), is_sponsored=True)
+        self.rosie = Dog.objects.create(name='rosie', gender='Female', DOB=date(year - 3, 6, 1))
+        self.max = Dog.objects.create(name='Max', gender='Male', DOB=date(year - 1, 6, 1))
+        self.bella = Dog.objects.create(name='Bella', gender='Female')
+        self.rex.categories.add(self.senior)
+        self.rosie.categories.add(self.puppy)
+        self.max.categories.add(self.senior, self.puppy)
+
+    def names(self, **params):
+        response = self.client.get('/api/dogs/public/', params)
+        self.assertEqual(response.status_code, 200)
+        return [dog['name'] for dog in response.json()]
+
+    def test_name_is_a_case_insensitive_prefix(self):
+        self.assertEqual(self.names(name='r'), ['Rex', 'rosie'])
+        self.assertEqual(self.names(name='ROS'), ['rosie'])
+        self.assertEqual(self.names(name='ex'), [])
+
+    def test_gender(self):
+        self.assertEqual(self.names(gender='Female'), ['Bella', 'rosie'])
+
+    def test_categories_match_any_and_ignore_invalid_ids(self):
+        self.assertEqual(self.names(category=self.senior.id), ['Max', 'Rex'])
+        self.assertEqual(self.names(category=[self.senior.id, self.puppy.id]), ['Max', 'Rex', 'rosie'])
+        self.assertEqual(self.names(category='senior'), ['Bella', 'Max', 'Rex', 'rosie'])
+
+    def test_age_range_counts_from_the_birth_year(self):
+        self.assertEqual(self.names(minAge=3), ['Rex', 'rosie'])
+        self.assertEqual(self.names(maxAge=3), ['Max', 'rosie'])
+        self.assertEqual(self.names(minAge=2, maxAge=5), ['rosie'])
+
+    def test_sponsored(self):
+        self.assertEqual(self.names(sponsored='true'), ['Rex'])
+        self.assertEqual(self.names(sponsored='false'), ['Bella', 'Max', 'rosie'])
+        self.assertEqual(len(self.names(sponsored='yes')), 4)
+
+    def test_filters_combine(self):
+        self.assertEqual(self.names(gender='Male', category=self.puppy.id), ['Max'])
+
+    # the prefix index is created by migration 0008 (raw SQL), not by the models
+    # the test database is built from
+    def test_name_prefix_uses_the_pattern_index(self):
+        migration = importlib.import_module('Dogs_Service.migrations.0008_dog_name_prefix_index').Migration
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(migration.operations[0].sql)
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('dog_name_upper_prefix_idx', Dog.objects.filter(name__istartswith='ro').explain())
+
+# Cursors page the ordered list without repeating or skipping a dog, even
+# across runs of equal names: the id always ends the ordering.
+class DogCursorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Dog.objects.all().delete()
+        for name in ('Rex', 'Bella', 'Rex', 'Max', 'Rex', 'Bella', 'Rex'):
+            Dog.objects.create(name=name)
+
+    def traverse(self, **params):
+        pages, cursors, cursor = [], [], None
+        while True:
+            query = dict(params, pageSize=2)
+            if cursor:
+                query['cursor'] = cursor
+            body = self.client.get('/api/dogs/public/', query).json()
+            pages.append([dog['id'] for dog in body['results']])
+            cursors.append(cursor)
+            cursor = body['next']
+            if not cursor:
+                return pages, cursors
+
+    def test_pages_cover_ties_once_in_order(self):
+        for ordering, expected in (
+            (None, Dog.objects.order_by('name', 'id')),
+            ('name', Dog.objects.order_by('name', 'id')),
+            ('-name', Dog.objects.order_by('-name', '-id')),
+        ):
+            params = {'ordering': ordering} if ordering else {}
+            pages, _ = self.traverse(**params)
+            self.assertEqual(sum(pages, []), [dog.id for dog in expected])
+
+    def test_previous_cursors_return_the_same_pages(self):
+        pages, cursors = self.traverse(ordering='name')
+        body = self.client.get('/api/dogs/public/', {'ordering': 'name', 'pageSize': 2, 'cursor': cursors[-1]}).json()
+        backwards = []
+        while body['previous']:
+            body = self.client.get('/api/dogs/public/', {'ordering': 'name', 'pageSize': 2, 'cursor': body['previous']}).json()
+            backwards.insert(0, [dog['id'] for dog in body['results']])
+        self.assertEqual(backwards, pages[:-1])
+
+    def test_malformed_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/dogs/public/', {'cursor': 'cD1ub3Bl'}).status_code, 404)
+        self.assertEqual(self.client.get('/api/dogs/public/', {'cursor': 'cD0lNUIlMjJSZXglMjIlNUQ='}).status_code, 404)
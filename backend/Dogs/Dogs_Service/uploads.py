@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.utils.text import get_valid_filename
+from botocore.config import Config
+import boto3
+import posixpath
+import uuid
+
+# Direct uploads of dog and category images to the object storage. The Dogs
+# service only signs: an upload ticket names a fresh key under the model's
+# upload_to, with a presigned POST form (size and type enforced by S3) or PUT
+# URL for it, and the client sends the file straight to the bucket. Completing
+# the upload attaches the key to the dog or category once the object is
+# there. The ticket itself is signed with SECRET_KEY and names the target and
+# primary key of the object, so only keys issued here can be attached, and
+# only to the object they were issued for.
+# AWS_S3_ENDPOINT_URL points the storage at an S3-compatible server such as
+# MinIO; UPLOAD_ENDPOINT_URL is that server as the browser reaches it.
+
+SALT = 'Dogs_Service.uploads'
+
+
+class UploadError(Exception):
+    pass
+
+
+def supported():
+    return hasattr(default_storage, 'bucket_name')
+
+def signing_client():
+    return boto3.client(
+        's3',
+        aws_access_key_id=default_storage.access_key,
+        aws_secret_access_key=default_storage.secret_key,
+        region_name=default_storage.region_name,
+        endpoint_url=settings.UPLOAD_ENDPOINT_URL or default_storage.endpoint_url,
+        config=Config(signature_version='s3v4'),
+    )
+
+# object key of a storage name, with the storage's location prefix
+def object_key(name):
+    location = default_storage.location
+    return posixpath.join(location, name) if location else name
+
+def new_name(model, filename):
+    upload_to = model._meta.get_field('image').upload_to
+    filename = get_valid_filename(posixpath.basename(filename or '')) or 'image'
+    return posixpath.join(upload_to, uuid.uuid4().hex, filename)
+
+def issue(model, target, pk, filename, contentType, size, method):
+    if contentType not in settings.UPLOAD_CONTENT_TYPES:
+        raise UploadError('contentType must be one of {}!'.format(', '.join(settings.UPLOAD_CONTENT_TYPES)))
+    if not 0 < size <= settings.UPLOAD_MAX_SIZE:
+        raise UploadError('size must be between 1 and {} bytes!'.format(settings.UPLOAD_MAX_SIZE))
+
+    name = new_name(model, filename)
+    key = object_key(name)
+    client = signing_client()
+    expiresIn = settings.UPLOAD_TICKET_TTL
+    if method == 'PUT':
+        upload = {
+            'method': 'PUT',
+            'url': client.generate_presigned_url(
+                'put_object',
+                Params={'Bucket': default_storage.bucket_name, 'Key': key, 'ContentType': contentType, 'ContentLength': size},
+                ExpiresIn=expiresIn,
+            ),
+            'headers': {'Content-Type': contentType},
+        }
+    else:
+        post = client.generate_presigned_post(
+            default_storage.bucket_name,
+            key,
+            Fields={'Content-Type': contentType},
+            Conditions=[{'Content-Type': contentType}, ['content-length-range', 1, size]],
+            ExpiresIn=expiresIn,
+        )
+        upload = {'method': 'POST', 'url': post['url'], 'fields': post['fields']}
+
+    ticket = signing.dumps({'target': target, 'id': pk, 'name': name, 'size': size}, salt=SALT)
+    return dict(upload, ticket=ticket, name=name, expiresIn=expiresIn)
+
+# the ticket's target, object pk and storage name, once its object is in the
+# bucket within the size issued; `pk` must be the object it was issued for
+def verify(ticket, pk):
+    try:
+        data = signing.loads(ticket or '', salt=SALT, max_age=settings.UPLOAD_TICKET_TTL * 2)
+    except signing.BadSignature:
+        raise UploadError('Invalid or expired upload ticket!')
+    if str(pk) != str(data['id']):
+        raise UploadError('Upload ticket was issued for another {}!'.format(data['target']))
+    if not default_storage.exists(data['name']):
+        raise UploadError('Image has not been uploaded yet!')
+    if default_storage.size(data['name']) > data['size']:
+        default_storage.delete(data['name'])
+        raise UploadError('Uploaded image is larger than announced!')
+    return data['target'], data['id'], data['name']
@@ -11,6 +11,15 @@ urlpatterns = [
     path('public/categories/', views.PublicDogCategoryListAPIView.as_view()),
     ### END OF PUBLIC LIST URLS ###
     
+    ### START OF DIRECT UPLOAD URLS ###
+    path('uploads/', views.ImageUploadTicketAPIView.as_view()),
+    path('uploads/complete/', views.CompleteImageUploadAPIView.as_view()),
+    ### END OF DIRECT UPLOAD URLS ###
+    
+    ### START OF METRICS URLS ###
+    path('metrics/', views.MetricsAPIView.as_view()),
+    ### END OF METRICS URLS ###
+    
     ### START OF PAYMENT-RELATED URLS ###
     path('updateDogSponsor/', views.UpdateDogSponsorAPIView.as_view()),
     ### END OF PAYMENT-RELATED URLS ###
@@ -3,14 +3,30 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
+from rest_framework.filters import OrderingFilter
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from datetime import datetime
 import pytz
 
 from .auth.auth import CustomJWTAuthentication
 from rest_framework.permissions import AllowAny
 
-from .models import Dog, DogCategory
+from .models import Dog, DogCategory, JobRun
 from .serializers import DogSerializer, DogCategorySerializer
+from .filters import DogFilterBackend
+from .pagination import DogCursorPagination
+from .etags import list_etag
+from .response_cache import CachedListMixin, response_cache
+from .auth.cache import token_cache
+from . import uploads
+
+# Conditional GET for the dog and category lists, validated by the version of
+# the response cache namespace they are cached under
+dog_list_condition = condition(etag_func=list_etag('dogs'))
+dog_category_list_condition = condition(etag_func=list_etag('categories'))
 
 ### START OF ADMIN CRUD DOGS VIEWS ###
 
@@ -25,15 +41,20 @@ class DogDetailAPIView(generics.RetrieveAPIView):
     lookup_field = "pk"
 
 
-# Get ALL dog objects
+# Get ALL dog objects, optionally filtered, ordered and cursor-paginated
 # Create a dog object given valid form data
+@method_decorator(dog_list_condition, name='get')
 class DogListCreateAPIView(generics.ListCreateAPIView):
     authentication_classes = (CustomJWTAuthentication,)
     permission_classes = (AllowAny,)
 
-    queryset = Dog.objects.all()
+    queryset = Dog.objects.prefetch_related('categories')
     serializer_class = DogSerializer
     parser_classes = (MultiPartParser, FormParser)
+    filter_backends = (DogFilterBackend, OrderingFilter)
+    ordering_fields = ('name', 'id')
+    ordering = ('id',)
+    pagination_class = DogCursorPagination
 
     def perform_create(self, serializer):
         image = self.request.FILES.get("image")
@@ -43,13 +64,20 @@ class DogListCreateAPIView(generics.ListCreateAPIView):
             serializer.save()
 
 
-# Get ALL dog objects with no permissions/authentication
-class PublicDogListAPIView(generics.ListAPIView):
+# Get ALL dog objects with no permissions/authentication, optionally filtered,
+# ordered and cursor-paginated (cached)
+@method_decorator(dog_list_condition, name='get')
+class PublicDogListAPIView(CachedListMixin, generics.ListAPIView):
     authentication_classes = []
     permission_classes = (AllowAny,)
+    cache_namespace = 'dogs'
 
-    queryset = Dog.objects.all()
+    queryset = Dog.objects.prefetch_related('categories')
     serializer_class = DogSerializer
+    filter_backends = (DogFilterBackend, OrderingFilter)
+    ordering_fields = ('name', 'id')
+    ordering = ('name', 'id')
+    pagination_class = DogCursorPagination
 
 
 # Update dog object given valid form data and its primary key
@@ -122,6 +150,7 @@ class DogCategoryDetailAPIView(generics.RetrieveAPIView):
 
 # Get ALL dog category objects
 # Create a dog category object given valid form data
+@method_decorator(dog_category_list_condition, name='get')
 class DogCategoryListCreateAPIView(generics.ListCreateAPIView):
     authentication_classes = (CustomJWTAuthentication,)
     permission_classes = (AllowAny,)
@@ -138,10 +167,12 @@ class DogCategoryListCreateAPIView(generics.ListCreateAPIView):
             serializer.save()
 
 
-# Get ALL dog category objects
-class PublicDogCategoryListAPIView(generics.ListAPIView):
+# Get ALL dog category objects (cached)
+@method_decorator(dog_category_list_condition, name='get')
+class PublicDogCategoryListAPIView(CachedListMixin, generics.ListAPIView):
     authentication_classes = []
     permission_classes = (AllowAny,)
+    cache_namespace = 'categories'
 
     queryset = DogCategory.objects.all()
     serializer_class = DogCategorySerializer
@@ -201,16 +232,20 @@ class CheckIfDogCategoryExistsAPIView(GenericAPIView):
 ### START OF PUBLIC-RELATED VIEWS ###
 
 
-# Gets ALL dog objects given category primary key
+# Gets ALL dog objects given category primary key (cached)
 class DogsByCategoryAPIView(GenericAPIView):
     authentication_classes = []
     permission_classes = (AllowAny,)
 
     def post(self, request):
         category_id = request.data["category_id"]
-        dogs = Dog.objects.filter(categories__id=category_id)
-        serializer = DogSerializer(dogs, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        key = response_cache.key(request, 'dogs', 'byCategory', category_id)
+        data = response_cache.get(key)
+        if data is None:
+            dogs = Dog.objects.filter(categories__id=category_id).prefetch_related('categories')
+            data = DogSerializer(dogs, many=True).data
+            response_cache.set(key, data)
+        return Response(data, status=status.HTTP_200_OK)
 
 
 ### END OF PUBLIC-RELATED VIEWS ###
@@ -231,9 +266,95 @@ class UpdateDogSponsorAPIView(GenericAPIView):
         dog = Dog.objects.get(id=id)
         Dog.objects.filter(id=id).update(
             is_sponsored=True, 
-            sponsorExpirationDate=sponsorExpirationDate 
+            sponsorExpirationDate=sponsorExpirationDate,
+            updatedAt=timezone.now()
         )
+        response_cache.invalidate('dogs')
         return Response({"dog_name": dog.name}, status=status.HTTP_200_OK)
 
 
 ### END OF PAYMENT-RELATED VIEWS ###
+
+### START OF DIRECT UPLOAD VIEWS ###
+
+
+UPLOAD_TARGETS = {
+    'dog': (Dog, DogSerializer),
+    'category': (DogCategory, DogCategorySerializer),
+}
+
+# Issue a ticket to upload a dog or category image straight to the bucket (see
+# uploads.py), given target ("dog" or "category"), the object's id, filename,
+# contentType, size in bytes and optionally method ("POST" form, the default,
+# or "PUT"). The ticket is only good for that object.
+class ImageUploadTicketAPIView(GenericAPIView):
+    authentication_classes = (CustomJWTAuthentication,)
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        if not uploads.supported():
+            return Response({'error': 'Direct uploads need S3 storage!'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        target = request.data.get('target')
+        if target not in UPLOAD_TARGETS:
+            return Response({'error': 'target must be dog or category!'}, status=status.HTTP_400_BAD_REQUEST)
+        method = request.data.get('method', 'POST')
+        if method not in ('POST', 'PUT'):
+            return Response({'error': 'method must be POST or PUT!'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            return Response({'error': 'size must be a number of bytes!'}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = UPLOAD_TARGETS[target][0]
+        try:
+            obj = get_object_or_404(model, pk=int(request.data.get('id')))
+        except (TypeError, ValueError):
+            return Response({'error': 'id must be the id of the {}!'.format(target)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ticket = uploads.issue(model, target, obj.pk, request.data.get('filename'), request.data.get('contentType'), size, method)
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ticket, status=status.HTTP_201_CREATED)
+
+
+# Attach an uploaded image to a dog or category, given the upload ticket and
+# the id of the object it was issued for. The new image gets its variants
+# built like any other.
+class CompleteImageUploadAPIView(GenericAPIView):
+    authentication_classes = (CustomJWTAuthentication,)
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        try:
+            target, pk, name = uploads.verify(request.data.get('ticket'), request.data.get('id'))
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        model, serializer_class = UPLOAD_TARGETS[target]
+        obj = get_object_or_404(model, pk=pk)
+        obj.image = name
+        obj.imageVariants = {}
+        obj.save()
+        return Response(serializer_class(obj, context={'request': request}).data, status=status.HTTP_200_OK)
+
+
+### END OF DIRECT UPLOAD VIEWS ###
+
+### START OF METRICS VIEWS ###
+
+
+# Per-process counters: public response cache, verified-token cache and the
+# last sponsor expiry run (only set in the scheduler's leader process)
+class MetricsAPIView(GenericAPIView):
+    authentication_classes = []
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        return Response({
+            "publicCache": response_cache.stats(),
+            "tokenCache": token_cache.stats(),
+            "renewSponsors": JobRun.objects.filter(name='renewSponsors').values('startedAt', 'rowsUpdated', 'durationMs').first(),
+        }, status=status.HTTP_200_OK)
+
+
+### END OF METRICS VIEWS ###
@@ -1,9 +1,28 @@
 #!/bin/sh
 
-echo "###   Applying Database Migrations for Dogs Service   ###"
-python manage.py makemigrations
-python manage.py migrate
+# "docker-entrypoint.sh migrate" is the one-off migration job; app containers
+# only check that the schema is current and refuse to start otherwise.
+# The job only migrates Dogs_Service: the Django apps' tables are shared by all
+# services and applied by the account-migrate job, which runs last
+# (admin's migration must come after every service's user model migration).
+if [ "$1" = "migrate" ]; then
+    echo "###   Applying Database Migrations for Dogs Service   ###"
+    exec python manage.py migrate Dogs_Service --noinput
+fi
+
+export BOOT_STARTED_AT=$(python -c "import time; print(time.time())")
+
+echo "###   Checking Database Migrations for Dogs Service   ###"
+if ! python manage.py migrate --check; then
+    echo "###   Unapplied migrations, run the migrate jobs first   ###"
+    exit 1
+fi
 
 echo "###   Starting Dogs Service Server   ###"
-python manage.py runserver 0.0.0.0:8001 --noreload
+export RUN_SCHEDULER=true
+if [ "$SERVER_MODE" = "development" ]; then
+    python manage.py runserver 0.0.0.0:8001 --noreload
+else
+    exec gunicorn -c gunicorn.conf.py Dogs.wsgi:application
+fi
 
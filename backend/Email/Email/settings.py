@@ -27,6 +27,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     "corsheaders.middleware.CorsMiddleware",
+    'Email_Service.deadline.DeadlineMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,4 +87,26 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 SENDGRID_API_KEY = os.environ.get("SENDGRID_API_KEY")
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL")
-TEMPLATE_ID = os.environ.get("TEMPLATE_ID")
\ No newline at end of file
+TEMPLATE_ID = os.environ.get("TEMPLATE_ID")
+
+# Outgoing email queue (Email_Service/mail_queue.py): a SQLite file shared by
+# the workers, drained by EMAIL_SENDER_THREADS threads per server process. Up
+# to EMAIL_BATCH_SIZE messages with the same template go out in one request
+# (SendGrid takes up to 1000 personalizations). Failures are retried after
+# EMAIL_RETRY_DELAY seconds, doubling on each attempt, up to EMAIL_MAX_ATTEMPTS.
+# A claimed batch is sent again if not done within EMAIL_LEASE seconds.
+EMAIL_QUEUE_PATH = os.environ.get("EMAIL_QUEUE_PATH", BASE_DIR / "mail-queue.sqlite3")
+EMAIL_SENDER_THREADS = int(os.environ.get("EMAIL_SENDER_THREADS", 2))
+EMAIL_BATCH_SIZE = int(os.environ.get("EMAIL_BATCH_SIZE", 100))
+EMAIL_RETRY_DELAY = int(os.environ.get("EMAIL_RETRY_DELAY", 10))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get("EMAIL_MAX_ATTEMPTS", 8))
+EMAIL_LEASE = int(os.environ.get("EMAIL_LEASE", 120))
+EMAIL_POLL_INTERVAL = float(os.environ.get("EMAIL_POLL_INTERVAL", 5))
+
+# Delivery of the queued emails: Email_Service.transports.SendGridTransport, or
+# for tests and benchmarks HTTPSinkTransport (POSTs to EMAIL_SINK_URL),
+# SMTPSinkTransport (EMAIL_SMTP_HOST:EMAIL_SMTP_PORT) or LocmemTransport
+EMAIL_TRANSPORT = os.environ.get("EMAIL_TRANSPORT", "Email_Service.transports.SendGridTransport")
+EMAIL_SINK_URL = os.environ.get("EMAIL_SINK_URL")
+EMAIL_SMTP_HOST = os.environ.get("EMAIL_SMTP_HOST", "localhost")
+EMAIL_SMTP_PORT = int(os.environ.get("EMAIL_SMTP_PORT", 1025))
\ No newline at end of file
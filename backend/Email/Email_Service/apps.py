@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+import os
+import sys
 
 
 class EmailServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Email_Service'
+
+    def ready(self):
+        # only server processes send the queued emails, not other manage.py
+        # commands such as shell
+        command = sys.argv[1] if len(sys.argv) > 1 else None
+        if os.path.basename(sys.argv[0]) == 'manage.py' and command != 'runserver':
+            return
+        from .mail_queue import sender_pool
+        sender_pool.start()
@@ -0,0 +1,226 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from .transports import PermanentError
+
+logger = logging.getLogger(__name__)
+
+# Durable queue of outgoing emails in a local SQLite file (EMAIL_QUEUE_PATH),
+# shared by every worker process of the service. Requests only enqueue; the
+# sender threads claim due messages in batches of one template and sender,
+# send each batch as one transport call and retry failures with exponential
+# backoff. A claim is a lease: if its sender dies, the messages are claimed
+# again once the lease expires, so delivery is at least once. A message may
+# carry a dedupe key (e.g. the payment it is the receipt of): enqueueing a key
+# already in the queue is ignored, so a caller retrying its request does not
+# send the email twice.
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS email (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    templateID TEXT,
+    sender TEXT,
+    recipient TEXT NOT NULL,
+    data TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lastError TEXT,
+    createdAt REAL NOT NULL,
+    availableAt REAL NOT NULL,
+    leaseUntil REAL,
+    sentAt REAL,
+    dedupeKey TEXT
+);
+CREATE INDEX IF NOT EXISTS email_queue_idx ON email (status, availableAt);
+'''
+
+# queue files created before dedupeKey existed gain the column; the write lock
+# keeps two processes from adding it at once
+def upgrade(db):
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        columns = {row['name'] for row in db.execute('PRAGMA table_info(email)')}
+        if 'dedupeKey' not in columns:
+            db.execute('ALTER TABLE email ADD COLUMN dedupeKey TEXT')
+        db.execute('CREATE UNIQUE INDEX IF NOT EXISTS email_dedupe_idx ON email (dedupeKey)')
+        db.execute('COMMIT')
+    except BaseException:
+        db.execute('ROLLBACK')
+        raise
+
+
+class MailQueue:
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    # one connection per thread; autocommit unless a transaction is begun
+    def connection(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(SCHEMA)
+            upgrade(db)
+            self.local.db = db
+        return db
+
+    # returns the id of the queued message, or None if a message with the same
+    # dedupe_key was queued before
+    def enqueue(self, template_id, sender, recipient, data_dict, dedupe_key=None):
+        now = time.time()
+        cursor = self.connection().execute(
+            'INSERT INTO email (templateID, sender, recipient, data, createdAt, availableAt, dedupeKey) VALUES (?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (dedupeKey) DO NOTHING',
+            (template_id, sender, recipient, json.dumps(data_dict), now, now, dedupe_key),
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    # Lease up to `limit` due messages with the template and sender of the
+    # oldest due one. BEGIN IMMEDIATE takes the write lock first, so two
+    # senders never claim the same message.
+    def claim(self, limit, lease):
+        db = self.connection()
+        now = time.time()
+        due = "((status = 'pending' AND availableAt <= ?) OR (status = 'sending' AND leaseUntil < ?))"
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            first = db.execute(
+                'SELECT templateID, sender FROM email WHERE {} ORDER BY id LIMIT 1'.format(due), (now, now),
+            ).fetchone()
+            if first is None:
+                rows = []
+            else:
+                rows = db.execute(
+                    'SELECT * FROM email WHERE {} AND templateID IS ? AND sender IS ? ORDER BY id LIMIT ?'.format(due),
+                    (now, now, first['templateID'], first['sender'], limit),
+                ).fetchall()
+                db.executemany(
+                    "UPDATE email SET status = 'sending', leaseUntil = ? WHERE id = ?",
+                    [(now + lease, row['id']) for row in rows],
+                )
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return rows
+
+    def mark_sent(self, rows):
+        now = time.time()
+        self.connection().executemany(
+            "UPDATE email SET status = 'sent', sentAt = ?, attempts = attempts + 1, lastError = NULL WHERE id = ?",
+            [(now, row['id']) for row in rows],
+        )
+
+    # back to pending after EMAIL_RETRY_DELAY * 2^(attempts - 1) seconds, or
+    # failed for good once EMAIL_MAX_ATTEMPTS attempts were made; returns how
+    # many failed for good
+    def mark_failed(self, rows, error, permanent=False):
+        now = time.time()
+        updates = []
+        for row in rows:
+            attempts = row['attempts'] + 1
+            if permanent or attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                updates.append(('failed', attempts, error, now, row['id']))
+            else:
+                delay = settings.EMAIL_RETRY_DELAY * 2 ** (attempts - 1)
+                updates.append(('pending', attempts, error, now + delay, row['id']))
+        self.connection().executemany(
+            'UPDATE email SET status = ?, attempts = ?, lastError = ?, availableAt = ? WHERE id = ?', updates,
+        )
+        return sum(1 for update in updates if update[0] == 'failed')
+
+    def stats(self):
+        db = self.connection()
+        counts = dict(db.execute('SELECT status, COUNT(*) FROM email GROUP BY status').fetchall())
+        oldest = db.execute("SELECT MIN(createdAt) FROM email WHERE status IN ('pending', 'sending')").fetchone()[0]
+        return {
+            'pending': counts.get('pending', 0),
+            'sending': counts.get('sending', 0),
+            'sent': counts.get('sent', 0),
+            'failed': counts.get('failed', 0),
+            'lagSeconds': round(time.time() - oldest, 3) if oldest else 0,
+        }
+
+
+# EMAIL_SENDER_THREADS threads per process draining the queue. They sleep up to
+# EMAIL_POLL_INTERVAL seconds when it is empty, or until wake() is called.
+class SenderPool:
+    def __init__(self, queue):
+        self.queue = queue
+        self.transport = None
+        self.threads = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.counters = {'batches': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return
+            self.transport = import_string(settings.EMAIL_TRANSPORT)()
+            for i in range(settings.EMAIL_SENDER_THREADS):
+                thread = threading.Thread(target=self.run, name='email-sender-{}'.format(i), daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def wake(self):
+        self.wakeup.set()
+
+    def run(self):
+        while True:
+            try:
+                sent = self.send_next()
+            except Exception:
+                logger.exception('Email sender failed')
+                sent = False
+            if not sent:
+                self.wakeup.wait(settings.EMAIL_POLL_INTERVAL)
+                self.wakeup.clear()
+
+    # claim and send one batch; returns False if nothing was due
+    def send_next(self):
+        rows = self.queue.claim(settings.EMAIL_BATCH_SIZE, settings.EMAIL_LEASE)
+        if not rows:
+            return False
+        self.send(rows)
+        return True
+
+    def send(self, rows):
+        messages = [(row['recipient'], json.loads(row['data'])) for row in rows]
+        try:
+            self.transport.send(rows[0]['templateID'], rows[0]['sender'], messages)
+        except PermanentError as e:
+            if len(rows) > 1:
+                # one bad message fails the whole request: find it by sending one by one
+                for row in rows:
+                    self.send([row])
+                return
+            self.count(failed=self.queue.mark_failed(rows, repr(e), permanent=True))
+        except Exception as e:
+            failed = self.queue.mark_failed(rows, repr(e))
+            self.count(retried=len(rows) - failed, failed=failed)
+        else:
+            self.queue.mark_sent(rows)
+            self.count(batches=1, sent=len(rows))
+
+    def count(self, **increments):
+        with self.lock:
+            for name, value in increments.items():
+                self.counters[name] += value
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        counters['avgBatchSize'] = round(counters['sent'] / counters['batches'], 2) if counters['batches'] else None
+        return counters
+
+
+mail_queue = MailQueue(settings.EMAIL_QUEUE_PATH)
+sender_pool = SenderPool(mail_queue)
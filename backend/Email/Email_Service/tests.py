@@ -1,3 +1,201 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, override_settings
+from unittest import mock
+import shutil
+import sqlite3
+import tempfile
+import threading
 
-# Create your tests here.
+from . import mail_queue as mail_queue_module, views
+from .mail_queue import MailQueue, SenderPool
+from .transports import LocmemTransport, PermanentError
+
+# Emails go through a SQLite queue in a temporary directory and are delivered
+# by a sender pool whose threads are not started: the tests drive it with
+# send_next() and move the queue's clock by hand.
+
+class FailingTransport(LocmemTransport):
+    def __init__(self, *errors, bad=()):
+        self.errors = list(errors)
+        self.bad = set(bad)
+
+    def send(self, template_id, sender, messages):
+        if self.errors:
+            raise self.errors.pop(0)
+        if any(recipient in self.bad for recipient, data_dict in messages):
+            raise PermanentError('Invalid recipient')
+        super().send(template_id, sender, messages)
+
+
+@override_settings(EMAIL_BATCH_SIZE=100, EMAIL_LEASE=120, EMAIL_RETRY_DELAY=10, EMAIL_MAX_ATTEMPTS=3)
+class MailQueueTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.queue = MailQueue('{}/mail-queue.sqlite3'.format(directory))
+        self.now = 1000000.0
+        clock = mock.patch.object(mail_queue_module, 'time')
+        clock.start().time.side_effect = lambda: self.now
+        self.addCleanup(clock.stop)
+        LocmemTransport.sent = []
+        self.addCleanup(setattr, LocmemTransport, 'sent', [])
+
+    def pool(self, transport=None):
+        pool = SenderPool(self.queue)
+        pool.transport = transport or LocmemTransport()
+        return pool
+
+    def statuses(self):
+        rows = self.queue.connection().execute('SELECT id, status FROM email ORDER BY id').fetchall()
+        return [row['status'] for row in rows]
+
+    def row(self, email_id):
+        return self.queue.connection().execute('SELECT * FROM email WHERE id = ?', (email_id,)).fetchone()
+
+    def test_enqueued_emails_are_sent_in_batches_per_template_and_sender(self):
+        self.queue.enqueue('d-welcome', 'a@dogwalk.test', 'one@example.com', {'name': 'One'})
+        self.queue.enqueue('d-reset', 'a@dogwalk.test', 'two@example.com', {'name': 'Two'})
+        self.queue.enqueue('d-welcome', 'a@dogwalk.test', 'three@example.com', {'name': 'Three'})
+        pool = self.pool()
+
+        self.assertTrue(pool.send_next())
+        self.assertTrue(pool.send_next())
+        self.assertFalse(pool.send_next())
+
+        self.assertEqual(LocmemTransport.sent, [
+            ('d-welcome', 'a@dogwalk.test', [('one@example.com', {'name': 'One'}), ('three@example.com', {'name': 'Three'})]),
+            ('d-reset', 'a@dogwalk.test', [('two@example.com', {'name': 'Two'})]),
+        ])
+        self.assertEqual(self.statuses(), ['sent', 'sent', 'sent'])
+        self.assertEqual(self.queue.stats(), {'pending': 0, 'sending': 0, 'sent': 3, 'failed': 0, 'lagSeconds': 0})
+        self.assertEqual(pool.stats(), {'batches': 2, 'sent': 3, 'retried': 0, 'failed': 0, 'avgBatchSize': 1.5})
+
+    @override_settings(EMAIL_BATCH_SIZE=2)
+    def test_batches_are_limited_to_batch_size(self):
+        for i in range(5):
+            self.queue.enqueue('d-welcome', 'a@dogwalk.test', '{}@example.com'.format(i), {})
+        pool = self.pool()
+        while pool.send_next():
+            pass
+        self.assertEqual([len(messages) for _, _, messages in LocmemTransport.sent], [2, 2, 1])
+
+    def test_claimed_emails_are_claimed_again_when_the_lease_expires(self):
+        email_id = self.queue.enqueue('d-welcome', 'a@dogwalk.test', 'one@example.com', {})
+        # a sender claims the email and dies before marking it
+        self.assertEqual([row['id'] for row in self.queue.claim(100, 120)], [email_id])
+        self.assertEqual(self.statuses(), ['sending'])
+
+        pool = self.pool()
+        self.now += 119
+        self.assertFalse(pool.send_next())
+        self.now += 2
+        self.assertTrue(pool.send_next())
+
+        self.assertEqual(LocmemTransport.sent, [('d-welcome', 'a@dogwalk.test', [('one@example.com', {})])])
+        self.assertEqual(self.statuses(), ['sent'])
+
+    def test_concurrent_claims_never_share_an_email(self):
+        for i in range(60):
+            self.queue.enqueue('d-welcome', 'a@dogwalk.test', '{}@example.com'.format(i), {})
+        claimed = []
+
+        def drain():
+            while True:
+                rows = self.queue.claim(3, 120)
+                if not rows:
+                    return
+                claimed.extend(row['id'] for row in rows)
+
+        threads = [threading.Thread(target=drain) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(claimed), list(range(1, 61)))
+
+    def test_failed_sends_are_retried_with_backoff(self):
+        email_id = self.queue.enqueue('d-welcome', 'a@dogwalk.test', 'one@example.com', {})
+        pool = self.pool(FailingTransport(ConnectionError('refused'), ConnectionError('refused')))
+
+        self.assertTrue(pool.send_next())
+        email = self.row(email_id)
+        self.assertEqual((email['status'], email['attempts']), ('pending', 1))
+        self.assertEqual(email['availableAt'], self.now + 10)
+        self.assertIn('refused', email['lastError'])
+
+        self.now += 9
+        self.assertFalse(pool.send_next())
+        self.now += 1
+        self.assertTrue(pool.send_next())
+        self.assertEqual(self.row(email_id)['availableAt'], self.now + 20)
+
+        self.now += 20
+        self.assertTrue(pool.send_next())
+        email = self.row(email_id)
+        self.assertEqual((email['status'], email['attempts'], email['lastError']), ('sent', 3, None))
+        self.assertEqual(len(LocmemTransport.sent), 1)
+        self.assertEqual(pool.stats()['retried'], 2)
+
+    def test_emails_fail_after_the_last_attempt(self):
+        email_id = self.queue.enqueue('d-welcome', 'a@dogwalk.test', 'one@example.com', {})
+        pool = self.pool(FailingTransport(*[ConnectionError('refused')] * 3))
+        for delay in (0, 10, 20):
+            self.now += delay
+            self.assertTrue(pool.send_next())
+
+        self.now += 1000
+        self.assertFalse(pool.send_next())
+        self.assertEqual((self.row(email_id)['status'], self.row(email_id)['attempts']), ('failed', 3))
+        self.assertEqual(pool.stats()['failed'], 1)
+
+    def test_permanent_errors_fail_only_the_bad_email(self):
+        for recipient in ('one@example.com', 'bad', 'three@example.com'):
+            self.queue.enqueue('d-welcome', 'a@dogwalk.test', recipient, {})
+        pool = self.pool(FailingTransport(bad={'bad'}))
+
+        self.assertTrue(pool.send_next())
+
+        self.assertEqual(self.statuses(), ['sent', 'failed', 'sent'])
+        self.assertEqual(self.row(2)['attempts'], 1)
+        self.assertEqual([messages for _, _, messages in LocmemTransport.sent], [
+            [('one@example.com', {})], [('three@example.com', {})],
+        ])
+
+    def test_dedupe_key_queues_one_email(self):
+        first = self.queue.enqueue('d-receipt', 'a@dogwalk.test', 'one@example.com', {'paymentID': 'pi_1'}, dedupe_key='donation:pi_1')
+        again = self.queue.enqueue('d-receipt', 'a@dogwalk.test', 'one@example.com', {'paymentID': 'pi_1'}, dedupe_key='donation:pi_1')
+        self.queue.enqueue('d-receipt', 'a@dogwalk.test', 'two@example.com', {}, dedupe_key='donation:pi_2')
+        self.queue.enqueue('d-welcome', 'a@dogwalk.test', 'three@example.com', {})
+        self.queue.enqueue('d-welcome', 'a@dogwalk.test', 'three@example.com', {})
+        self.assertEqual((first, again), (1, None))
+        self.assertEqual(self.statuses(), ['pending'] * 4)
+
+        pool = self.pool()
+        while pool.send_next():
+            pass
+        self.assertEqual(self.queue.enqueue('d-receipt', 'a@dogwalk.test', 'one@example.com', {}, dedupe_key='donation:pi_1'), None)
+        self.assertEqual([len(messages) for _, _, messages in LocmemTransport.sent], [2, 2])
+
+    def test_queue_files_without_dedupe_key_are_upgraded(self):
+        path = '{}/old-queue.sqlite3'.format(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, path.rsplit('/', 1)[0])
+        db = sqlite3.connect(path)
+        db.executescript(mail_queue_module.SCHEMA.replace(',\n    dedupeKey TEXT', ''))
+        db.execute("INSERT INTO email (recipient, data, createdAt, availableAt) VALUES ('old@example.com', '{}', 1, 1)")
+        db.commit()
+        db.close()
+
+        queue = MailQueue(path)
+        self.assertEqual(queue.enqueue('d-receipt', 'a@dogwalk.test', 'one@example.com', {}, dedupe_key='donation:pi_1'), 2)
+        self.assertIsNone(queue.enqueue('d-receipt', 'a@dogwalk.test', 'one@example.com', {}, dedupe_key='donation:pi_1'))
+        self.assertEqual(queue.stats()['pending'], 2)
+
+    # the payment outbox retries a request whose answer it did not get
+    def test_retried_donation_email_request_queues_one_email(self):
+        data = {'paymentID': 'pi_1', 'recepient_email': 'ann@example.com', 'recepient_name': 'Ann', 'dog_name': 'Rex', 'amount_paid': '25.00 SGD'}
+        with mock.patch.object(views, 'mail_queue', self.queue), mock.patch.object(views, 'sender_pool'):
+            for i in range(2):
+                response = self.client.post('/api/email/sendDonationEmail/', data, content_type='application/json')
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.statuses()), 1)
+        self.assertEqual(self.row(1)['dedupeKey'], 'donation:pi_1')
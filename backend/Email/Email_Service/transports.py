@@ -0,0 +1,78 @@
+from django.conf import settings
+from email.message import EmailMessage
+from python_http_client import exceptions
+from sendgrid.helpers.mail import (Mail, Email, Personalization)
+import json
+import smtplib
+import sendgrid
+import urllib.error
+import urllib.request
+
+# Transports deliver one batch of messages sharing a template and sender, each
+# message being a (recipient, template data) pair. EMAIL_TRANSPORT picks the
+# class; besides SendGrid there are local sinks for tests and benchmarks.
+# A PermanentError means retrying the same batch cannot succeed; any other
+# exception is treated as temporary and the batch is retried later.
+
+class PermanentError(Exception):
+    pass
+
+
+def mail_body(template_id, sender, messages):
+    mail = Mail()
+    mail.template_id = template_id
+    mail.from_email = Email(sender)
+    for recipient, data_dict in messages:
+        personalization = Personalization()
+        personalization.add_to(Email(recipient))
+        personalization.dynamic_template_data = data_dict
+        mail.add_personalization(personalization)
+    return mail.get()
+
+
+# one SendGrid request per batch, one personalization per message
+class SendGridTransport:
+    def __init__(self):
+        # if 401 error is thrown, that means something happened to sendgrid api key
+        self.sg = sendgrid.SendGridAPIClient(settings.SENDGRID_API_KEY)
+
+    def send(self, template_id, sender, messages):
+        try:
+            self.sg.client.mail.send.post(request_body=mail_body(template_id, sender, messages))
+        except exceptions.BadRequestsError as e:
+            raise PermanentError(e.body)
+
+# POSTs the SendGrid request body as JSON to EMAIL_SINK_URL
+class HTTPSinkTransport:
+    def send(self, template_id, sender, messages):
+        request = urllib.request.Request(
+            settings.EMAIL_SINK_URL,
+            data=json.dumps(mail_body(template_id, sender, messages)).encode(),
+            headers={'Content-Type': 'application/json'},
+        )
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500 and e.code != 429:
+                raise PermanentError(e.reason)
+            raise
+
+# sends each message as a plain text email with its template data to an SMTP
+# server at EMAIL_SMTP_HOST:EMAIL_SMTP_PORT, e.g. `python -m aiosmtpd -n`
+class SMTPSinkTransport:
+    def send(self, template_id, sender, messages):
+        with smtplib.SMTP(settings.EMAIL_SMTP_HOST, settings.EMAIL_SMTP_PORT, timeout=10) as smtp:
+            for recipient, data_dict in messages:
+                message = EmailMessage()
+                message['From'] = sender
+                message['To'] = recipient
+                message['Subject'] = template_id or ''
+                message.set_content(json.dumps(data_dict))
+                smtp.send_message(message)
+
+# keeps every batch in memory, in LocmemTransport.sent
+class LocmemTransport:
+    sent = []
+
+    def send(self, template_id, sender, messages):
+        self.sent.append((template_id, sender, list(messages)))
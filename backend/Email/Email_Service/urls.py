@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('sendDonationEmail/', views.SendDonationEmailAPIView.as_view()),
+    path('metrics/', views.MetricsAPIView.as_view()),
 ]
\ No newline at end of file
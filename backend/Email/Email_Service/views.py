@@ -1,29 +1,14 @@
-import sendgrid
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
-from sendgrid.helpers.mail import (Mail, Email, Personalization)
-from python_http_client import exceptions
 from rest_framework.response import Response
 from django.conf import settings
 
-# if 401 error is thrown, that means something happened to sendgrid api key 
-sg = sendgrid.SendGridAPIClient(settings.SENDGRID_API_KEY)
+from .mail_queue import mail_queue, sender_pool
 
-# instantiates sendgrid variables and sends email with specified payload to donater
+# queues the email with specified payload to donater; the sender pool sends it
+# through the configured transport (SendGrid by default). The payment ID is the
+# dedupe key, so a retried request for the same payment queues no second receipt
 class SendDonationEmailAPIView(GenericAPIView):
-    def send_mail(self, template_id, sender, recipient, data_dict):
-        mail = Mail()
-        mail.template_id = template_id
-        mail.from_email = Email(sender)
-        personalization = Personalization()
-        personalization.add_to(Email(recipient))
-        personalization.dynamic_template_data = data_dict
-        mail.add_personalization(personalization)
-        try:
-            response = sg.client.mail.send.post(request_body=mail.get())
-        except exceptions.BadRequestsError as e:
-            exit()
-
     def post(self, request):
         recepient_email = request.data['recepient_email']
         recepient_name = request.data['recepient_name']
@@ -38,7 +23,14 @@ class SendDonationEmailAPIView(GenericAPIView):
             "dog_name": dog_name, 
             "amount_paid": amount_paid
         }
-        SendDonationEmailAPIView.send_mail(self, template_id, sender, recepient_email, data_dict)
-        return Response({"message": "Mail sent successfully."}, status=status.HTTP_200_OK)
-    
-    
\ No newline at end of file
+        mail_queue.enqueue(template_id, sender, recepient_email, data_dict, dedupe_key='donation:{}'.format(paymentID))
+        sender_pool.wake()
+        return Response({"message": "Mail queued successfully."}, status=status.HTTP_200_OK)
+
+# Email queue (shared by all workers) and this process's sender counters
+class MetricsAPIView(GenericAPIView):
+    def get(self, request):
+        return Response({
+            "queue": mail_queue.stats(),
+            "senders": sender_pool.stats(),
+        }, status=status.HTTP_200_OK)
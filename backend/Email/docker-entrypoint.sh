@@ -1,5 +1,11 @@
 #!/bin/sh
 
+export BOOT_STARTED_AT=$(python -c "import time; print(time.time())")
+
 echo "###   Starting Email Service Server   ###"
-python manage.py runserver 0.0.0.0:8005
+if [ "$SERVER_MODE" = "development" ]; then
+    python manage.py runserver 0.0.0.0:8005
+else
+    exec gunicorn -c gunicorn.conf.py Email.wsgi:application
+fi
 
@@ -1,5 +1,6 @@
 from pathlib import Path
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 import os
 
 load_dotenv()
@@ -27,12 +28,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "Orchestrator_Service.deadline.DeadlineMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "Orchestrator_Service.upstream.UpstreamErrorMiddleware",
 ]
 
 ROOT_URLCONF = "Orchestrator.urls"
@@ -54,6 +57,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "Orchestrator.wsgi.application"
+ASGI_APPLICATION = "Orchestrator.asgi.application"
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -83,4 +87,65 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CORS_ALLOW_ALL_ORIGINS = True
-
+# conditional GETs on the list endpoints (ETag / If-None-Match), and a client
+# budget smaller than REQUEST_DEADLINE (X-Request-Budget)
+CORS_ALLOW_HEADERS = (*default_headers, "if-none-match", "x-request-budget")
+# the ETag of list responses and the file name of export downloads
+CORS_EXPOSE_HEADERS = ["ETag", "Content-Disposition"]
+
+# Upstream services called by the orchestrator, each with its own keep-alive
+# connection pool and connect/read timeouts (see Orchestrator_Service/upstream.py).
+# Defaults can be overridden per service, e.g. DOGS_POOL_SIZE or EMAIL_READ_TIMEOUT.
+UPSTREAM_POOL_SIZE = int(os.environ.get("UPSTREAM_POOL_SIZE", 20))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", 3))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get("UPSTREAM_READ_TIMEOUT", 30))
+UPSTREAM_MAX_CONCURRENCY = int(os.environ.get("UPSTREAM_MAX_CONCURRENCY", 200))
+
+UPSTREAMS = {}
+for _name in ("account", "dogs", "payment", "email", "walks"):
+    _prefix = _name.upper()
+    UPSTREAMS[_name] = {
+        "HOST": os.environ.get("{}_URL".format(_prefix)),
+        "POOL_SIZE": int(os.environ.get("{}_POOL_SIZE".format(_prefix), UPSTREAM_POOL_SIZE)),
+        "CONNECT_TIMEOUT": float(os.environ.get("{}_CONNECT_TIMEOUT".format(_prefix), UPSTREAM_CONNECT_TIMEOUT)),
+        "READ_TIMEOUT": float(os.environ.get("{}_READ_TIMEOUT".format(_prefix), UPSTREAM_READ_TIMEOUT)),
+        "MAX_CONCURRENCY": int(os.environ.get("{}_MAX_CONCURRENCY".format(_prefix), UPSTREAM_MAX_CONCURRENCY)),
+    }
+
+# "sync" serves every view through DRF under WSGI. "async" runs under ASGI
+# (uvicorn) and serves the JSON proxy views from Orchestrator_Service/async_views.py,
+# so slow upstream calls wait on the event loop instead of pinning a worker thread.
+# MAX_CONCURRENCY caps in-flight async calls per upstream; extra calls queue.
+ORCHESTRATOR_MODE = os.environ.get("ORCHESTRATOR_MODE", "sync")
+
+# Composite views calling several upstreams concurrently (Orchestrator_Service/fanout.py):
+# seconds before getDogProfile/ returns without the sections still missing, and
+# threads making those calls in sync mode.
+DOG_PROFILE_DEADLINE = float(os.environ.get("DOG_PROFILE_DEADLINE", 3))
+FANOUT_WORKERS = int(os.environ.get("FANOUT_WORKERS", 32))
+
+# Dog and category image uploads: "stream" relays the multipart body to the
+# Dogs service as it arrives, "buffer" parses it and sends a new one
+# (see RequestBody in Orchestrator_Service/views.py).
+UPLOAD_MODE = os.environ.get("UPLOAD_MODE", "stream")
+
+# Seconds a request may take before its upstream calls are cut short; the
+# milliseconds left are passed on to the services in X-Request-Budget
+# (Orchestrator_Service/deadline.py). A call's read timeout is the smaller of
+# its upstream's READ_TIMEOUT and the time left. Only a call timing out after
+# the full READ_TIMEOUT counts against the upstream's circuit breaker; one cut
+# short by the deadline is answered 504 and does not.
+REQUEST_DEADLINE = float(os.environ.get("REQUEST_DEADLINE", 20))
+
+# Per-upstream circuit breakers (Orchestrator_Service/upstream.py): a breaker
+# opens when BREAKER_FAILURE_RATE of the last BREAKER_WINDOW calls failed, once
+# at least BREAKER_MIN_CALLS were made, and lets a probe call through after
+# BREAKER_RESET_TIMEOUT seconds.
+BREAKER_WINDOW = int(os.environ.get("BREAKER_WINDOW", 20))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", 10))
+BREAKER_FAILURE_RATE = float(os.environ.get("BREAKER_FAILURE_RATE", 0.5))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("BREAKER_RESET_TIMEOUT", 30))
+
+# Single-flight GETs (Orchestrator_Service/upstream.py): identical idempotent
+# calls in flight at the same time share one upstream fetch.
+SINGLE_FLIGHT = os.environ.get("SINGLE_FLIGHT", "true") == "true"
@@ -0,0 +1,358 @@
+import json
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+
+from . import fanout, upstream
+
+# Async versions of the JSON proxy views in views.py, routed when
+# ORCHESTRATOR_MODE is "async" and the orchestrator runs under ASGI. Each one
+# keeps the status handling of its DRF counterpart. Multipart views (add/update
+# account, dog, category and walk) stay on the DRF views.
+
+
+class AsyncAPIView(View):
+    # like APIView: no CSRF check, and the JSON/form body is parsed into request.data
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.content_type == 'application/json':
+                request.data = json.loads(request.body or b'{}')
+            else:
+                request.data = request.POST
+        except ValueError:
+            return self.parse_error()
+        return super().dispatch(request, *args, **kwargs)
+
+    async def parse_error(self):
+        return JsonResponse({'detail': 'JSON parse error'}, status=400)
+
+
+def auth_headers(request):
+    accessToken = request.headers.get('Authorization')
+    if accessToken:
+        return {'Authorization': accessToken}
+    return {}
+
+
+# Conditional GET pass-through, as in views.py
+def conditional_headers(request, headers=None):
+    headers = dict(headers or {})
+    etag = request.headers.get('If-None-Match')
+    if etag:
+        headers['If-None-Match'] = etag
+    return headers
+
+def conditional_response(response):
+    if response.status_code == 304:
+        proxied = HttpResponse(status=304)
+    else:
+        proxied = JsonResponse(response.json(), status=200, safe=False)
+    if 'ETag' in response.headers:
+        proxied['ETag'] = response.headers['ETag']
+    return proxied
+
+
+# Streaming pass-through, as in views.py
+async def stream_response(client, response):
+    body = client.iter_body(response)
+    if response.status_code != 200:
+        content = b''.join([chunk async for chunk in body])
+        return HttpResponse(content, status=response.status_code, content_type=response.headers.get('Content-Type'))
+    proxied = StreamingHttpResponse(body, content_type=response.headers.get('Content-Type'))
+    if 'Content-Disposition' in response.headers:
+        proxied['Content-Disposition'] = response.headers['Content-Disposition']
+    return proxied
+
+
+### START OF JWT VIEWS ###
+
+
+class LoginAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_account.post('/api/token/', json=request.data)
+        return JsonResponse(response.json(), status=200, safe=False)
+
+class RefreshTokenAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_account.post('/api/token/refresh/', json=request.data)
+        return JsonResponse(response.json(), status=200, safe=False)
+
+class VerifyTokenAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_account.post('/api/token/verify/', json=request.data)
+        if response.status_code == 200:
+            return HttpResponse(status=200)
+        else:
+            return HttpResponse(status=400)
+
+
+### END OF JWT VIEWS ###
+
+### START OF PYOTP VIEWS ###
+
+
+class VerifyOTPAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_account.post('/api/otp/', json=request.data, headers=auth_headers(request))
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+
+### END OF PYOTP VIEWS ###
+
+### START OF ADMIN CRUD ACCOUNTS VIEWS ###
+
+
+class GetAccountAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_account.get('/api/account/{}/'.format(id), headers=auth_headers(request))
+        return JsonResponse(response.json(), status=200, safe=False)
+
+class ListAccountsAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_account.get('/api/account/', headers=auth_headers(request))
+        return JsonResponse(response.json(), status=200, safe=False)
+
+class DeleteAccountAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_account.delete('/api/account/{}/delete/'.format(id), headers=auth_headers(request))
+        if response.status_code == 204:
+            return HttpResponse(status=204)
+        else:
+            return HttpResponse(status=400)
+
+class CheckIfAccountExistsAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_account.post('/api/accountExists/', json=request.data, headers=auth_headers(request))
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+
+### END OF ADMIN CRUD ACCOUNTS VIEWS ###
+
+### START OF ADMIN CRUD DOGS VIEWS ###
+
+
+class GetDogAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_dogs.shared_get('/api/dogs/{}/'.format(id))
+        return JsonResponse(response.json(), status=200, safe=False)
+
+class ListDogsAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_dogs.shared_get('/api/dogs/', params=dict(request.GET.lists()), headers=conditional_headers(request))
+        return conditional_response(response)
+
+class DeleteDogAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_dogs.delete('/api/dogs/{}/delete/'.format(id), headers=auth_headers(request))
+        if response.status_code == 204:
+            return HttpResponse(status=204)
+        else:
+            return HttpResponse(status=400)
+
+class CheckIfDogExistsAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_dogs.post('/api/dogs/dogExists/', json=request.data)
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+class ImageUploadTicketAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_dogs.post('/api/dogs/uploads/', json=request.data, headers=auth_headers(request))
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+class CompleteImageUploadAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_dogs.post('/api/dogs/uploads/complete/', json=request.data, headers=auth_headers(request))
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+
+### END OF ADMIN CRUD DOGS VIEWS ###
+
+### START OF ADMIN CRUD DOG CATEGORIES VIEWS ###
+
+
+class GetDogCategoryAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_dogs.shared_get('/api/dogs/categories/{}/'.format(id))
+        return JsonResponse(response.json(), status=200, safe=False)
+
+class ListDogCategoriesAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_dogs.shared_get('/api/dogs/categories/', headers=conditional_headers(request))
+        return conditional_response(response)
+
+class DeleteDogCategoryAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_dogs.delete('/api/dogs/categories/{}/delete/'.format(id), headers=auth_headers(request))
+        if response.status_code == 204:
+            return HttpResponse(status=204)
+        else:
+            return HttpResponse(status=400)
+
+class CheckIfDogCategoryExistsAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_dogs.post('/api/dogs/dogCategoryExists/', json=request.data)
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+
+### END OF ADMIN CRUD DOG CATEGORIES VIEWS ###
+
+### START OF PUBLIC-RELATED VIEWS ###
+
+
+class PublicListDogsAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_dogs.shared_get('/api/dogs/public/', params=dict(request.GET.lists()), headers=conditional_headers(request))
+        return conditional_response(response)
+
+class PublicListDogCategoriesAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_dogs.shared_get('/api/dogs/public/categories/', headers=conditional_headers(request))
+        return conditional_response(response)
+
+class ListDogsByCategoryAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_dogs.post('/api/dogs/byCategory/', json=request.data)
+        return JsonResponse(response.json(), status=200, safe=False)
+
+
+### END OF PUBLIC-RELATED VIEWS ###
+
+### START OF PAYMENT-RELATED VIEWS ###
+
+
+class DonateAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_payment.post('/api/payment/create-checkout-session/', json=request.data)
+        if response.status_code == 200:
+            return JsonResponse(response.json(), status=200, safe=False)
+        else:
+            return HttpResponse(status=400)
+
+class UpdateDogSponsorAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_dogs.post('/api/dogs/updateDogSponsor/', json=request.data)
+        if response.status_code == 200:
+            return JsonResponse(response.json(), status=200, safe=False)
+        else:
+            return HttpResponse(status=400)
+
+class GetPaymentAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_payment.get('/api/payment/{}/'.format(id), headers=auth_headers(request))
+        return JsonResponse(response.json(), status=200, safe=False)
+
+class ListPaymentsAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_payment.get('/api/payment/', headers=conditional_headers(request, auth_headers(request)))
+        return conditional_response(response)
+
+class ExportPaymentsAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_payment.stream('GET', '/api/payment/export/', params=dict(request.GET.lists()), headers=auth_headers(request))
+        return await stream_response(upstream.async_payment, response)
+
+class DeletePaymentAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_payment.delete('/api/payment/{}/delete/'.format(id), headers=auth_headers(request))
+        if response.status_code == 204:
+            return HttpResponse(status=204)
+        else:
+            return HttpResponse(status=400)
+
+
+### END OF PAYMENT-RELATED VIEWS ###
+
+### START OF EMAIL VIEWS ###
+
+
+class SendDonationEmailAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_email.post('/api/email/sendDonationEmail/', json=request.data)
+        if response.status_code == 200:
+            return JsonResponse(response.json(), status=200, safe=False)
+        else:
+            return HttpResponse(status=400)
+
+
+### END OF EMAIL VIEWS ###
+
+### START OF DOG PROFILE VIEWS ###
+
+
+class GetDogProfileAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        calls = fanout.dog_profile_calls(
+            upstream.async_dogs, upstream.async_walks, upstream.async_payment, id,
+            request.data.get('walksPageSize', 20), auth_headers(request),
+        )
+        sections, elapsedMs = await fanout.gather_async(calls, settings.DOG_PROFILE_DEADLINE)
+        return JsonResponse(dict(sections, elapsedMs=elapsedMs), status=fanout.dog_profile_status(sections))
+
+
+### END OF DOG PROFILE VIEWS ###
+
+### START OF WALK RECORDS VIEWS ###
+
+
+class GetWalkAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_walks.get('/api/walks/{}/'.format(id))
+        return JsonResponse(response.json(), status=200, safe=False)
+
+class ListWalksAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_walks.get('/api/walks/', params=dict(request.GET.lists()), headers=conditional_headers(request, auth_headers(request)))
+        return conditional_response(response)
+
+class ExportWalksAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_walks.stream('GET', '/api/walks/export/', params=dict(request.GET.lists()), headers=auth_headers(request))
+        return await stream_response(upstream.async_walks, response)
+
+class WalkAnalyticsAPIView(AsyncAPIView):
+    async def get(self, request):
+        response = await upstream.async_walks.get('/api/walks/analytics/', params=dict(request.GET.lists()), headers=auth_headers(request))
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+class DeleteWalkAPIView(AsyncAPIView):
+    async def post(self, request):
+        id = request.data['id']
+        response = await upstream.async_walks.delete('/api/walks/{}/delete/'.format(id), headers=auth_headers(request))
+        if response.status_code == 204:
+            return HttpResponse(status=204)
+        else:
+            return HttpResponse(status=400)
+
+class BulkAddWalksAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_walks.post('/api/walks/bulk/', json=request.data, headers=auth_headers(request))
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+class BulkUpdateWalksAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_walks.put('/api/walks/bulk/update/', json=request.data, headers=auth_headers(request))
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+class BulkDeleteWalksAPIView(AsyncAPIView):
+    async def post(self, request):
+        response = await upstream.async_walks.post('/api/walks/bulk/delete/', json=request.data, headers=auth_headers(request))
+        return JsonResponse(response.json(), status=response.status_code, safe=False)
+
+
+### END OF WALK RECORDS VIEWS ###
@@ -0,0 +1,85 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from contextlib import contextmanager
+import contextvars
+import math
+import time
+
+# Every request gets a deadline, REQUEST_DEADLINE seconds after it arrives or
+# earlier if the caller sent a smaller X-Request-Budget (milliseconds left).
+# Upstream calls made for the request cap their read timeout at the time left
+# and pass what is left on in the same header, so the services can drop work
+# nobody is waiting for. Only budgets cross the network: each side turns them
+# into a deadline on its own monotonic clock, so clocks that disagree between
+# containers do not matter. The context variable follows the request into the
+# async tasks and, through fanout.py, the threads serving it.
+
+HEADER = 'X-Request-Budget'
+
+deadline = contextvars.ContextVar('deadline', default=None)
+
+
+# the budget in a header as seconds, None if missing or malformed
+def parse(value):
+    try:
+        budget = float(value) / 1000
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(budget) else budget
+
+def request_deadline(request):
+    now = time.monotonic()
+    budget = parse(request.headers.get(HEADER))
+    if budget is None:
+        budget = settings.REQUEST_DEADLINE
+    return now + min(settings.REQUEST_DEADLINE, budget)
+
+# seconds left before the current request's deadline, None outside a request
+def remaining():
+    value = deadline.get()
+    if value is None:
+        return None
+    return value - time.monotonic()
+
+# narrows the current deadline to `seconds` from now for the block, as for
+# the sections of a composite response
+@contextmanager
+def within(seconds):
+    value = time.monotonic() + seconds
+    current = deadline.get()
+    token = deadline.set(value if current is None else min(current, value))
+    try:
+        yield
+    finally:
+        deadline.reset(token)
+
+# the time left, rounded down to whole milliseconds
+def header():
+    left = remaining()
+    return {HEADER: str(max(0, int(left * 1000)))} if left is not None else {}
+
+
+class DeadlineMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = deadline.set(request_deadline(request))
+        try:
+            return self.get_response(request)
+        finally:
+            deadline.reset(token)
+
+    async def __acall__(self, request):
+        token = deadline.set(request_deadline(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            deadline.reset(token)
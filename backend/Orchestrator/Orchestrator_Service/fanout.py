@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from django.conf import settings
+import asyncio
+import contextvars
+import time
+
+from .deadline import within
+from .upstream import DeadlineExceeded
+
+# Composite responses built from several upstream calls made at the same time.
+# Each call becomes one section of the response with its own status, so a slow
+# or failing upstream costs only its section: the response is ready when every
+# call has returned or the deadline has passed, whichever comes first. The
+# deadline narrows the request's own (deadline.py) while the calls are made,
+# so a call cut short by it is not held against the upstream's circuit
+# breaker, and the services are told how long they have.
+#   {"status": "ok", "data": ...}                  the upstream answered 2xx
+#   {"status": "error", "statusCode": 404, ...}    it answered with an error
+#   {"status": "unavailable", "data": null}        it could not be reached
+#   {"status": "timeout", "data": null}            it missed the deadline
+
+# threads making the calls of the sync views, shared by every request
+executor = ThreadPoolExecutor(settings.FANOUT_WORKERS, thread_name_prefix='fanout')
+
+
+def section(status_code, data):
+    if 200 <= status_code < 300:
+        return {'status': 'ok', 'data': data}
+    return {'status': 'error', 'statusCode': status_code, 'data': data}
+
+def body(content):
+    try:
+        return content.json()
+    except ValueError:
+        return None
+
+# `calls` maps section names to (client, method, path, kwargs)
+def gather(calls, deadline):
+    start = time.monotonic()
+    futures = {}
+    with within(deadline):
+        for name, (client, method, path, kwargs) in calls.items():
+            # in the request's context, so the call sees the deadline and no
+            # single call outlasts it: its thread is freed soon after
+            futures[name] = executor.submit(contextvars.copy_context().run, client.request, method, path, **kwargs)
+    wait(futures.values(), timeout=deadline)
+
+    sections = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            sections[name] = {'status': 'timeout', 'data': None}
+        elif isinstance(future.exception(), DeadlineExceeded):
+            sections[name] = {'status': 'timeout', 'data': None}
+        elif future.exception() is not None:
+            sections[name] = {'status': 'unavailable', 'data': None}
+        else:
+            response = future.result()
+            sections[name] = section(response.status_code, body(response))
+    return sections, round((time.monotonic() - start) * 1000, 1)
+
+async def call_async(client, method, path, kwargs, deadline):
+    try:
+        response = await asyncio.wait_for(client.request(method, path, **kwargs), deadline)
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        return {'status': 'timeout', 'data': None}
+    except Exception:
+        return {'status': 'unavailable', 'data': None}
+    return section(response.status_code, body(response))
+
+# async version of gather(), for the async views
+async def gather_async(calls, deadline):
+    start = time.monotonic()
+    names = list(calls)
+    # the tasks are created in the block, so they see the deadline
+    with within(deadline):
+        results = await asyncio.gather(*[
+            call_async(client, method, path, kwargs, deadline) for client, method, path, kwargs in calls.values()
+        ])
+    return dict(zip(names, results)), round((time.monotonic() - start) * 1000, 1)
+
+
+### START OF DOG PROFILE ###
+
+
+# the dog, its latest walks (newest first) and its donations
+def dog_profile_calls(dogs, walks, payment, id, walksPageSize, headers):
+    return {
+        'dog': (dogs, 'GET', '/api/dogs/{}/'.format(id), {}),
+        'walks': (walks, 'GET', '/api/walks/', {'params': {'dogID': id, 'pageSize': walksPageSize}, 'headers': headers}),
+        'donations': (payment, 'GET', '/api/payment/', {'params': {'dogID': id}, 'headers': headers}),
+    }
+
+# 404 when the Dogs service says there is no such dog, 200 otherwise, even
+# with some sections missing
+def dog_profile_status(sections):
+    dog = sections['dog']
+    if dog['status'] == 'error' and dog['statusCode'] == 404:
+        return 404
+    return 200
+
+
+### END OF DOG PROFILE ###
@@ -1,3 +1,643 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, override_settings
+from django.test.client import encode_multipart
+from django.urls import path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import asyncio
+import threading
+import time
 
-# Create your tests here.
+from . import async_views, deadline, fanout, upstream
+from .upstream import CircuitBreaker, DeadlineExceeded, SingleFlight, UpstreamUnavailable, flight_key
+
+# Fake upstream answering every call with `status` and `body` after `delay`
+# seconds, and recording the paths, headers, methods and bodies of the calls
+# it got, and the most calls it was answering at once (peak).
+class FakeUpstream:
+    def __init__(self, status=200, body=b'[]', delay=0):
+        self.status = status
+        self.body = body
+        self.delay = delay
+        self.calls = []
+        self.paths = []
+        self.methods = []
+        self.bodies = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.calls.append(dict(self.headers))
+                fake.paths.append(self.path)
+                fake.methods.append(self.command)
+                fake.bodies.append(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+                with fake.lock:
+                    fake.active += 1
+                    fake.peak = max(fake.peak, fake.active)
+                time.sleep(fake.delay)
+                with fake.lock:
+                    fake.active -= 1
+                self.send_response(fake.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(fake.body)))
+                self.end_headers()
+                self.wfile.write(fake.body)
+
+            do_POST = do_PUT = do_DELETE = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # callers that stopped waiting have closed the connection
+            def handle_error(self, request, client_address):
+                pass
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.host = '127.0.0.1:{}'.format(self.server.server_port)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+# closed -> open once enough of the window failed -> half-open after the reset
+# timeout, letting one probe through -> closed or open again
+@override_settings(BREAKER_WINDOW=4, BREAKER_MIN_CALLS=4, BREAKER_FAILURE_RATE=0.5, BREAKER_RESET_TIMEOUT=30)
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch.object(upstream, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('dogs')
+
+    def call(self, success):
+        probe = self.breaker.acquire()
+        self.breaker.release(probe, success)
+        return probe
+
+    def trip(self):
+        for success in (True, False, True, False):
+            self.call(success)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_stays_closed_until_min_calls(self):
+        for i in range(3):
+            self.assertFalse(self.call(False))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_stays_closed_below_failure_rate(self):
+        for success in (True, True, True, False, True, True, True, False):
+            self.call(success)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_calls_cut_short_by_the_deadline_do_not_count(self):
+        for i in range(4):
+            self.call(None)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.stats()['windowCalls'], 0)
+
+    def test_opens_and_rejects_calls(self):
+        self.trip()
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.acquire()
+        self.clock.now += 29
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.acquire()
+        stats = self.breaker.stats()
+        self.assertEqual((stats['trips'], stats['rejected'], stats['openForSeconds']), (1, 2, 29))
+
+    def test_half_open_lets_one_probe_through(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertTrue(self.breaker.acquire())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.acquire()
+
+    def test_successful_probe_closes(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertTrue(self.call(True))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertFalse(self.call(False))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_opens_again(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertTrue(self.call(False))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.stats()['trips'], 2)
+        self.clock.now += 29
+        with self.assertRaises(UpstreamUnavailable):
+            self.breaker.acquire()
+        self.clock.now += 1
+        self.assertTrue(self.breaker.acquire())
+
+    def test_probe_cut_short_by_the_deadline_allows_another(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertTrue(self.call(None))
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.acquire())
+
+    def test_upstream_errors_open_the_breaker(self):
+        fake = FakeUpstream(status=500)
+        self.addCleanup(fake.stop)
+        client = upstream.UpstreamClient('dogs')
+        client.host = fake.host
+        client.breaker = self.breaker
+
+        for i in range(4):
+            self.assertEqual(client.get('/api/dogs/').status_code, 500)
+        with self.assertRaises(UpstreamUnavailable):
+            client.get('/api/dogs/')
+        self.assertEqual(len(fake.calls), 4)
+
+
+# The deadline crosses the network as the milliseconds left, and each side
+# measures it on its own monotonic clock.
+@override_settings(REQUEST_DEADLINE=20)
+class DeadlineTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch.object(deadline, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def request_deadline(self, **headers):
+        return deadline.request_deadline(self.factory.get('/', **headers)) - self.clock.now
+
+    def test_request_deadline(self):
+        self.assertAlmostEqual(self.request_deadline(), 20)
+        self.assertAlmostEqual(self.request_deadline(HTTP_X_REQUEST_BUDGET='1500'), 1.5)
+        self.assertAlmostEqual(self.request_deadline(HTTP_X_REQUEST_BUDGET='60000'), 20)
+        self.assertAlmostEqual(self.request_deadline(HTTP_X_REQUEST_BUDGET='-5'), -0.005)
+        for value in ('soon', 'nan', ''):
+            self.assertAlmostEqual(self.request_deadline(HTTP_X_REQUEST_BUDGET=value), 20)
+
+    def test_header_sends_the_time_left(self):
+        self.assertEqual(deadline.header(), {})
+        token = deadline.deadline.set(self.clock.now + 2)
+        try:
+            self.clock.now += 0.5004
+            self.assertEqual(deadline.header(), {'X-Request-Budget': '1499'})
+            self.clock.now += 5
+            self.assertEqual(deadline.header(), {'X-Request-Budget': '0'})
+        finally:
+            deadline.deadline.reset(token)
+
+
+@override_settings(REQUEST_DEADLINE=20, SINGLE_FLIGHT=False)
+class DeadlinePropagationTests(SimpleTestCase):
+    def setUp(self):
+        self.fake = FakeUpstream()
+        self.addCleanup(self.fake.stop)
+        for client in (upstream.dogs, upstream.async_dogs):
+            patcher = mock.patch.multiple(client, host=self.fake.host, breaker=CircuitBreaker('dogs'))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def budget(self):
+        return int(self.fake.calls[-1]['X-Request-Budget'])
+
+    def test_incoming_budget_is_passed_on(self):
+        response = self.client.get('/api/orchestrator/listDogs/', HTTP_X_REQUEST_BUDGET='5000')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(4000 < self.budget() <= 5000)
+
+    def test_requests_without_a_budget_get_request_deadline(self):
+        self.client.get('/api/orchestrator/listDogs/')
+        self.assertTrue(19000 < self.budget() <= 20000)
+
+    def test_async_client_passes_the_budget_on(self):
+        async def call():
+            deadline.deadline.set(deadline.time.monotonic() + 3)
+            response = await upstream.async_dogs.get('/api/dogs/')
+            await upstream.async_dogs.client.aclose()
+            return response
+
+        with mock.patch.multiple(upstream.async_dogs, client=None, semaphore=None):
+            self.assertEqual(asyncio.run(call()).status_code, 200)
+        self.assertTrue(2000 < self.budget() <= 3000)
+
+
+# A composite response waits DOG_PROFILE_DEADLINE at most: a section missing it
+# comes back as a timeout next to the others, is not held against its
+# upstream's breaker, and the service is told the time it had.
+@override_settings(BREAKER_WINDOW=1, BREAKER_MIN_CALLS=1)
+class FanoutTests(SimpleTestCase):
+    def setUp(self):
+        self.fakes = {
+            'dogs': FakeUpstream(body=b'{"id": 1}'),
+            'walks': FakeUpstream(delay=1),
+            'payment': FakeUpstream(),
+        }
+        for fake in self.fakes.values():
+            self.addCleanup(fake.stop)
+
+    def calls(self, cls):
+        clients = {}
+        for name, fake in self.fakes.items():
+            client = cls(name)
+            client.host = fake.host
+            client.breaker = CircuitBreaker(name)
+            clients[name] = client
+        return clients, fanout.dog_profile_calls(clients['dogs'], clients['walks'], clients['payment'], 1, 5, {})
+
+    def assertPartialProfile(self, clients, sections, elapsedMs):
+        self.assertEqual(sections['dog'], {'status': 'ok', 'data': {'id': 1}})
+        self.assertEqual(sections['walks'], {'status': 'timeout', 'data': None})
+        self.assertEqual(sections['donations'], {'status': 'ok', 'data': []})
+        self.assertLess(elapsedMs, 900)
+        for client in clients.values():
+            self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+            self.assertEqual(client.breaker.stats()['failures'], 0)
+        self.assertLessEqual(int(self.fakes['walks'].calls[0]['X-Request-Budget']), 300)
+
+    def test_sync_partial_timeout(self):
+        executor = ThreadPoolExecutor(3)
+        with mock.patch.object(fanout, 'executor', executor):
+            clients, calls = self.calls(upstream.UpstreamClient)
+            sections, elapsedMs = fanout.gather(calls, 0.3)
+            # let the call that missed the deadline finish with its breaker
+            executor.shutdown(wait=True)
+        self.assertPartialProfile(clients, sections, elapsedMs)
+
+    def test_async_partial_timeout(self):
+        clients, calls = self.calls(upstream.AsyncUpstreamClient)
+
+        async def gather():
+            try:
+                return await fanout.gather_async(calls, 0.3)
+            finally:
+                for client in clients.values():
+                    if client.client is not None:
+                        await client.client.aclose()
+
+        sections, elapsedMs = asyncio.run(gather())
+        self.assertPartialProfile(clients, sections, elapsedMs)
+
+    def test_sections_keep_the_request_deadline_if_sooner(self):
+        with deadline.within(0.1), deadline.within(5):
+            self.assertLessEqual(deadline.remaining(), 0.1)
+        self.assertIsNone(deadline.remaining())
+
+
+# Only a call timing out after its upstream's full READ_TIMEOUT counts against
+# the breaker; one cut short by the request's deadline or a shorter timeout
+# asked for by the caller is a 504 and says nothing about the upstream.
+@override_settings(BREAKER_WINDOW=1, BREAKER_MIN_CALLS=1)
+class ReadTimeoutTests(SimpleTestCase):
+    def setUp(self):
+        self.fake = FakeUpstream(delay=0.5)
+        self.addCleanup(self.fake.stop)
+
+    def upstream_client(self, cls, read):
+        client = cls('walks')
+        client.host = self.fake.host
+        client.breaker = CircuitBreaker('walks')
+        if cls is upstream.UpstreamClient:
+            client.timeout = (1, read)
+        else:
+            client.read_timeout = read
+        return client
+
+    def run_async(self, client, **kwargs):
+        async def call():
+            try:
+                return await client.get('/api/walks/', **kwargs)
+            finally:
+                await client.client.aclose()
+        return asyncio.run(call())
+
+    def test_read_timeout(self):
+        self.assertEqual(upstream.read_timeout(30), (30, False))
+        self.assertEqual(upstream.read_timeout(30, 5), (5, True))
+        with deadline.within(60):
+            self.assertEqual(upstream.read_timeout(30), (30, False))
+        with deadline.within(20):
+            read, capped = upstream.read_timeout(30)
+        self.assertTrue(read <= 20 and capped)
+        with deadline.within(-1):
+            with self.assertRaises(DeadlineExceeded):
+                upstream.read_timeout(30)
+
+    def test_upstream_read_timeout_counts_against_the_breaker(self):
+        client = self.upstream_client(upstream.UpstreamClient, 0.2)
+        with self.assertRaises(UpstreamUnavailable):
+            client.get('/api/walks/')
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+        client = self.upstream_client(upstream.AsyncUpstreamClient, 0.2)
+        with self.assertRaises(UpstreamUnavailable):
+            self.run_async(client)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+    def test_deadline_does_not_count_against_the_breaker(self):
+        client = self.upstream_client(upstream.UpstreamClient, 5)
+        with deadline.within(0.2), self.assertRaises(DeadlineExceeded):
+            client.get('/api/walks/')
+        self.assertEqual(client.breaker.stats()['failures'], 0)
+
+        client = self.upstream_client(upstream.AsyncUpstreamClient, 5)
+        with deadline.within(0.2), self.assertRaises(DeadlineExceeded):
+            self.run_async(client)
+        self.assertEqual(client.breaker.stats()['failures'], 0)
+
+    def test_shorter_timeout_of_the_caller_does_not_count_against_the_breaker(self):
+        client = self.upstream_client(upstream.UpstreamClient, 5)
+        with self.assertRaises(DeadlineExceeded):
+            client.get('/api/walks/', timeout=(1, 0.2))
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(client.breaker.stats()['failures'], 0)
+
+
+# Identical GETs in flight at the same time share one upstream call, its
+# response or its error; each waiter still stops at its own deadline, and a
+# caller going away does not cancel the call for the others.
+def in_threads(count, target):
+    results = [None] * count
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+@override_settings(SINGLE_FLIGHT=True)
+class SingleFlightTests(SimpleTestCase):
+    def test_flight_key(self):
+        self.assertEqual(
+            flight_key('/api/dogs/', {'b': '2', 'a': ['1', '3']}, {'If-None-Match': 'x'}),
+            flight_key('/api/dogs/', {'a': ('1', '3'), 'b': '2'}, {'if-none-match': 'x'}),
+        )
+        self.assertNotEqual(flight_key('/api/dogs/', {'a': '1'}), flight_key('/api/dogs/', {'a': '2'}))
+        self.assertNotEqual(flight_key('/api/dogs/'), flight_key('/api/dogs/', headers={'If-None-Match': 'x'}))
+
+    def test_concurrent_identical_gets_make_one_call(self):
+        fake = FakeUpstream(body=b'[{"id": 1}]', delay=0.3)
+        self.addCleanup(fake.stop)
+        with mock.patch.multiple(upstream.dogs, host=fake.host, breaker=CircuitBreaker('dogs'), flight=SingleFlight('dogs')):
+            responses = in_threads(5, lambda: upstream.dogs.shared_get('/api/dogs/', params={'name': 'Re'}))
+            other = upstream.dogs.shared_get('/api/dogs/', params={'name': 'Be'})
+            stats = upstream.dogs.flight.stats()
+        self.assertEqual([response.json() for response in responses], [[{'id': 1}]] * 5)
+        self.assertEqual(fake.paths, ['/api/dogs/?name=Re', '/api/dogs/?name=Be'])
+        self.assertEqual((stats['fetches'], stats['coalesced'], stats['inFlight']), (2, 4, 0))
+
+    # the async views share the calls of one event loop
+    def test_list_views_share_calls(self):
+        fake = FakeUpstream(delay=0.3)
+        self.addCleanup(fake.stop)
+        url = '/api/orchestrator/listDogs/?category=2'
+        with mock.patch.multiple(upstream.dogs, host=fake.host, breaker=CircuitBreaker('dogs'), flight=SingleFlight('dogs')), \
+                mock.patch.multiple(upstream.async_dogs, host=fake.host, breaker=CircuitBreaker('dogs'), flight=SingleFlight('dogs'), client=None, semaphore=None):
+            if settings.ORCHESTRATOR_MODE == 'async':
+                async def get():
+                    client = AsyncClient()
+                    try:
+                        return await asyncio.gather(*[client.get(url) for i in range(3)])
+                    finally:
+                        await upstream.async_dogs.client.aclose()
+                responses = asyncio.run(get())
+            else:
+                responses = in_threads(3, lambda: self.client_class().get(url))
+        self.assertEqual([response.status_code for response in responses], [200] * 3)
+        self.assertEqual(fake.paths, ['/api/dogs/?category=2'])
+
+    def test_error_reaches_every_waiter(self):
+        flight = SingleFlight('dogs')
+        started = threading.Event()
+        calls = []
+
+        def fail():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            raise UpstreamUnavailable()
+
+        results = []
+        leader = threading.Thread(target=lambda: results.extend(in_threads(1, lambda: flight.do('key', fail))))
+        leader.start()
+        started.wait()
+        results.extend(in_threads(3, lambda: flight.do('key', fail)))
+        leader.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(isinstance(result, UpstreamUnavailable) for result in results))
+        self.assertEqual(flight.stats(), {'requests': 4, 'fetches': 1, 'coalesced': 3, 'inFlight': 0, 'coalescingRatio': 0.75})
+
+    def test_waiter_stops_at_its_own_deadline(self):
+        flight = SingleFlight('dogs')
+        started = threading.Event()
+        release = threading.Event()
+
+        def fetch():
+            started.set()
+            release.wait(5)
+            return 'response'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', fetch)))
+        leader.start()
+        started.wait()
+        begun = time.monotonic()
+        with deadline.within(0.1), self.assertRaises(DeadlineExceeded):
+            flight.do('key', fetch)
+        self.assertLess(time.monotonic() - begun, 1)
+        release.set()
+        leader.join()
+        self.assertEqual(results, ['response'])
+        self.assertEqual(flight.stats()['fetches'], 1)
+
+    def test_async_cancelled_caller_does_not_cancel_the_call(self):
+        flight = SingleFlight('dogs')
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            return 'response'
+
+        async def run():
+            first = asyncio.ensure_future(flight.do_async('key', fetch))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(flight.do_async('key', fetch))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            return await second, first.cancelled()
+
+        self.assertEqual(asyncio.run(run()), ('response', True))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats()['inFlight'], 0)
+
+    def test_async_waiter_stops_at_its_own_deadline(self):
+        flight = SingleFlight('dogs')
+
+        async def fetch():
+            await asyncio.sleep(0.3)
+            return 'response'
+
+        async def waiter():
+            with deadline.within(0.05):
+                return await flight.do_async('key', fetch)
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do_async('key', fetch))
+            await asyncio.sleep(0)
+            with self.assertRaises(DeadlineExceeded):
+                await waiter()
+            return await leader
+
+        self.assertEqual(asyncio.run(run()), 'response')
+
+
+# Dog and category forms reach the Dogs service either as the very body the
+# client sent ("stream", updates naming the object in ?id=) or parsed and
+# encoded again ("buffer", and any request streaming cannot relay).
+BOUNDARY = 'dogwalk-boundary'
+MULTIPART = 'multipart/form-data; boundary={}'.format(BOUNDARY)
+
+class UploadForwardingTests(SimpleTestCase):
+    def setUp(self):
+        self.fake = FakeUpstream(body=b'{"id": 5}')
+        self.addCleanup(self.fake.stop)
+        patcher = mock.patch.multiple(upstream.dogs, host=self.fake.host, breaker=CircuitBreaker('dogs'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def form(self, **fields):
+        data = dict({'name': 'Rex', 'categories': '1,2', 'image': SimpleUploadedFile('rex.png', b'png' * 1000, 'image/png')}, **fields)
+        return encode_multipart(BOUNDARY, data)
+
+    def post(self, url, body):
+        return self.client.post(url, body, content_type=MULTIPART, HTTP_AUTHORIZATION='Bearer token')
+
+    def form_fields(self, body, headers):
+        request = RequestFactory().post('/', body, content_type=headers['Content-Type'])
+        return request.POST, request.FILES
+
+    @override_settings(UPLOAD_MODE='stream')
+    def test_stream_relays_the_body_as_sent(self):
+        body = self.form()
+        for url, method, path in (
+            ('/api/orchestrator/addDog/', 'POST', '/api/dogs/'),
+            ('/api/orchestrator/updateDog/?id=5', 'PUT', '/api/dogs/5/update/'),
+            ('/api/orchestrator/addDogCategory/', 'POST', '/api/dogs/categories/'),
+            ('/api/orchestrator/updateDogCategory/?id=5', 'PUT', '/api/dogs/categories/5/update/'),
+        ):
+            self.assertLess(self.post(url, body).status_code, 300)
+            headers = self.fake.calls[-1]
+            self.assertEqual((self.fake.methods[-1], self.fake.paths[-1]), (method, path))
+            self.assertEqual(self.fake.bodies[-1], body)
+            self.assertEqual(headers['Content-Length'], str(len(body)))
+            self.assertEqual(headers['Content-Type'], MULTIPART)
+            self.assertEqual(headers['Authorization'], 'Bearer token')
+
+    @override_settings(UPLOAD_MODE='stream')
+    def test_stream_update_without_id_in_query_is_encoded_again(self):
+        self.post('/api/orchestrator/updateDog/', self.form(id='7', categories=''))
+        self.assertEqual((self.fake.methods[-1], self.fake.paths[-1]), ('PUT', '/api/dogs/7/update/'))
+        self.assertNotEqual(self.fake.bodies[-1], self.form(id='7', categories=''))
+        fields, files = self.form_fields(self.fake.bodies[-1], self.fake.calls[-1])
+        self.assertEqual(fields.getlist('categories'), [])
+        self.assertEqual(files['image'].read(), b'png' * 1000)
+
+    @override_settings(UPLOAD_MODE='buffer')
+    def test_buffer_encodes_the_form_again(self):
+        self.post('/api/orchestrator/addDog/', self.form())
+        fields, files = self.form_fields(self.fake.bodies[-1], self.fake.calls[-1])
+        self.assertEqual(fields['name'], 'Rex')
+        self.assertEqual(fields.getlist('categories'), ['1', '2'])
+        self.assertEqual(files['image'].name, 'rex.png')
+        self.assertEqual(files['image'].read(), b'png' * 1000)
+
+        self.post('/api/orchestrator/updateDog/?id=5', self.form(id='5', image=''))
+        self.assertEqual(self.fake.paths[-1], '/api/dogs/5/update/')
+        fields, files = self.form_fields(self.fake.bodies[-1], self.fake.calls[-1])
+        self.assertNotIn('image', fields)
+        self.assertNotIn('image', files)
+
+# The async views, served without the URL switch on ORCHESTRATOR_MODE so they
+# are tested in either mode (ROOT_URLCONF below)
+urlpatterns = [
+    path('listDogs/', async_views.ListDogsAPIView.as_view()),
+]
+
+# At most MAX_CONCURRENCY calls to one upstream are in flight and the others
+# queue for a slot; unavailable upstreams and spent deadlines come back from
+# UpstreamErrorMiddleware as the JSON errors the DRF views answer with.
+@override_settings(ROOT_URLCONF='Orchestrator_Service.tests', BREAKER_WINDOW=1, BREAKER_MIN_CALLS=1)
+class AsyncViewTests(SimpleTestCase):
+    def setUp(self):
+        self.fake = FakeUpstream(delay=0.2)
+        self.addCleanup(self.fake.stop)
+        patcher = mock.patch.multiple(
+            upstream.async_dogs, host=self.fake.host, breaker=CircuitBreaker('dogs'), flight=SingleFlight('dogs'),
+            client=None, semaphore=None, max_concurrency=2,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, *urls, **headers):
+        async def run():
+            client = AsyncClient()
+            try:
+                return await asyncio.wait_for(asyncio.gather(*[client.get(url, **headers) for url in urls]), 10)
+            finally:
+                if upstream.async_dogs.client is not None:
+                    await upstream.async_dogs.client.aclose()
+                    upstream.async_dogs.client = None
+        return asyncio.run(run())
+
+    def test_calls_beyond_max_concurrency_queue(self):
+        start = time.monotonic()
+        responses = self.get(*['/listDogs/?name={}'.format(i) for i in range(6)])
+        self.assertEqual([response.status_code for response in responses], [200] * 6)
+        self.assertEqual(len(self.fake.paths), 6)
+        self.assertEqual(self.fake.peak, 2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.6)
+
+    def test_unreachable_upstream_is_503_and_frees_its_slot(self):
+        upstream.async_dogs.host = '127.0.0.1:1'
+        responses = self.get('/listDogs/?name=a', '/listDogs/?name=b', '/listDogs/?name=c')
+        for response in responses:
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json(), {'detail': UpstreamUnavailable.default_detail})
+        upstream.async_dogs.host = self.fake.host
+        self.assertEqual(self.get('/listDogs/')[0].status_code, 503)
+        self.assertEqual(upstream.async_dogs.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.fake.paths, [])
+
+    def test_spent_deadline_is_504(self):
+        response, = self.get('/listDogs/', headers={'X-Request-Budget': '50'})
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(response.json(), {'detail': DeadlineExceeded.default_detail})
+        self.assertEqual(upstream.async_dogs.breaker.state, CircuitBreaker.CLOSED)
+
+        upstream.async_dogs.max_concurrency = 1
+        self.assertEqual(self.get('/listDogs/')[0].status_code, 200)
@@ -0,0 +1,401 @@
+from http.cookiejar import DefaultCookiePolicy
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from collections import deque
+import asyncio
+import httpx
+import requests
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import deadline
+
+# Raised instead of calling an upstream whose breaker is open, or which could
+# not be reached; views answer 503 (DRF views directly, async views through
+# UpstreamErrorMiddleware) instead of waiting on a service that is down.
+class UpstreamUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Service temporarily unavailable, try again later.'
+    default_code = 'upstream_unavailable'
+
+# Raised when the request's deadline passed before an upstream answered
+class DeadlineExceeded(APIException):
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT
+    default_detail = 'Request deadline exceeded.'
+    default_code = 'deadline_exceeded'
+
+
+# Per-upstream circuit breaker. Closed, it lets calls through and keeps the
+# outcome of the last BREAKER_WINDOW of them; once at least BREAKER_MIN_CALLS
+# were made and BREAKER_FAILURE_RATE of them failed (connection errors,
+# timeouts and 5xx answers), it trips open and rejects every call for
+# BREAKER_RESET_TIMEOUT seconds. Then it is half-open: a single probe call goes
+# through, closing the breaker if it succeeds and opening it again if not.
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.outcomes = deque(maxlen=settings.BREAKER_WINDOW)
+        self.openedAt = None
+        self.probing = False
+        self.counters = {'calls': 0, 'failures': 0, 'rejected': 0, 'trips': 0}
+
+    # returns whether the call is the half-open probe; raises when rejected
+    def acquire(self):
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.openedAt >= settings.BREAKER_RESET_TIMEOUT:
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            self.counters['rejected'] += 1
+        raise UpstreamUnavailable()
+
+    # success is True, False, or None when the call says nothing about the
+    # upstream (cancelled, or cut short by the request's own deadline)
+    def release(self, probe, success):
+        with self.lock:
+            if success is not None:
+                self.counters['calls'] += 1
+                if not success:
+                    self.counters['failures'] += 1
+            if probe:
+                self.probing = False
+                if success:
+                    self.state = self.CLOSED
+                    self.outcomes.clear()
+                elif success is not None:
+                    self.trip()
+                return
+            if self.state != self.CLOSED or success is None:
+                return
+            self.outcomes.append(success)
+            failed = self.outcomes.count(False)
+            if len(self.outcomes) >= settings.BREAKER_MIN_CALLS and failed >= settings.BREAKER_FAILURE_RATE * len(self.outcomes):
+                self.trip()
+
+    def trip(self):
+        self.state = self.OPEN
+        self.openedAt = time.monotonic()
+        self.outcomes.clear()
+        self.counters['trips'] += 1
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters, state=self.state)
+            stats['windowCalls'] = len(self.outcomes)
+            stats['windowFailures'] = self.outcomes.count(False)
+            if self.state == self.OPEN:
+                stats['openForSeconds'] = round(time.monotonic() - self.openedAt, 1)
+        return stats
+
+breakers = {name: CircuitBreaker(name) for name in settings.UPSTREAMS}
+
+
+# Request coalescing for an upstream's GETs. The first caller of a key makes
+# the call; callers asking for the same key while it is in flight wait for it
+# and get the same response (or exception) instead of making their own. The
+# call runs with the first caller's deadline; the others stop waiting at
+# their own. The responses are read in full before they are shared, and the
+# views only read them.
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.tasks = {}
+        self.counters = {'requests': 0, 'fetches': 0, 'coalesced': 0}
+
+    # the calls in flight, and whether this caller makes the call
+    def join(self, flights, key, start):
+        with self.lock:
+            self.counters['requests'] += 1
+            flight = flights.get(key)
+            if flight is None:
+                flight = flights[key] = start()
+                self.counters['fetches'] += 1
+                return flight, True
+            self.counters['coalesced'] += 1
+            return flight, False
+
+    def do(self, key, fn):
+        call, leader = self.join(self.calls, key, Call)
+        if leader:
+            try:
+                call.response = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+        elif not call.done.wait(deadline.remaining()):
+            raise DeadlineExceeded()
+        if call.error is not None:
+            raise call.error
+        return call.response
+
+    # the call is a task of its own, so a caller going away does not cancel
+    # it for the others
+    async def do_async(self, key, fn):
+        task, leader = self.join(self.tasks, key, lambda: asyncio.ensure_future(fn()))
+        if leader:
+            task.add_done_callback(lambda task: self.finish(key, task))
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), deadline.remaining())
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded() from e
+
+    def finish(self, key, task):
+        with self.lock:
+            del self.tasks[key]
+        # retrieved here in case every caller stopped waiting for it
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters, inFlight=len(self.calls) + len(self.tasks))
+        stats['coalescingRatio'] = round(stats['coalesced'] / stats['requests'], 3) if stats['requests'] else 0.0
+        return stats
+
+class Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+flights = {name: SingleFlight(name) for name in settings.UPSTREAMS}
+
+# what makes two GETs the same call: the path, the query and the headers sent
+def flight_key(path, params=None, headers=None):
+    params = tuple(sorted(
+        (name, tuple(value) if isinstance(value, (list, tuple)) else (value,))
+        for name, value in (params or {}).items()
+    ))
+    headers = tuple(sorted((name.lower(), value) for name, value in (headers or {}).items()))
+    return path, params, headers
+
+
+# Read timeout of one call: the upstream's READ_TIMEOUT, or a shorter one the
+# caller asked for, or the time left before the request's deadline if sooner
+# still (with the defaults, REQUEST_DEADLINE is the shorter). Returns it with
+# whether it is shorter than READ_TIMEOUT: only a call that timed out after
+# the upstream's full READ_TIMEOUT counts against its breaker, one cut short
+# sooner is answered 504 and says nothing about the upstream.
+def read_timeout(configured, requested=None):
+    read = configured if requested is None else min(requested, configured)
+    left = deadline.remaining()
+    if left is not None and left < read:
+        if left <= 0:
+            raise DeadlineExceeded()
+        read = left
+    return read, read < configured
+
+# Shared HTTP client for calls from the orchestrator to the backend services.
+# Each upstream gets one requests.Session with its own keep-alive connection
+# pool, so views reuse open TCP connections instead of opening one per call.
+class UpstreamClient:
+    def __init__(self, name):
+        config = settings.UPSTREAMS[name]
+        self.name = name
+        self.host = config['HOST']
+        self.timeout = (config['CONNECT_TIMEOUT'], config['READ_TIMEOUT'])
+        self.breaker = breakers[name]
+        self.flight = flights[name]
+
+        self.session = requests.Session()
+        # the session is shared by every request thread, so never store
+        # cookies from one caller and replay them for another
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # upstreams are reached directly, skip the per-request proxy/netrc lookup
+        self.session.trust_env = False
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config['POOL_SIZE'])
+        self.session.mount('http://', adapter)
+
+    def url(self, path):
+        return 'http://{}{}'.format(self.host, path)
+
+    def request(self, method, path, **kwargs):
+        connect, read = kwargs.pop('timeout', self.timeout)
+        read, capped = read_timeout(self.timeout[1], read)
+        kwargs['headers'] = dict(kwargs.get('headers') or {}, **deadline.header())
+        probe = self.breaker.acquire()
+        success = None
+        try:
+            response = self.session.request(method, self.url(path), timeout=(connect, read), **kwargs)
+        except requests.Timeout as e:
+            if capped:
+                raise DeadlineExceeded() from e
+            success = False
+            raise UpstreamUnavailable() from e
+        except requests.RequestException as e:
+            success = False
+            raise UpstreamUnavailable() from e
+        else:
+            success = response.status_code < 500
+            return response
+        finally:
+            self.breaker.release(probe, success)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    # GET shared with the identical ones in flight, see SingleFlight
+    def shared_get(self, path, params=None, headers=None):
+        if not settings.SINGLE_FLIGHT:
+            return self.get(path, params=params, headers=headers)
+        key = flight_key(path, params, headers)
+        return self.flight.do(key, lambda: self.get(path, params=params, headers=headers))
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+
+# Non-blocking counterpart of UpstreamClient for the async views. The httpx
+# client and the semaphore capping in-flight calls are created on first use,
+# inside the event loop that serves the requests.
+class AsyncUpstreamClient:
+    def __init__(self, name):
+        config = settings.UPSTREAMS[name]
+        self.name = name
+        self.host = config['HOST']
+        self.connect_timeout = config['CONNECT_TIMEOUT']
+        self.read_timeout = config['READ_TIMEOUT']
+        self.timeout = httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        self.breaker = breakers[name]
+        self.flight = flights[name]
+        self.limits = httpx.Limits(
+            max_connections=config['MAX_CONCURRENCY'],
+            max_keepalive_connections=config['POOL_SIZE'],
+        )
+        self.max_concurrency = config['MAX_CONCURRENCY']
+        self.client = None
+        self.semaphore = None
+
+    def url(self, path):
+        return 'http://{}{}'.format(self.host, path)
+
+    def connect(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, trust_env=False)
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    # like send(), but the circuit breaker sees the outcome and the deadline
+    # caps the read timeout and is passed on
+    async def send_guarded(self, request, stream=False):
+        read, capped = read_timeout(self.read_timeout)
+        request.headers.update(deadline.header())
+        request.extensions['timeout'] = httpx.Timeout(read, connect=self.connect_timeout).as_dict()
+        probe = self.breaker.acquire()
+        success = None
+        try:
+            response = await self.client.send(request, stream=stream)
+        except httpx.TimeoutException as e:
+            if capped:
+                raise DeadlineExceeded() from e
+            success = False
+            raise UpstreamUnavailable() from e
+        except httpx.HTTPError as e:
+            success = False
+            raise UpstreamUnavailable() from e
+        else:
+            success = response.status_code < 500
+            return response
+        finally:
+            self.breaker.release(probe, success)
+
+    async def request(self, method, path, **kwargs):
+        self.connect()
+        async with self.semaphore:
+            return await self.send_guarded(self.client.build_request(method, self.url(path), **kwargs))
+
+    # Sends a request and returns as soon as the response headers arrive. The
+    # connection and its semaphore slot stay taken until the body is read
+    # through iter_body(), which must be iterated to the end or closed.
+    async def stream(self, method, path, **kwargs):
+        self.connect()
+        await self.semaphore.acquire()
+        try:
+            request = self.client.build_request(method, self.url(path), **kwargs)
+            return await self.send_guarded(request, stream=True)
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+    async def iter_body(self, response):
+        try:
+            async for chunk in response.aiter_bytes():
+                yield chunk
+        finally:
+            await response.aclose()
+            self.semaphore.release()
+
+    async def get(self, path, **kwargs):
+        return await self.request('GET', path, **kwargs)
+
+    async def shared_get(self, path, params=None, headers=None):
+        if not settings.SINGLE_FLIGHT:
+            return await self.get(path, params=params, headers=headers)
+        key = flight_key(path, params, headers)
+        return await self.flight.do_async(key, lambda: self.get(path, params=params, headers=headers))
+
+    async def post(self, path, **kwargs):
+        return await self.request('POST', path, **kwargs)
+
+    async def put(self, path, **kwargs):
+        return await self.request('PUT', path, **kwargs)
+
+    async def delete(self, path, **kwargs):
+        return await self.request('DELETE', path, **kwargs)
+
+
+account = UpstreamClient('account')
+dogs = UpstreamClient('dogs')
+payment = UpstreamClient('payment')
+email = UpstreamClient('email')
+walks = UpstreamClient('walks')
+
+async_account = AsyncUpstreamClient('account')
+async_dogs = AsyncUpstreamClient('dogs')
+async_payment = AsyncUpstreamClient('payment')
+async_email = AsyncUpstreamClient('email')
+async_walks = AsyncUpstreamClient('walks')
+
+
+# Answers the UpstreamUnavailable and DeadlineExceeded raised in the async
+# views, which DRF does not wrap; the DRF views answer them themselves
+class UpstreamErrorMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, (UpstreamUnavailable, DeadlineExceeded)):
+            return JsonResponse({'detail': exception.detail}, status=exception.status_code)
+        return None
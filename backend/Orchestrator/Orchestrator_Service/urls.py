@@ -1,68 +1,86 @@
 from django.urls import path
-from . import views
+from django.conf import settings
+from . import views, async_views
+
+# under ASGI the JSON proxy views are served by their async versions,
+# multipart upload views always use the DRF views
+proxy = async_views if settings.ORCHESTRATOR_MODE == 'async' else views
 
 urlpatterns = [
+    ### START OF METRICS URLS ###
+    path('metrics/', views.MetricsAPIView.as_view()),
+    ### END OF METRICS URLS ###
+    
     ### START OF JWT URLS ###
-    path('login/', views.LoginAPIView.as_view()),
-    path('refreshToken/', views.RefreshTokenAPIView.as_view()),
-    path('verifyToken/', views.VerifyTokenAPIView.as_view()),
+    path('login/', proxy.LoginAPIView.as_view()),
+    path('refreshToken/', proxy.RefreshTokenAPIView.as_view()),
+    path('verifyToken/', proxy.VerifyTokenAPIView.as_view()),
     ### END OF JWT URLS ###
     
     ### START OF PYOTP URLS ###
-    path('otp/', views.VerifyOTPAPIView.as_view()),
+    path('otp/', proxy.VerifyOTPAPIView.as_view()),
     ### END OF PYOTP URLS ###
     
     ### START OF ADMIN CRUD ACCOUNTS URLS ###
-    path('getAccount/', views.GetAccountAPIView.as_view()),
-    path('listAccounts/', views.ListAccountsAPIView.as_view()),
+    path('getAccount/', proxy.GetAccountAPIView.as_view()),
+    path('listAccounts/', proxy.ListAccountsAPIView.as_view()),
     path('addAccount/', views.AddAccountAPIView.as_view()),
     path('updateAccount/', views.UpdateAccountAPIView.as_view()),
-    path('deleteAccount/', views.DeleteAccountAPIView.as_view()),
-    path('accountExists/', views.CheckIfAccountExistsAPIView.as_view()),
+    path('deleteAccount/', proxy.DeleteAccountAPIView.as_view()),
+    path('accountExists/', proxy.CheckIfAccountExistsAPIView.as_view()),
     ### END OF ADMIN CRUD ACCOUNTS URLS ###
     
     ### START OF ADMIN CRUD DOGS URLS ###
-    path('getDog/', views.GetDogAPIView.as_view()),
-    path('listDogs/', views.ListDogsAPIView.as_view()),
+    path('getDog/', proxy.GetDogAPIView.as_view()),
+    path('listDogs/', proxy.ListDogsAPIView.as_view()),
     path('addDog/', views.AddDogAPIView.as_view()),
     path('updateDog/', views.UpdateDogAPIView.as_view()),
-    path('deleteDog/', views.DeleteDogAPIView.as_view()),
-    path('dogExists/', views.CheckIfDogExistsAPIView.as_view()),
+    path('deleteDog/', proxy.DeleteDogAPIView.as_view()),
+    path('dogExists/', proxy.CheckIfDogExistsAPIView.as_view()),
+    path('getDogProfile/', proxy.GetDogProfileAPIView.as_view()),
+    path('imageUploadTicket/', proxy.ImageUploadTicketAPIView.as_view()),
+    path('completeImageUpload/', proxy.CompleteImageUploadAPIView.as_view()),
     ### END OF ADMIN CRUD DOGS URLS ###
     
     ### START OF ADMIN CRUD DOG CATEGORIES URLS ###
-    path('getDogCategory/', views.GetDogCategoryAPIView.as_view()),
-    path('listDogCategories/', views.ListDogCategoriesAPIView.as_view()),
+    path('getDogCategory/', proxy.GetDogCategoryAPIView.as_view()),
+    path('listDogCategories/', proxy.ListDogCategoriesAPIView.as_view()),
     path('addDogCategory/', views.AddDogCategoryAPIView.as_view()),
     path('updateDogCategory/', views.UpdateDogCategoryAPIView.as_view()),
-    path('deleteDogCategory/', views.DeleteDogCategoryAPIView.as_view()),
-    path('dogCategoryExists/', views.CheckIfDogCategoryExistsAPIView.as_view()),
+    path('deleteDogCategory/', proxy.DeleteDogCategoryAPIView.as_view()),
+    path('dogCategoryExists/', proxy.CheckIfDogCategoryExistsAPIView.as_view()),
     ### END OF ADMIN CRUD DOG CATEGORIES URLS ###
     
     ### START OF PUBLIC-RELATED URLS ###
-    path('publicListDogs/', views.PublicListDogsAPIView.as_view()),
-    path('publicListDogCategories/', views.PublicListDogCategoriesAPIView.as_view()),
-    path('listDogsByCategories/', views.ListDogsByCategoryAPIView.as_view()),
+    path('publicListDogs/', proxy.PublicListDogsAPIView.as_view()),
+    path('publicListDogCategories/', proxy.PublicListDogCategoriesAPIView.as_view()),
+    path('listDogsByCategories/', proxy.ListDogsByCategoryAPIView.as_view()),
     ### END OF PUBLIC-RELATED URLS ###
     
     ### START OF PAYMENT-RELATED URLS ###
-    path('donate/', views.DonateAPIView.as_view()),
-    path('updateDogSponsor/', views.UpdateDogSponsorAPIView.as_view()),
-    path('getPayment/', views.GetPaymentAPIView.as_view()),
-    path('listPayments/', views.ListPaymentsAPIView.as_view()),
-    path('deletePayment/', views.DeletePaymentAPIView.as_view()),
+    path('donate/', proxy.DonateAPIView.as_view()),
+    path('updateDogSponsor/', proxy.UpdateDogSponsorAPIView.as_view()),
+    path('getPayment/', proxy.GetPaymentAPIView.as_view()),
+    path('listPayments/', proxy.ListPaymentsAPIView.as_view()),
+    path('exportPayments/', proxy.ExportPaymentsAPIView.as_view()),
+    path('deletePayment/', proxy.DeletePaymentAPIView.as_view()),
     ### END OF PAYMENT-RELATED URLS ###
     
     ### START OF EMAIL URLS ###
-    path('sendDonationEmail/', views.SendDonationEmailAPIView.as_view()),
+    path('sendDonationEmail/', proxy.SendDonationEmailAPIView.as_view()),
     ### END OF EMAIL URLS ###
     
     ### START OF WALK RECORDS URLS ###
-    path('getWalk/', views.GetWalkAPIView.as_view()),
-    path('listWalks/', views.ListWalksAPIView.as_view()),
+    path('getWalk/', proxy.GetWalkAPIView.as_view()),
+    path('listWalks/', proxy.ListWalksAPIView.as_view()),
+    path('exportWalks/', proxy.ExportWalksAPIView.as_view()),
+    path('walkAnalytics/', proxy.WalkAnalyticsAPIView.as_view()),
     path('addWalk/', views.AddWalkAPIView.as_view()),
     path('updateWalk/', views.UpdateWalkAPIView.as_view()),
-    path('deleteWalk/', views.DeleteWalkAPIView.as_view()),
+    path('deleteWalk/', proxy.DeleteWalkAPIView.as_view()),
+    path('bulkAddWalks/', proxy.BulkAddWalksAPIView.as_view()),
+    path('bulkUpdateWalks/', proxy.BulkUpdateWalksAPIView.as_view()),
+    path('bulkDeleteWalks/', proxy.BulkDeleteWalksAPIView.as_view()),
     ### END OF WALK RECORDS URLS ###
 ]
 
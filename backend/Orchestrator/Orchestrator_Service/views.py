@@ -1,37 +1,96 @@
-import requests
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from dotenv import load_dotenv
-import os
 from rest_framework.parsers import MultiPartParser, FormParser
-
-load_dotenv()
-
-DOGS_URL = os.environ.get("DOGS_URL")
-ACCOUNT_URL = os.environ.get('ACCOUNT_URL')
-PAYMENT_URL = os.environ.get('PAYMENT_URL')
-EMAIL_URL = os.environ.get('EMAIL_URL')
-WALKS_URL = os.environ.get('WALKS_URL')
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+
+from . import fanout, upstream
+
+# Conditional GET pass-through for the list views: the client's If-None-Match
+# is sent upstream, and the upstream ETag, or its 304, is returned unchanged
+def conditional_headers(request, headers=None):
+    headers = dict(headers or {})
+    etag = request.META.get('HTTP_IF_NONE_MATCH')
+    if etag:
+        headers['If-None-Match'] = etag
+    return headers
+
+def conditional_response(response):
+    if response.status_code == 304:
+        proxied = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        proxied = Response(response.json(), status=status.HTTP_200_OK)
+    if 'ETag' in response.headers:
+        proxied['ETag'] = response.headers['ETag']
+    return proxied
+
+# Streaming pass-through for the exports: the upstream body is relayed chunk by
+# chunk as it arrives instead of being read whole, then the connection is freed
+def stream_response(response):
+    if response.status_code != 200:
+        try:
+            return HttpResponse(response.content, status=response.status_code, content_type=response.headers.get('Content-Type'))
+        finally:
+            response.close()
+    proxied = StreamingHttpResponse(stream_body(response), content_type=response.headers.get('Content-Type'))
+    if 'Content-Disposition' in response.headers:
+        proxied['Content-Disposition'] = response.headers['Content-Disposition']
+    return proxied
+
+def stream_body(response):
+    try:
+        yield from response.iter_content(chunk_size=None)
+    finally:
+        response.close()
+
+# Multipart uploads to the Dogs service. With UPLOAD_MODE "stream" the client's
+# body is relayed as it is read, one chunk at a time, instead of being parsed
+# here and encoded again in memory; the Dogs service reads the comma-separated
+# categories and the empty image field itself. Updates then need their id in
+# the query string (?id=), as the body is not looked at; without it, or
+# without a Content-Length, the form is parsed and re-encoded as before.
+class RequestBody:
+    def __init__(self, request):
+        self.request = request
+        self.length = int(request.META['CONTENT_LENGTH'])
+
+    # lets requests send a Content-Length, which Django needs to read the body
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        return self.request.read(size)
+
+def streams_upload(request):
+    return (
+        settings.UPLOAD_MODE == 'stream'
+        and request.content_type.startswith('multipart/form-data')
+        and bool(request.META.get('CONTENT_LENGTH'))
+    )
+
+def forward_upload(request, method, path, headers):
+    headers = dict(headers, **{'Content-Type': request.META['CONTENT_TYPE']})
+    return upstream.dogs.request(method, path, data=RequestBody(request._request), headers=headers)
 
 ### START OF JWT VIEWS ###
 
 
 class LoginAPIView(APIView):
     def post(self, request):
-        response = requests.post('http://{}/api/token/'.format(ACCOUNT_URL), json=request.data)
+        response = upstream.account.post('/api/token/', json=request.data)
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
     
 class RefreshTokenAPIView(APIView):
     def post(self, request):
-        response = requests.post('http://{}/api/token/refresh/'.format(ACCOUNT_URL), json=request.data)
+        response = upstream.account.post('/api/token/refresh/', json=request.data)
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
 
 class VerifyTokenAPIView(APIView):
     def post(self, request):
-        response = requests.post('http://{}/api/token/verify/'.format(ACCOUNT_URL), json=request.data)
+        response = upstream.account.post('/api/token/verify/', json=request.data)
         if response.status_code == 200:
             return Response(status=status.HTTP_200_OK)
         else:
@@ -49,7 +108,7 @@ class VerifyOTPAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.post('http://{}/api/otp/'.format(ACCOUNT_URL), json=request.data, headers=headers)
+        response = upstream.account.post('/api/otp/', json=request.data, headers=headers)
         data = response.json()
         return Response(data, status=response.status_code)
 
@@ -66,7 +125,7 @@ class GetAccountAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.get('http://{}/api/account/{}/'.format(ACCOUNT_URL, id), headers=headers)
+        response = upstream.account.get('/api/account/{}/'.format(id), headers=headers)
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
 
@@ -76,7 +135,7 @@ class ListAccountsAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.get('http://{}/api/account/'.format(ACCOUNT_URL), headers=headers)
+        response = upstream.account.get('/api/account/', headers=headers)
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
     
@@ -89,7 +148,7 @@ class AddAccountAPIView(APIView):
             'Authorization': accessToken
         }
         data = request.data.dict()
-        response = requests.post('http://{}/api/account/'.format(ACCOUNT_URL), data=data, headers=headers)
+        response = upstream.account.post('/api/account/', data=data, headers=headers)
         data = response.json()
         if "id" not in data:
             return Response(status=status.HTTP_409_CONFLICT)
@@ -105,7 +164,7 @@ class UpdateAccountAPIView(APIView):
             'Authorization': accessToken
         }
         data = request.data.dict()
-        response = requests.put('http://{}/api/account/{}/update/'.format(ACCOUNT_URL, id), data=data, headers=headers)
+        response = upstream.account.put('/api/account/{}/update/'.format(id), data=data, headers=headers)
         data = response.json()
         if "id" not in data:
             return Response(status=status.HTTP_409_CONFLICT)
@@ -118,7 +177,7 @@ class DeleteAccountAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.delete('http://{}/api/account/{}/delete/'.format(ACCOUNT_URL, id), headers=headers)
+        response = upstream.account.delete('/api/account/{}/delete/'.format(id), headers=headers)
         if response.status_code == 204:
             return Response(status=status.HTTP_204_NO_CONTENT)
         else:
@@ -130,8 +189,8 @@ class CheckIfAccountExistsAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.post(
-            "http://{}/api/accountExists/".format(ACCOUNT_URL), json=request.data, headers=headers
+        response = upstream.account.post(
+            "/api/accountExists/", json=request.data, headers=headers
         )
         data = response.json()
         return Response(data, status=response.status_code)
@@ -145,15 +204,14 @@ class CheckIfAccountExistsAPIView(APIView):
 class GetDogAPIView(APIView):
     def post(self, request):
         id = request.data["id"]
-        response = requests.get("http://{}/api/dogs/{}/".format(DOGS_URL, id))
+        response = upstream.dogs.shared_get("/api/dogs/{}/".format(id))
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
 
 class ListDogsAPIView(APIView):
     def get(self, request):
-        response = requests.get("http://{}/api/dogs/".format(DOGS_URL))
-        data = response.json()
-        return Response(data, status=status.HTTP_200_OK)
+        response = upstream.dogs.shared_get("/api/dogs/", params=dict(request.query_params.lists()), headers=conditional_headers(request))
+        return conditional_response(response)
 
 class AddDogAPIView(APIView):
     parser_classes = (MultiPartParser, FormParser)
@@ -163,18 +221,21 @@ class AddDogAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        data = request.data.dict()
-        if data["categories"]:
-            data["categories"] = [int(i) for i in data["categories"].split(",")]
+        if streams_upload(request):
+            response = forward_upload(request, 'POST', "/api/dogs/", headers)
         else:
-            data["categories"] = []
-        del data["image"]
-        files = []
-        for file in request.FILES.getlist("image"):
-            files.append(("image", (file.name, file, file.content_type)))
-        response = requests.post(
-            "http://{}/api/dogs/".format(DOGS_URL), data=data, files=files, headers=headers
-        )
+            data = request.data.dict()
+            if data["categories"]:
+                data["categories"] = [int(i) for i in data["categories"].split(",")]
+            else:
+                data["categories"] = []
+            del data["image"]
+            files = []
+            for file in request.FILES.getlist("image"):
+                files.append(("image", (file.name, file, file.content_type)))
+            response = upstream.dogs.post(
+                "/api/dogs/", data=data, files=files, headers=headers
+            )
         data = response.json()
         return Response(data, status=status.HTTP_201_CREATED)
 
@@ -186,19 +247,23 @@ class UpdateDogAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        id = request.data["id"]
-        data = request.data.dict()
-        if data["categories"]:
-            data["categories"] = [int(i) for i in data["categories"].split(",")]
+        id = request.query_params.get("id")
+        if id and streams_upload(request):
+            response = forward_upload(request, 'PUT', "/api/dogs/{}/update/".format(id), headers)
         else:
-            data["categories"] = []
-        del data["image"]
-        files = []
-        for file in request.FILES.getlist("image"):
-            files.append(("image", (file.name, file, file.content_type)))
-        response = requests.put(
-            "http://{}/api/dogs/{}/update/".format(DOGS_URL, id), data=data, files=files, headers=headers
-        )
+            id = request.data["id"]
+            data = request.data.dict()
+            if data["categories"]:
+                data["categories"] = [int(i) for i in data["categories"].split(",")]
+            else:
+                data["categories"] = []
+            del data["image"]
+            files = []
+            for file in request.FILES.getlist("image"):
+                files.append(("image", (file.name, file, file.content_type)))
+            response = upstream.dogs.put(
+                "/api/dogs/{}/update/".format(id), data=data, files=files, headers=headers
+            )
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
 
@@ -209,7 +274,7 @@ class DeleteDogAPIView(APIView):
             'Authorization': accessToken
         }
         id = request.data["id"]
-        response = requests.delete("http://{}/api/dogs/{}/delete/".format(DOGS_URL, id), headers=headers)
+        response = upstream.dogs.delete("/api/dogs/{}/delete/".format(id), headers=headers)
         if response.status_code == 204:
             return Response(status=status.HTTP_204_NO_CONTENT)
         else:
@@ -217,12 +282,32 @@ class DeleteDogAPIView(APIView):
 
 class CheckIfDogExistsAPIView(APIView):
     def post(self, request):
-        response = requests.post(
-            "http://{}/api/dogs/dogExists/".format(DOGS_URL), json=request.data
+        response = upstream.dogs.post(
+            "/api/dogs/dogExists/", json=request.data
         )
         data = response.json()
         return Response(data, status=response.status_code)
 
+# Direct-to-bucket image uploads: a ticket with the presigned target, then the
+# completion attaching the uploaded image to its dog or category
+class ImageUploadTicketAPIView(APIView):
+    def post(self, request):
+        accessToken = request.META.get('HTTP_AUTHORIZATION')
+        headers = {
+            'Authorization': accessToken
+        }
+        response = upstream.dogs.post("/api/dogs/uploads/", json=request.data, headers=headers)
+        return Response(response.json(), status=response.status_code)
+
+class CompleteImageUploadAPIView(APIView):
+    def post(self, request):
+        accessToken = request.META.get('HTTP_AUTHORIZATION')
+        headers = {
+            'Authorization': accessToken
+        }
+        response = upstream.dogs.post("/api/dogs/uploads/complete/", json=request.data, headers=headers)
+        return Response(response.json(), status=response.status_code)
+
 
 ### END OF ADMIN CRUD DOGS VIEWS ###
 
@@ -232,17 +317,16 @@ class CheckIfDogExistsAPIView(APIView):
 class GetDogCategoryAPIView(APIView):
     def post(self, request):
         id = request.data["id"]
-        response = requests.get(
-            "http://{}/api/dogs/categories/{}/".format(DOGS_URL, id)
+        response = upstream.dogs.shared_get(
+            "/api/dogs/categories/{}/".format(id)
         )
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
 
 class ListDogCategoriesAPIView(APIView):
     def get(self, request):
-        response = requests.get("http://{}/api/dogs/categories/".format(DOGS_URL))
-        data = response.json()
-        return Response(data, status=status.HTTP_200_OK)
+        response = upstream.dogs.shared_get("/api/dogs/categories/", headers=conditional_headers(request))
+        return conditional_response(response)
 
 class AddDogCategoryAPIView(APIView):
     parser_classes = (MultiPartParser, FormParser)
@@ -252,14 +336,17 @@ class AddDogCategoryAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        data = request.data.dict()
-        del data["image"]
-        files = []
-        for file in request.FILES.getlist("image"):
-            files.append(("image", (file.name, file, file.content_type)))
-        response = requests.post(
-            "http://{}/api/dogs/categories/".format(DOGS_URL), data=data, files=files, headers=headers
-        )
+        if streams_upload(request):
+            response = forward_upload(request, 'POST', "/api/dogs/categories/", headers)
+        else:
+            data = request.data.dict()
+            del data["image"]
+            files = []
+            for file in request.FILES.getlist("image"):
+                files.append(("image", (file.name, file, file.content_type)))
+            response = upstream.dogs.post(
+                "/api/dogs/categories/", data=data, files=files, headers=headers
+            )
         data = response.json()
         return Response(data, status=status.HTTP_201_CREATED)
 
@@ -271,18 +358,22 @@ class UpdateDogCategoryAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        id = request.data["id"]
-        data = request.data.dict()
-        del data["image"]
-        files = []
-        for file in request.FILES.getlist("image"):
-            files.append(("image", (file.name, file, file.content_type)))
-        response = requests.put(
-            "http://{}/api/dogs/categories/{}/update/".format(DOGS_URL, id),
-            data=data,
-            files=files,
-            headers=headers
-        )
+        id = request.query_params.get("id")
+        if id and streams_upload(request):
+            response = forward_upload(request, 'PUT', "/api/dogs/categories/{}/update/".format(id), headers)
+        else:
+            id = request.data["id"]
+            data = request.data.dict()
+            del data["image"]
+            files = []
+            for file in request.FILES.getlist("image"):
+                files.append(("image", (file.name, file, file.content_type)))
+            response = upstream.dogs.put(
+                "/api/dogs/categories/{}/update/".format(id),
+                data=data,
+                files=files,
+                headers=headers
+            )
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
 
@@ -293,8 +384,8 @@ class DeleteDogCategoryAPIView(APIView):
             'Authorization': accessToken
         }
         id = request.data["id"]
-        response = requests.delete(
-            "http://{}/api/dogs/categories/{}/delete/".format(DOGS_URL, id), headers=headers
+        response = upstream.dogs.delete(
+            "/api/dogs/categories/{}/delete/".format(id), headers=headers
         )
         if response.status_code == 204:
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -303,8 +394,8 @@ class DeleteDogCategoryAPIView(APIView):
 
 class CheckIfDogCategoryExistsAPIView(APIView):
     def post(self, request):
-        response = requests.post(
-            "http://{}/api/dogs/dogCategoryExists/".format(DOGS_URL), json=request.data
+        response = upstream.dogs.post(
+            "/api/dogs/dogCategoryExists/", json=request.data
         )
         data = response.json()
         return Response(data, status=response.status_code)
@@ -317,20 +408,18 @@ class CheckIfDogCategoryExistsAPIView(APIView):
 
 class PublicListDogsAPIView(APIView):
     def get(self, request):
-        response = requests.get('http://{}/api/dogs/public/'.format(DOGS_URL))
-        data = response.json()
-        return Response(data, status=status.HTTP_200_OK)
+        response = upstream.dogs.shared_get('/api/dogs/public/', params=dict(request.query_params.lists()), headers=conditional_headers(request))
+        return conditional_response(response)
     
 class PublicListDogCategoriesAPIView(APIView):
     def get(self, request):
-        response = requests.get('http://{}/api/dogs/public/categories/'.format(DOGS_URL))
-        data = response.json()
-        return Response(data, status=status.HTTP_200_OK)
+        response = upstream.dogs.shared_get('/api/dogs/public/categories/', headers=conditional_headers(request))
+        return conditional_response(response)
 
 class ListDogsByCategoryAPIView(APIView):
     def post(self, request):
-        response = requests.post(
-            "http://{}/api/dogs/byCategory/".format(DOGS_URL), json=request.data
+        response = upstream.dogs.post(
+            "/api/dogs/byCategory/", json=request.data
         )
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
@@ -343,7 +432,7 @@ class ListDogsByCategoryAPIView(APIView):
 
 class DonateAPIView(APIView):
     def post(self, request):
-        response = requests.post('http://{}/api/payment/create-checkout-session/'.format(PAYMENT_URL), json=request.data)
+        response = upstream.payment.post('/api/payment/create-checkout-session/', json=request.data)
         data = response.json()
         if response.status_code == 200:
             return Response(data, status=status.HTTP_200_OK)
@@ -352,7 +441,7 @@ class DonateAPIView(APIView):
 
 class UpdateDogSponsorAPIView(APIView):
     def post(self, request):
-        response = requests.post('http://{}/api/dogs/updateDogSponsor/'.format(DOGS_URL), json=request.data)
+        response = upstream.dogs.post('/api/dogs/updateDogSponsor/', json=request.data)
         data = response.json()
         if response.status_code == 200:
             return Response(data, status=status.HTTP_200_OK)
@@ -366,7 +455,7 @@ class GetPaymentAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.get('http://{}/api/payment/{}/'.format(PAYMENT_URL, id), headers=headers)
+        response = upstream.payment.get('/api/payment/{}/'.format(id), headers=headers)
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
 
@@ -376,9 +465,17 @@ class ListPaymentsAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.get('http://{}/api/payment/'.format(PAYMENT_URL), headers=headers)
-        data = response.json()
-        return Response(data, status=status.HTTP_200_OK)
+        response = upstream.payment.get('/api/payment/', headers=conditional_headers(request, headers))
+        return conditional_response(response)
+
+class ExportPaymentsAPIView(APIView):
+    def get(self, request):
+        accessToken = request.META.get('HTTP_AUTHORIZATION')
+        headers = {
+            'Authorization': accessToken
+        }
+        response = upstream.payment.get('/api/payment/export/', params=dict(request.query_params.lists()), headers=headers, stream=True)
+        return stream_response(response)
 
 class DeletePaymentAPIView(APIView):
     def post(self, request):
@@ -387,7 +484,7 @@ class DeletePaymentAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.delete('http://{}/api/payment/{}/delete/'.format(PAYMENT_URL, id), headers=headers)
+        response = upstream.payment.delete('/api/payment/{}/delete/'.format(id), headers=headers)
         if response.status_code == 204:
             return Response(status=status.HTTP_204_NO_CONTENT)
         else:
@@ -399,7 +496,7 @@ class DeletePaymentAPIView(APIView):
 
 class SendDonationEmailAPIView(APIView):
     def post(self, request):
-        response = requests.post('http://{}/api/email/sendDonationEmail/'.format(EMAIL_URL), json=request.data)
+        response = upstream.email.post('/api/email/sendDonationEmail/', json=request.data)
         data = response.json()
         if response.status_code == 200:
             return Response(data, status=status.HTTP_200_OK)
@@ -409,13 +506,35 @@ class SendDonationEmailAPIView(APIView):
 
 ### END OF EMAIL VIEWS ###
 
+### START OF DOG PROFILE VIEWS ###
+
+
+# Get a dog with its latest walks and its donations in one call: the three
+# services are queried concurrently, and any section missing the
+# DOG_PROFILE_DEADLINE comes back with a "timeout" status (see fanout.py)
+class GetDogProfileAPIView(APIView):
+    def post(self, request):
+        id = request.data['id']
+        accessToken = request.META.get('HTTP_AUTHORIZATION')
+        headers = {
+            'Authorization': accessToken
+        }
+        calls = fanout.dog_profile_calls(
+            upstream.dogs, upstream.walks, upstream.payment, id, request.data.get('walksPageSize', 20), headers,
+        )
+        sections, elapsedMs = fanout.gather(calls, settings.DOG_PROFILE_DEADLINE)
+        return Response(dict(sections, elapsedMs=elapsedMs), status=fanout.dog_profile_status(sections))
+
+
+### END OF DOG PROFILE VIEWS ###
+
 ### START OF WALK RECORDS VIEWS ###
 
 
 class GetWalkAPIView(APIView):
     def post(self, request):
         id = request.data['id']
-        response = requests.get('http://{}/api/walks/{}/'.format(WALKS_URL, id))
+        response = upstream.walks.get('/api/walks/{}/'.format(id))
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
 
@@ -425,9 +544,26 @@ class ListWalksAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.get('http://{}/api/walks/'.format(WALKS_URL), headers=headers)
-        data = response.json()
-        return Response(data, status=status.HTTP_200_OK)
+        response = upstream.walks.get('/api/walks/', params=dict(request.query_params.lists()), headers=conditional_headers(request, headers))
+        return conditional_response(response)
+
+class ExportWalksAPIView(APIView):
+    def get(self, request):
+        accessToken = request.META.get('HTTP_AUTHORIZATION')
+        headers = {
+            'Authorization': accessToken
+        }
+        response = upstream.walks.get('/api/walks/export/', params=dict(request.query_params.lists()), headers=headers, stream=True)
+        return stream_response(response)
+
+class WalkAnalyticsAPIView(APIView):
+    def get(self, request):
+        accessToken = request.META.get('HTTP_AUTHORIZATION')
+        headers = {
+            'Authorization': accessToken
+        }
+        response = upstream.walks.get('/api/walks/analytics/', params=dict(request.query_params.lists()), headers=headers)
+        return Response(response.json(), status=response.status_code)
     
 class AddWalkAPIView(APIView):
     parser_classes = (MultiPartParser, FormParser)
@@ -438,7 +574,7 @@ class AddWalkAPIView(APIView):
             'Authorization': accessToken
         }
         data = request.data.dict()
-        response = requests.post('http://{}/api/walks/'.format(WALKS_URL), data=data, headers=headers)
+        response = upstream.walks.post('/api/walks/', data=data, headers=headers)
         data = response.json()
         return Response(data, status=status.HTTP_201_CREATED)
     
@@ -452,7 +588,7 @@ class UpdateWalkAPIView(APIView):
             'Authorization': accessToken
         }
         data = request.data.dict()
-        response = requests.put('http://{}/api/walks/{}/update/'.format(WALKS_URL, id), data=data, headers=headers)
+        response = upstream.walks.put('/api/walks/{}/update/'.format(id), data=data, headers=headers)
         data = response.json()
         return Response(data, status=status.HTTP_200_OK)
 
@@ -463,12 +599,54 @@ class DeleteWalkAPIView(APIView):
         headers = {
             'Authorization': accessToken
         }
-        response = requests.delete('http://{}/api/walks/{}/delete/'.format(WALKS_URL, id), headers=headers)
+        response = upstream.walks.delete('/api/walks/{}/delete/'.format(id), headers=headers)
         if response.status_code == 204:
             return Response(status=status.HTTP_204_NO_CONTENT)
         else:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
+class BulkAddWalksAPIView(APIView):
+    def post(self, request):
+        accessToken = request.META.get('HTTP_AUTHORIZATION')
+        headers = {
+            'Authorization': accessToken
+        }
+        response = upstream.walks.post('/api/walks/bulk/', json=request.data, headers=headers)
+        return Response(response.json(), status=response.status_code)
+
+class BulkUpdateWalksAPIView(APIView):
+    def post(self, request):
+        accessToken = request.META.get('HTTP_AUTHORIZATION')
+        headers = {
+            'Authorization': accessToken
+        }
+        response = upstream.walks.put('/api/walks/bulk/update/', json=request.data, headers=headers)
+        return Response(response.json(), status=response.status_code)
+
+class BulkDeleteWalksAPIView(APIView):
+    def post(self, request):
+        accessToken = request.META.get('HTTP_AUTHORIZATION')
+        headers = {
+            'Authorization': accessToken
+        }
+        response = upstream.walks.post('/api/walks/bulk/delete/', json=request.data, headers=headers)
+        return Response(response.json(), status=response.status_code)
+
 
 ### END OF WALK RECORDS VIEWS ###
 
+### START OF METRICS VIEWS ###
+
+
+# Circuit breaker state and counters of each upstream, in this process
+class MetricsAPIView(APIView):
+    def get(self, request):
+        return Response({
+            'breakers': {name: breaker.stats() for name, breaker in upstream.breakers.items()},
+            'singleFlight': {name: flight.stats() for name, flight in upstream.flights.items()},
+            'requestDeadline': settings.REQUEST_DEADLINE,
+        }, status=status.HTTP_200_OK)
+
+
+### END OF METRICS VIEWS ###
+
@@ -1,5 +1,17 @@
 #!/bin/sh
 
+export BOOT_STARTED_AT=$(python -c "import time; print(time.time())")
+
 echo "###   Starting Orchestrator Service Server   ###"
-python manage.py runserver 0.0.0.0:8888
+if [ "$SERVER_MODE" = "development" ]; then
+    if [ "$ORCHESTRATOR_MODE" = "async" ]; then
+        uvicorn Orchestrator.asgi:application --host 0.0.0.0 --port 8888
+    else
+        python manage.py runserver 0.0.0.0:8888
+    fi
+elif [ "$ORCHESTRATOR_MODE" = "async" ]; then
+    exec gunicorn -c gunicorn.conf.py Orchestrator.asgi:application
+else
+    exec gunicorn -c gunicorn.conf.py Orchestrator.wsgi:application
+fi
 
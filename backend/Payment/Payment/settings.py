@@ -27,6 +27,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     "corsheaders.middleware.CorsMiddleware",
+    'Payment_Service.deadline.DeadlineMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,6 +65,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Payment.wsgi.application'
 
+# Connections are kept open for SQL_CONN_MAX_AGE seconds (0 closes them after
+# every request) and checked before reuse. When SQL_HOST points at a pooler
+# such as PgBouncer in transaction mode, set SQL_POOLER=transaction: server-side
+# cursors cannot span the pooler's transactions.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -72,6 +77,9 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD"),
         "HOST": os.environ.get("SQL_HOST"),
         "PORT": os.environ.get("SQL_PORT"),
+        "CONN_MAX_AGE": int(os.environ.get("SQL_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.environ.get("SQL_CONN_HEALTH_CHECKS", "true") == "true",
+        "DISABLE_SERVER_SIDE_CURSORS": os.environ.get("SQL_POOLER") == "transaction",
     },
     
 }
@@ -106,3 +114,38 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOW_ALL_ORIGINS = True
 
 AUTH_USER_MODEL = "Payment_Service.CustomUser"
+
+TEST_RUNNER = "Payment_Service.test_runner.UnmanagedModelTestRunner"
+
+# Token verification used by CustomJWTAuthentication. In "local" mode tokens are
+# checked in-process with the same key and algorithm as Account's SIMPLE_JWT
+# (JWT_SIGNING_KEY must be the Account service's SECRET_KEY); without a signing
+# key, or in "remote" mode, the orchestrator's verifyToken/ is asked instead.
+JWT_VERIFICATION = os.environ.get("JWT_VERIFICATION", "local")
+JWT_SIGNING_KEY = os.environ.get("JWT_SIGNING_KEY")
+JWT_ALGORITHM = "HS256"
+JWT_LEEWAY = 0
+
+# Verified-token cache in CustomJWTAuthentication (JWT_CACHE_SIZE=0 disables it).
+# Entries never outlive the token's exp; blacklisted tokens are evicted within
+# JWT_CACHE_BLACKLIST_INTERVAL seconds. Logging out blacklists the refresh token
+# only, so its access token is accepted until exp either way (see auth/cache.py).
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE", 1024))
+JWT_CACHE_TTL = int(os.environ.get("JWT_CACHE_TTL", 300))
+JWT_CACHE_BLACKLIST_INTERVAL = int(os.environ.get("JWT_CACHE_BLACKLIST_INTERVAL", 5))
+
+# Rows read per round trip by the streaming CSV/NDJSON exports
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
+
+# Stripe webhook outbox worker (`manage.py process_outbox`): polls every
+# OUTBOX_POLL_INTERVAL seconds when idle and takes up to OUTBOX_BATCH_SIZE events
+# per round. A failed event is retried after OUTBOX_RETRY_DELAY seconds, doubling
+# on each attempt, and given up after OUTBOX_MAX_ATTEMPTS attempts. A worker
+# leases an event for OUTBOX_LEASE seconds, after which another one may take it
+# over; keep it above the handler's worst case, two OUTBOX_HTTP_TIMEOUT calls.
+OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 1))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_RETRY_DELAY = int(os.environ.get("OUTBOX_RETRY_DELAY", 10))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_HTTP_TIMEOUT = float(os.environ.get("OUTBOX_HTTP_TIMEOUT", 10))
+OUTBOX_LEASE = int(os.environ.get("OUTBOX_LEASE", 60))
\ No newline at end of file
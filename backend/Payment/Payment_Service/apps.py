@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete
 
 class PaymentServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -7,4 +7,9 @@ class PaymentServiceConfig(AppConfig):
 
     def ready(self):
         from .signals import initial_web_app_group
-        post_migrate.connect(initial_web_app_group, sender=self)
\ No newline at end of file
+        post_migrate.connect(initial_web_app_group, sender=self)
+
+        from .models import Donation
+        from .signals import replace_donation_version
+        post_save.connect(replace_donation_version, sender=Donation)
+        post_delete.connect(replace_donation_version, sender=Donation)
\ No newline at end of file
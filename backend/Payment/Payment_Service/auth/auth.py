@@ -1,22 +1,67 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from django.conf import settings
+from django.db import DatabaseError
 import requests
+import jwt
 from dotenv import load_dotenv
 import os
 
+from ..models import BlacklistedToken
+from .cache import token_cache
+
 load_dotenv()
 
 class CustomJWTAuthentication(BaseAuthentication):
     def authenticate(self, request):
         token = self.get_token(request)
-        
-        endpoint = "http://{}/verifyToken/".format(os.environ.get("ORCHESTRATOR_URL")) 
-        r = requests.post(endpoint, json={'token': token})
-
-        if r.status_code == 200:
+        if token and token_cache.get(token):
             return None, token
 
-        raise AuthenticationFailed('Invalid or expired token!')
+        payload = None
+        if settings.JWT_VERIFICATION == 'local' and settings.JWT_SIGNING_KEY:
+            try:
+                payload = self.verify_locally(token)
+                if payload is None:
+                    raise AuthenticationFailed('Invalid or expired token!')
+            except DatabaseError:
+                # blacklist could not be read, let the Account service decide instead
+                pass
+
+        if payload is None:
+            if not self.verify_remotely(token):
+                raise AuthenticationFailed('Invalid or expired token!')
+            # already verified by the Account service, only exp/jti are needed for caching
+            payload = jwt.decode(token, options={'verify_signature': False})
+
+        token_cache.add(token, payload)
+        return None, token
+
+    # same checks as Account's SIMPLE_JWT: HS256 signature, expiry, access token type and blacklist
+    def verify_locally(self, token):
+        if not token:
+            return None
+        try:
+            payload = jwt.decode(
+                token,
+                settings.JWT_SIGNING_KEY,
+                algorithms=[settings.JWT_ALGORITHM],
+                leeway=settings.JWT_LEEWAY,
+                options={'require': ['exp', 'jti']},
+            )
+        except jwt.InvalidTokenError:
+            return None
+        if payload.get('token_type') != 'access':
+            return None
+        if BlacklistedToken.objects.filter(token__jti=payload['jti']).exists():
+            return None
+        return payload
+
+    # two hops: orchestrator verifyToken/ -> Account token/verify/
+    def verify_remotely(self, token):
+        endpoint = "http://{}/verifyToken/".format(os.environ.get("ORCHESTRATOR_URL")) 
+        r = requests.post(endpoint, json={'token': token})
+        return r.status_code == 200
 
     def get_token(self, request):
         authorization_header = request.META.get('HTTP_AUTHORIZATION')
@@ -0,0 +1,25 @@
+import hashlib
+import uuid
+
+from .models import CacheVersion
+
+# Strong ETags for the list endpoints (used with django.views.decorators.http.condition).
+# The ETag hashes the request path and query string with the version of each
+# namespace the list is built from. The version is a row replaced by the model
+# signals (signals.py) in the transaction of the write. Computing the ETag is
+# one primary key lookup, so an If-None-Match hit returns 304 without loading
+# or serializing any rows.
+def versions(namespaces):
+    tokens = dict(CacheVersion.objects.filter(namespace__in=namespaces).values_list('namespace', 'token'))
+    return [tokens.get(namespace, '') for namespace in namespaces]
+
+def invalidate(*namespaces):
+    for namespace in namespaces:
+        CacheVersion.objects.update_or_create(namespace=namespace, defaults={'token': uuid.uuid4().hex})
+
+def list_etag(*namespaces):
+    def etag(request, *args, **kwargs):
+        parts = [request.get_full_path(), request.META.get('HTTP_ACCEPT', '')]
+        parts.extend(versions(namespaces))
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+    return etag
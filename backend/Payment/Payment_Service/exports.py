@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from datetime import date, datetime
+from decimal import Decimal
+import csv
+import io
+import json
+
+# Streaming table exports. Rows are read in chunks of EXPORT_CHUNK_SIZE through
+# a server-side cursor and written out as they arrive, so memory stays flat and
+# the header goes out before the first query finishes. Behind a transaction
+# pooler, where server-side cursors are disabled, rows are read in keyset pages
+# on the primary key instead.
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+# rows joined into one chunk of the response body
+ROWS_PER_WRITE = 100
+
+
+def read_rows(queryset, fields, chunk_size):
+    queryset = queryset.order_by('pk')
+    if not connections[queryset.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        yield from queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+        return
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(page.values_list('pk', *fields)[:chunk_size])
+        if not rows:
+            return
+        for row in rows:
+            yield row[1:]
+        last = rows[-1][0]
+
+def cell(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def csv_lines(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    for batch in batched(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([['' if v is None else cell(v) for v in row] for row in batch])
+        yield buffer.getvalue()
+
+def ndjson_lines(rows, fields):
+    for batch in batched(rows):
+        yield ''.join(json.dumps(dict(zip(fields, [cell(v) for v in row]))) + '\n' for row in batch)
+
+def batched(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == ROWS_PER_WRITE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def export_response(queryset, fields, fileFormat, filename):
+    rows = read_rows(queryset, fields, settings.EXPORT_CHUNK_SIZE)
+    lines = csv_lines(rows, fields) if fileFormat == 'csv' else ndjson_lines(rows, fields)
+    response = StreamingHttpResponse(lines, content_type=FORMATS[fileFormat])
+    response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(filename, fileFormat)
+    return response
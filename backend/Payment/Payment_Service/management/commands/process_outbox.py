@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+import signal
+
+from Payment_Service import outbox
+
+# Stripe webhook outbox worker. Several copies can run side by side; each
+# event is claimed by one of them only.
+class Command(BaseCommand):
+    help = 'Processes the Stripe webhook events queued in the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='exit once the outbox is drained')
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGTERM, lambda signum, frame: outbox.worker.stop())
+        try:
+            outbox.worker.run(once=options['once'])
+        except KeyboardInterrupt:
+            pass
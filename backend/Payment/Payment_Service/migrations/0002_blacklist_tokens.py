@@ -0,0 +1,34 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Payment_Service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlacklistedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'db_table': 'token_blacklist_blacklistedtoken',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OutstandingToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'db_table': 'token_blacklist_outstandingtoken',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Payment_Service', '0003_donation_updatedat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('eventID', models.CharField(max_length=100, unique=True)),
+                ('eventType', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('lastError', models.TextField(blank=True, null=True)),
+                ('sponsorUpdated', models.BooleanField(default=False)),
+                ('dogName', models.CharField(blank=True, max_length=100, null=True)),
+                ('emailSent', models.BooleanField(default=False)),
+                ('createdAt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('availableAt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processedAt', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'availableAt'], name='webhookevent_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Payment_Service', '0004_webhookevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='donation',
+            name='dogID',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
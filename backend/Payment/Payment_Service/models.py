@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 class CustomUser(AbstractUser):
@@ -6,6 +7,20 @@ class CustomUser(AbstractUser):
         managed = False
         db_table = 'Account_Service_CustomUser'
         
+class OutstandingToken(models.Model):
+    jti = models.CharField(unique=True, max_length=255)
+
+    class Meta:
+        managed = False
+        db_table = 'token_blacklist_outstandingtoken'
+
+class BlacklistedToken(models.Model):
+    token = models.OneToOneField(OutstandingToken, on_delete=models.CASCADE)
+
+    class Meta:
+        managed = False
+        db_table = 'token_blacklist_blacklistedtoken'
+
 class DogCategory(models.Model):
     class Meta:
         managed = False
@@ -20,11 +35,52 @@ class Walk(models.Model):
 
 class Donation(models.Model):
     paymentIntent = models.CharField(primary_key=True, max_length=100)
-    dogID = models.CharField(max_length=100)
+    dogID = models.CharField(max_length=100, db_index=True)
     checkoutSessionID = models.CharField(max_length=100, blank=True, null=True)
     customerEmail = models.CharField(max_length=100, blank=True, null=True)
     customerName = models.CharField(max_length=100, default='Anonymous')
     amountTotal = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     currency = models.CharField(max_length=100, blank=True, null=True)
     createdAt = models.DateTimeField(blank=True, null=True)
-    
\ No newline at end of file
+    updatedAt = models.DateTimeField(auto_now=True)
+    
+# Current version of the donation list ("donations"), replaced in the same
+# transaction as the writes that change it; the list ETag is built from it
+# (see etags.py)
+class CacheVersion(models.Model):
+    namespace = models.CharField(max_length=32, primary_key=True)
+    token = models.CharField(max_length=32)
+
+
+# Outbox of Stripe webhook events still to be acted on. The webhook only stores
+# the event, keyed on Stripe's event id so redelivered events are ignored, and
+# the process_outbox worker carries out its side effects (see outbox.py). The
+# step flags let a retried event skip the steps that already succeeded.
+class WebhookEvent(models.Model):
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    eventID = models.CharField(unique=True, max_length=100)
+    eventType = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    lastError = models.TextField(blank=True, null=True)
+    sponsorUpdated = models.BooleanField(default=False)
+    dogName = models.CharField(max_length=100, blank=True, null=True)
+    emailSent = models.BooleanField(default=False)
+    createdAt = models.DateTimeField(default=timezone.now)
+    availableAt = models.DateTimeField(default=timezone.now)
+    processedAt = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # the worker's queue: pending events due for a (re)try
+            models.Index(fields=['status', 'availableAt'], name='webhookevent_queue_idx'),
+        ]
\ No newline at end of file
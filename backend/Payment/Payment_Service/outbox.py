@@ -0,0 +1,201 @@
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Avg, F, Min
+from django.utils import timezone
+from datetime import datetime, timedelta
+import os
+import pytz
+import requests
+import time
+
+from .models import Donation, WebhookEvent
+
+# Worker side of the webhook outbox. Each event is claimed in a short
+# transaction with SELECT ... FOR UPDATE SKIP LOCKED, which leases it: its
+# availableAt moves OUTBOX_LEASE seconds ahead, so no other worker takes it
+# meanwhile, and a worker that dies mid-event only delays it until the lease
+# runs out. The handler's HTTP calls run outside any transaction, and the
+# outcome is written in a second one, only if the lease is still held. A failed
+# event is retried later with exponential backoff and marked failed after
+# OUTBOX_MAX_ATTEMPTS tries.
+
+ORCHESTRATOR_URL = os.environ.get('ORCHESTRATOR_URL')
+
+# keep-alive connections to the orchestrator across events
+session = requests.Session()
+
+
+### START OF EVENT HANDLERS ###
+
+
+def post(path, data):
+    response = session.post(
+        'http://{}{}'.format(ORCHESTRATOR_URL, path), json=data, timeout=settings.OUTBOX_HTTP_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()
+
+# if payment is successful, record the donation, update the sponsor for the dog
+# and send the email to the donater; each step is safe to repeat or skipped
+# once done. Handlers run outside any transaction, so a later failed step does
+# not undo an earlier write.
+def checkout_session_completed(event):
+    session_object = event.payload
+    customerEmail = session_object['customer_details']['email']
+    customerName = session_object['customer_details']['name']
+    paymentIntent = session_object['payment_intent']
+    amountTotal = session_object['amount_total']
+    currency = session_object['currency'].upper()
+    tz = pytz.timezone('Asia/Singapore')
+    createdAt = datetime.fromtimestamp(session_object['created'], tz=tz)
+    dogID = session_object['metadata']['dogID']
+    sponsorExpirationDate = createdAt + timedelta(days=30)
+
+    Donation.objects.get_or_create(
+        paymentIntent=paymentIntent,
+        defaults={
+            'dogID': dogID,
+            'checkoutSessionID': session_object['id'],
+            'customerEmail': customerEmail,
+            'customerName': customerName,
+            'amountTotal': amountTotal,
+            'currency': currency,
+            'createdAt': createdAt,
+        },
+    )
+
+    if not event.sponsorUpdated:
+        data = post('/updateDogSponsor/', {
+            'id': dogID,
+            'sponsorExpirationDate': sponsorExpirationDate.timestamp()
+        })
+        event.dogName = data['dog_name']
+        event.sponsorUpdated = True
+
+    if not event.emailSent:
+        post('/sendDonationEmail/', {
+            'paymentID': paymentIntent,
+            'recepient_email': customerEmail,
+            'recepient_name': customerName.split()[0],
+            'dog_name': event.dogName,
+            'amount_paid': '{} {}'.format('{:,.2f}'.format(amountTotal/100.0), currency)
+        })
+        event.emailSent = True
+
+HANDLERS = {
+    'checkout.session.completed': checkout_session_completed,
+}
+
+
+### END OF EVENT HANDLERS ###
+
+### START OF WORKER ###
+
+
+# lease the next due event and count the attempt; None if there is none
+def claim():
+    with transaction.atomic():
+        event = WebhookEvent.objects.select_for_update(skip_locked=True).filter(
+            status=WebhookEvent.PENDING, availableAt__lte=timezone.now(),
+        ).order_by('availableAt', 'id').first()
+        if event is None:
+            return None
+        event.attempts += 1
+        event.availableAt = timezone.now() + timedelta(seconds=settings.OUTBOX_LEASE)
+        event.save(update_fields=['attempts', 'availableAt'])
+        return event
+
+# write the outcome of the attempt, unless the lease ran out and another
+# worker took the event since; returns whether it was written
+def finish(event):
+    fields = ('status', 'lastError', 'availableAt', 'processedAt', 'sponsorUpdated', 'dogName', 'emailSent')
+    with transaction.atomic():
+        return WebhookEvent.objects.filter(
+            pk=event.pk, status=WebhookEvent.PENDING, attempts=event.attempts,
+        ).update(**{field: getattr(event, field) for field in fields}) == 1
+
+# claim and process the next due event; returns it, or None if there is none
+def process_next():
+    event = claim()
+    if event is None:
+        return None
+
+    try:
+        HANDLERS[event.eventType](event)
+    except Exception as e:
+        event.lastError = repr(e)
+        if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            event.status = WebhookEvent.FAILED
+        else:
+            delay = settings.OUTBOX_RETRY_DELAY * 2 ** (event.attempts - 1)
+            event.availableAt = timezone.now() + timedelta(seconds=delay)
+    else:
+        event.status = WebhookEvent.DONE
+        event.lastError = None
+    event.processedAt = timezone.now()
+    if not finish(event):
+        print('### process_outbox: lease of event {} expired before it was done ###'.format(event.eventID))
+    return event
+
+# process due events until none is left or `limit` were taken
+def drain(limit):
+    start = time.monotonic()
+    counts = {WebhookEvent.DONE: 0, WebhookEvent.PENDING: 0, WebhookEvent.FAILED: 0}
+    taken = 0
+    lagSeconds = None
+    while taken < limit:
+        event = process_next()
+        if event is None:
+            break
+        taken += 1
+        counts[event.status] += 1
+        lagSeconds = round((event.processedAt - event.createdAt).total_seconds(), 3)
+    if taken:
+        durationMs = round((time.monotonic() - start) * 1000, 1)
+        print('### process_outbox: {} done, {} to retry, {} failed in {} ms, lag {} s ###'.format(
+            counts[WebhookEvent.DONE], counts[WebhookEvent.PENDING], counts[WebhookEvent.FAILED], durationMs, lagSeconds))
+    return taken
+
+class OutboxWorker:
+    def __init__(self):
+        self.stopping = False
+
+    def run(self, once=False):
+        while not self.stopping:
+            # the worker outlives any request, so drop a connection the database closed
+            close_old_connections()
+            count = drain(settings.OUTBOX_BATCH_SIZE)
+            if once and count < settings.OUTBOX_BATCH_SIZE:
+                return
+            if count == 0:
+                time.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+    def stop(self):
+        self.stopping = True
+
+worker = OutboxWorker()
+
+
+### END OF WORKER ###
+
+### START OF METRICS ###
+
+
+# Outbox state shared by all workers, read from the table: queue size, lag of
+# the oldest pending event, throughput and average latency over the last minute
+def metrics():
+    now = timezone.now()
+    pending = WebhookEvent.objects.filter(status=WebhookEvent.PENDING)
+    oldest = pending.aggregate(oldest=Min('createdAt'))['oldest']
+    recent = WebhookEvent.objects.filter(status=WebhookEvent.DONE, processedAt__gte=now - timedelta(minutes=1))
+    latency = recent.aggregate(latency=Avg(F('processedAt') - F('createdAt')))['latency']
+    return {
+        'pending': pending.count(),
+        'failed': WebhookEvent.objects.filter(status=WebhookEvent.FAILED).count(),
+        'lagSeconds': round((now - oldest).total_seconds(), 3) if oldest else 0,
+        'processedLastMinute': recent.count(),
+        'avgLatencySeconds': round(latency.total_seconds(), 3) if latency else None,
+    }
+
+
+### END OF METRICS ###
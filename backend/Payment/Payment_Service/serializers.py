@@ -5,4 +5,4 @@ from .models import Donation
 class DonationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Donation
-        fields = '__all__'
\ No newline at end of file
+        exclude = ['updatedAt']
\ No newline at end of file
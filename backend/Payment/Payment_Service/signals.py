@@ -1,2 +1,8 @@
 def initial_web_app_group(sender, **kwargs):
     pass
+
+
+# a new version of the donation list for its ETag (etags.py)
+def replace_donation_version(sender, **kwargs):
+    from .etags import invalidate
+    invalidate('donations')
@@ -0,0 +1,19 @@
+from django.apps import apps
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+# The user, token and cross-service tables belong to other services, so the
+# test database is built straight from the models (managed or not) instead of
+# from the migrations, which assume those tables already exist.
+class UnmanagedModelTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.MIGRATION_MODULES = {app.label: None for app in apps.get_app_configs()}
+        self.unmanaged_models = [m for m in apps.get_models() if not m._meta.managed]
+        for model in self.unmanaged_models:
+            model._meta.managed = True
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        for model in self.unmanaged_models:
+            model._meta.managed = False
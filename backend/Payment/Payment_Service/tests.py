@@ -1,3 +1,361 @@
-from django.test import TestCase
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from datetime import timedelta
+from unittest import mock
+import csv
+import io
+import json
+import jwt
+import requests
+import time
+import uuid
 
-# Create your tests here.
+from . import exports, outbox
+from .auth.auth import CustomJWTAuthentication
+from .auth.cache import VerifiedTokenCache, token_cache
+from .models import BlacklistedToken, Donation, OutstandingToken, WebhookEvent
+
+# Access tokens are verified in-process like Account's SIMPLE_JWT does, and the
+# Account service (through the orchestrator) is only asked when that cannot be
+# done: no signing key, or the blacklist could not be read.
+SIGNING_KEY = 'k' * 32
+
+def make_token(key=SIGNING_KEY, lifetime=600, **claims):
+    payload = {'token_type': 'access', 'exp': int(time.time()) + lifetime, 'jti': uuid.uuid4().hex}
+    payload.update(claims)
+    payload = {name: value for name, value in payload.items() if value is not None}
+    return jwt.encode(payload, key, algorithm='HS256')
+
+def blacklist(jti):
+    BlacklistedToken.objects.create(token=OutstandingToken.objects.create(jti=jti))
+
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class LocalTokenVerificationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        remote = mock.patch.object(CustomJWTAuthentication, 'verify_remotely', return_value=False)
+        self.verify_remotely = remote.start()
+        self.addCleanup(remote.stop)
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer {}'.format(token))
+        return CustomJWTAuthentication().authenticate(request)
+
+    def assertRejected(self, token):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+        self.verify_remotely.assert_not_called()
+
+    def test_valid_token_is_accepted_without_remote_call(self):
+        token = make_token()
+        self.assertEqual(self.authenticate(token), (None, token))
+        self.verify_remotely.assert_not_called()
+
+    def test_expired_token_is_rejected(self):
+        self.assertRejected(make_token(lifetime=-1))
+
+    def test_token_without_exp_or_jti_is_rejected(self):
+        self.assertRejected(make_token(exp=None))
+        self.assertRejected(make_token(jti=None))
+
+    def test_refresh_token_is_rejected(self):
+        self.assertRejected(make_token(token_type='refresh'))
+
+    def test_bad_signature_is_rejected(self):
+        self.assertRejected(make_token(key='x' * 32))
+
+    def test_blacklisted_token_is_rejected(self):
+        jti = uuid.uuid4().hex
+        blacklist(jti)
+        self.assertRejected(make_token(jti=jti))
+
+    @override_settings(JWT_SIGNING_KEY=None)
+    def test_without_signing_key_account_decides(self):
+        token = make_token()
+        self.verify_remotely.return_value = True
+        self.assertEqual(self.authenticate(token), (None, token))
+        self.verify_remotely.assert_called_once_with(token)
+
+        self.verify_remotely.return_value = False
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(make_token())
+
+    def test_unreadable_blacklist_falls_back_to_account(self):
+        token = make_token()
+        self.verify_remotely.return_value = True
+        with mock.patch.object(BlacklistedToken.objects, 'filter', side_effect=DatabaseError):
+            self.assertEqual(self.authenticate(token), (None, token))
+        self.verify_remotely.assert_called_once_with(token)
+
+# The verified-token cache keeps the most recently used tokens, each until the
+# TTL or its exp, whichever comes first, and drops blacklisted ones on the
+# next blacklist poll.
+class VerifiedTokenCacheTests(TestCase):
+    def setUp(self):
+        self.now = 1000000.0
+        clock = mock.patch(VerifiedTokenCache.__module__ + '.time')
+        self.clock = clock.start()
+        self.clock.time.return_value = self.now
+        self.addCleanup(clock.stop)
+
+    def tick(self, seconds):
+        self.clock.time.return_value += seconds
+
+    def payload(self, lifetime=600):
+        return {'exp': self.now + lifetime, 'jti': uuid.uuid4().hex}
+
+    def test_least_recently_used_token_is_evicted(self):
+        cache = VerifiedTokenCache(max_size=2, ttl=60, blacklist_interval=60)
+        cache.add('a', self.payload())
+        cache.add('b', self.payload())
+        self.assertTrue(cache.get('a'))
+        cache.add('c', self.payload())
+        self.assertTrue(cache.get('a'))
+        self.assertTrue(cache.get('c'))
+        self.assertFalse(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_entry_expires_after_ttl(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=60, blacklist_interval=600)
+        cache.add('a', self.payload(lifetime=600))
+        self.tick(59)
+        self.assertTrue(cache.get('a'))
+        self.tick(2)
+        self.assertFalse(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_entry_never_outlives_token_exp(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=300, blacklist_interval=600)
+        cache.add('a', self.payload(lifetime=30))
+        cache.add('expired', self.payload(lifetime=-1))
+        self.assertEqual(cache.stats()['size'], 1)
+        self.tick(29)
+        self.assertTrue(cache.get('a'))
+        self.tick(2)
+        self.assertFalse(cache.get('a'))
+
+    def test_blacklisted_token_is_evicted_on_next_poll(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=300, blacklist_interval=5)
+        payload = self.payload()
+        cache.add('a', payload)
+        self.assertTrue(cache.get('a'))
+        blacklist(payload['jti'])
+        # still accepted until the next poll of the blacklist
+        self.assertTrue(cache.get('a'))
+        self.tick(5)
+        self.assertFalse(cache.get('a'))
+
+# The list ETag is built from the version row of the donation list, which every
+# write replaces, so revalidating reads no donations.
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class DonationListETagTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        Donation.objects.create(paymentIntent='pi_1', dogID='1', amountTotal=10)
+
+    def etag(self):
+        response = self.client.get('/api/payment/')
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_unchanged_list_is_revalidated_with_one_query(self):
+        etag = self.etag()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/payment/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('Payment_Service_cacheversion', queries[0]['sql'])
+
+    def test_writes_change_the_etag(self):
+        etags = [self.etag()]
+        donation = Donation.objects.create(paymentIntent='pi_2', dogID='2', amountTotal=5)
+        etags.append(self.etag())
+        donation.customerName = 'Sam'
+        donation.save()
+        etags.append(self.etag())
+        donation.delete()
+        etags.append(self.etag())
+        self.assertEqual(len(set(etags)), 4)
+
+# The export streams every donation ordered by payment intent, in chunks of
+# EXPORT_CHUNK_SIZE rows: through a server-side cursor, or in keyset pages on
+# the primary key where server-side cursors are disabled (transaction pooler).
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY, EXPORT_CHUNK_SIZE=10)
+class PaymentExportTests(TestCase):
+    fields = [field.attname for field in Donation._meta.concrete_fields]
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        for i in reversed(range(25)):
+            Donation.objects.create(paymentIntent='pi_{:02d}'.format(i), dogID=str(i % 3), amountTotal='12.50', customerName='Donor {}'.format(i))
+        self.intents = ['pi_{:02d}'.format(i) for i in range(25)]
+
+    def export(self, **params):
+        response = self.client.get('/api/payment/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, [chunk.decode() for chunk in response.streaming_content]
+
+    def assertCSV(self, chunks):
+        rows = list(csv.reader(io.StringIO(''.join(chunks))))
+        self.assertEqual(rows[0], self.fields)
+        self.assertEqual([row[0] for row in rows[1:]], self.intents)
+        self.assertEqual(rows[1][self.fields.index('amountTotal')], '12.50')
+
+    def test_csv_streams_every_chunk_in_order(self):
+        with mock.patch.object(exports, 'ROWS_PER_WRITE', 4):
+            response, chunks = self.export()
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="payments.csv"')
+        self.assertEqual(len(chunks), 1 + 7)
+        self.assertCSV(chunks)
+
+    def test_ndjson(self):
+        response, chunks = self.export(fileFormat='ndjson')
+        lines = [json.loads(line) for line in ''.join(chunks).splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([line['paymentIntent'] for line in lines], self.intents)
+        self.assertEqual(lines[0]['customerName'], 'Donor 0')
+
+    def test_keyset_pages_without_server_side_cursors(self):
+        with mock.patch.dict(connection.settings_dict, {'DISABLE_SERVER_SIDE_CURSORS': True}):
+            with CaptureQueriesContext(connection) as queries:
+                response, chunks = self.export()
+        pages = [query['sql'] for query in queries if 'FROM "Payment_Service_donation"' in query['sql']]
+        self.assertEqual(len(pages), 4)
+        self.assertTrue(all('LIMIT 10' in sql for sql in pages))
+        self.assertCSV(chunks)
+
+# Stripe events are queued once however often they are delivered, and the
+# outbox worker carries them out outside the transaction claiming them,
+# retrying a failing event with exponential backoff.
+def checkout_event(eventID='evt_1', eventType='checkout.session.completed'):
+    return {
+        'id': eventID,
+        'type': eventType,
+        'data': {'object': {
+            'id': 'cs_1',
+            'payment_intent': 'pi_1',
+            'customer_details': {'email': 'ann@example.com', 'name': 'Ann Lee'},
+            'amount_total': 2500,
+            'currency': 'sgd',
+            'created': 1700000000,
+            'metadata': {'dogID': '7'},
+        }},
+    }
+
+def queue_event(eventID='evt_1'):
+    return WebhookEvent.objects.create(
+        eventID=eventID, eventType='checkout.session.completed', payload=checkout_event(eventID)['data']['object'],
+    )
+
+class StripeWebhookTests(TestCase):
+    def deliver(self, event):
+        with mock.patch('stripe.Webhook.construct_event', return_value=event):
+            return APIClient().post(
+                '/api/payment/webhook/', json.dumps(event), content_type='application/json', HTTP_STRIPE_SIGNATURE='t=1,v1=x',
+            )
+
+    def test_redelivered_event_is_queued_once(self):
+        self.assertEqual(self.deliver(checkout_event()).status_code, 200)
+        self.assertEqual(self.deliver(checkout_event()).status_code, 200)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+        self.assertEqual(WebhookEvent.objects.get().payload['payment_intent'], 'pi_1')
+
+    def test_unhandled_event_type_is_not_queued(self):
+        self.assertEqual(self.deliver(checkout_event(eventType='payment_intent.created')).status_code, 200)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+@override_settings(OUTBOX_RETRY_DELAY=10, OUTBOX_MAX_ATTEMPTS=3, OUTBOX_LEASE=60)
+class OutboxWorkerTests(TestCase):
+    def setUp(self):
+        post = mock.patch.object(outbox, 'post')
+        self.post = post.start()
+        self.addCleanup(post.stop)
+
+    def make_due(self, event):
+        WebhookEvent.objects.filter(pk=event.pk).update(availableAt=timezone.now())
+
+    def test_event_is_done_once_every_step_succeeded(self):
+        queue_event()
+        self.post.return_value = {'dog_name': 'Rex'}
+        event = outbox.process_next()
+        self.assertEqual(event.status, WebhookEvent.DONE)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts, event.dogName), (WebhookEvent.DONE, 1, 'Rex'))
+        self.assertTrue(event.sponsorUpdated and event.emailSent)
+        self.assertEqual(Donation.objects.get().dogID, '7')
+        self.assertIsNone(outbox.process_next())
+
+    def test_failed_event_is_retried_with_backoff(self):
+        event = queue_event()
+        self.post.side_effect = requests.ConnectionError()
+        for attempt, delay in ((1, 10), (2, 20)):
+            before = timezone.now()
+            outbox.process_next()
+            event.refresh_from_db()
+            self.assertEqual((event.status, event.attempts), (WebhookEvent.PENDING, attempt))
+            self.assertGreaterEqual(event.availableAt, before + timedelta(seconds=delay))
+            self.assertLess(event.availableAt, before + timedelta(seconds=delay + 5))
+            # not due again before its delay
+            self.assertIsNone(outbox.process_next())
+            self.make_due(event)
+
+        outbox.process_next()
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), (WebhookEvent.FAILED, 3))
+        self.assertIn('ConnectionError', event.lastError)
+        self.assertEqual(Donation.objects.count(), 1)
+
+    def test_retry_skips_the_steps_already_done(self):
+        event = queue_event()
+        self.post.side_effect = [{'dog_name': 'Rex'}, requests.ConnectionError()]
+        outbox.process_next()
+        event.refresh_from_db()
+        self.assertTrue(event.sponsorUpdated)
+        self.assertFalse(event.emailSent)
+
+        self.make_due(event)
+        self.post.side_effect = None
+        self.post.return_value = {}
+        outbox.process_next()
+        event.refresh_from_db()
+        self.assertEqual(event.status, WebhookEvent.DONE)
+        self.assertEqual(self.post.call_args.args[0], '/sendDonationEmail/')
+        self.assertEqual(self.post.call_args.args[1]['dog_name'], 'Rex')
+
+    def test_leased_event_is_not_taken_twice(self):
+        queue_event()
+        first = outbox.claim()
+        self.assertIsNotNone(first)
+        self.assertIsNone(outbox.claim())
+
+        # the lease ran out and another worker took the event over
+        self.make_due(first)
+        second = outbox.claim()
+        self.assertEqual(second.attempts, 2)
+        first.status = WebhookEvent.DONE
+        self.assertFalse(outbox.finish(first))
+        second.status = WebhookEvent.DONE
+        self.assertTrue(outbox.finish(second))
+
+class OutboxTransactionTests(TransactionTestCase):
+    def test_http_calls_run_outside_the_claiming_transaction(self):
+        queue_event()
+        in_transaction = []
+
+        def post(path, data):
+            in_transaction.append(connection.in_atomic_block)
+            return {'dog_name': 'Rex'}
+
+        with mock.patch.object(outbox, 'post', side_effect=post):
+            event = outbox.process_next()
+        self.assertEqual(event.status, WebhookEvent.DONE)
+        self.assertEqual(in_transaction, [False, False])
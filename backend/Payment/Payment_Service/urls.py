@@ -8,7 +8,12 @@ urlpatterns = [
     path('webhook/', StripeWebhookView.as_view()),
     ### END OF STRIPE-RELATED URLS ###
     
+    ### START OF METRICS URLS ###
+    path('metrics/', views.MetricsAPIView.as_view()),
+    ### END OF METRICS URLS ###
+    
     ### START OF ADMIN CRUD PAYMENTS URLS ###
+    path('export/', views.PaymentExportAPIView.as_view()),
     path('<str:pk>/delete/', views.PaymentDestroyAPIView.as_view()),
     path('<str:pk>/', views.PaymentDetailAPIView.as_view()),
     path('', views.PaymentListAPIView.as_view()),
@@ -1,23 +1,25 @@
 import stripe
-import pytz
+import json
 from dotenv import load_dotenv
 import os
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from datetime import datetime, timedelta
-import requests
 from rest_framework import generics
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
 from .auth.auth import CustomJWTAuthentication
 from rest_framework.permissions import AllowAny
 
-from .models import Donation
+from .models import Donation, WebhookEvent
 from . serializers import DonationSerializer
+from .etags import list_etag
+from .exports import FORMATS, export_response
+from . import outbox
 
 load_dotenv()
 
-ORCHESTRATOR_URL = os.environ.get('ORCHESTRATOR_URL')
 stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
 
 # handles stripe checkout process
@@ -49,7 +51,7 @@ class StripeCheckoutView(APIView):
             return Response({'error': 'Stripe Checkout API failed!'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # webhook that listens in real-time to stripe events
-## -> if payment is successful (checkout-session-completed), send email to donater and update sponsor for dog
+## -> if payment is successful (checkout-session-completed), queue the event to send email to donater and update sponsor for dog
 ### NOTE if webhook is running on stripe-side, and server is deployed, dev-cloud webhook view will conflict
 class StripeWebhookView(APIView):
     authentication_classes = []
@@ -68,47 +70,16 @@ class StripeWebhookView(APIView):
         except:
             return Response({'error': 'Stripe Webhook error!'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        if event['type'] == 'checkout.session.completed':
-            
-            checkoutSessionID = event['data']['object']['id']
-            customerEmail = event['data']['object']['customer_details']['email']
-            customerName = event['data']['object']['customer_details']['name']
-            paymentIntent = event['data']['object']['payment_intent']
-            amountTotal = event['data']['object']["amount_total"]
-            currency = event['data']['object']["currency"].upper()
-            timestamp = event['data']['object']['created']
-            tz = pytz.timezone('Asia/Singapore')
-            createdAt = datetime.fromtimestamp(timestamp, tz=tz)
-            dogID = event['data']['object']['metadata']['dogID']
-            sponsorExpirationDate = createdAt + timedelta(days=30) 
-
-            Donation.objects.create(
-                dogID=dogID,
-                checkoutSessionID=checkoutSessionID,
-                customerEmail=customerEmail,
-                customerName=customerName,
-                paymentIntent=paymentIntent,
-                amountTotal=amountTotal,
-                currency=currency,
-                createdAt=createdAt,
-            ) 
-            
-            data = {
-                'id': dogID,
-                'sponsorExpirationDate': sponsorExpirationDate.timestamp()
-            }
-            response = requests.post('http://{}/updateDogSponsor/'.format(ORCHESTRATOR_URL), json=data)
-            data = response.json()
-            dogName = data["dog_name"] 
-
-            data = {
-                'paymentID': paymentIntent,
-                'recepient_email': customerEmail,
-                'recepient_name': customerName.split()[0],
-                "dog_name": dogName,
-                "amount_paid": "{} {}".format('{:,.2f}'.format(amountTotal/100.0), currency)
-            }
-            response = requests.post('http://{}/sendDonationEmail/'.format(ORCHESTRATOR_URL), json=data)
+        # store the event and answer at once; the process_outbox worker acts on
+        # it, and a redelivery of the same event is ignored
+        if event['type'] in outbox.HANDLERS:
+            WebhookEvent.objects.get_or_create(
+                eventID=event['id'],
+                defaults={
+                    'eventType': event['type'],
+                    'payload': json.loads(payload)['data']['object'],
+                },
+            )
         return Response(status=status.HTTP_200_OK)
 
 # Get a payment object given its primary key
@@ -120,7 +91,9 @@ class PaymentDetailAPIView(generics.RetrieveAPIView):
     serializer_class = DonationSerializer
     lookup_field = 'pk'
 
-# Get ALL payment objects 
+# Get ALL payment objects, or only those of the given dogs (?dogID=, repeatable)
+# answers If-None-Match with 304 while the donation table is unchanged
+@method_decorator(condition(etag_func=list_etag('donations')), name='get')
 class PaymentListAPIView(generics.ListAPIView):
     authentication_classes = (CustomJWTAuthentication, )
     permission_classes = (AllowAny,)
@@ -128,6 +101,25 @@ class PaymentListAPIView(generics.ListAPIView):
     queryset = Donation.objects.all()
     serializer_class = DonationSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        dogIDs = self.request.query_params.getlist('dogID')
+        if dogIDs:
+            queryset = queryset.filter(dogID__in=dogIDs)
+        return queryset
+
+# Stream ALL payment objects as CSV (default) or NDJSON (?fileFormat=ndjson)
+class PaymentExportAPIView(APIView):
+    authentication_classes = (CustomJWTAuthentication, )
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        fileFormat = request.query_params.get('fileFormat', 'csv')
+        if fileFormat not in FORMATS:
+            return Response({'error': 'fileFormat must be csv or ndjson!'}, status=status.HTTP_400_BAD_REQUEST)
+        fields = [field.attname for field in Donation._meta.concrete_fields]
+        return export_response(Donation.objects.all(), fields, fileFormat, 'payments')
+
 # Delete payment object given its primary key
 class PaymentDestroyAPIView(generics.DestroyAPIView):
     authentication_classes = (CustomJWTAuthentication, )
@@ -138,4 +130,22 @@ class PaymentDestroyAPIView(generics.DestroyAPIView):
     lookup_field = 'pk'
     
     def perform_destroy(self, instance):
-        super().perform_destroy(instance)
\ No newline at end of file
+        super().perform_destroy(instance)
+
+
+### START OF METRICS VIEWS ###
+
+
+# Webhook outbox queue, throughput and lag, read from the table the
+# process_outbox workers write to
+class MetricsAPIView(APIView):
+    authentication_classes = []
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        return Response({
+            'outbox': outbox.metrics(),
+        }, status=status.HTTP_200_OK)
+
+
+### END OF METRICS VIEWS ###
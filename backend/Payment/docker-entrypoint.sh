@@ -1,9 +1,33 @@
 #!/bin/sh
 
-echo "###   Applying Database Migrations for Payment Service   ###"
-python manage.py makemigrations
-python manage.py migrate
+# "docker-entrypoint.sh migrate" is the one-off migration job; app containers
+# only check that the schema is current and refuse to start otherwise.
+# The job only migrates Payment_Service: the Django apps' tables are shared by all
+# services and applied by the account-migrate job, which runs last
+# (admin's migration must come after every service's user model migration).
+if [ "$1" = "migrate" ]; then
+    echo "###   Applying Database Migrations for Payment Service   ###"
+    exec python manage.py migrate Payment_Service --noinput
+fi
+
+export BOOT_STARTED_AT=$(python -c "import time; print(time.time())")
+
+echo "###   Checking Database Migrations for Payment Service   ###"
+if ! python manage.py migrate --check; then
+    echo "###   Unapplied migrations, run the migrate jobs first   ###"
+    exit 1
+fi
+
+# "docker-entrypoint.sh process_outbox" runs the webhook outbox worker
+if [ "$1" = "process_outbox" ]; then
+    echo "###   Starting Payment Service Outbox Worker   ###"
+    exec python manage.py process_outbox
+fi
 
 echo "###   Starting Payment Service Server   ###"
-python manage.py runserver 0.0.0.0:8002
+if [ "$SERVER_MODE" = "development" ]; then
+    python manage.py runserver 0.0.0.0:8002
+else
+    exec gunicorn -c gunicorn.conf.py Payment.wsgi:application
+fi
 
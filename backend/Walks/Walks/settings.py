@@ -27,6 +27,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     "corsheaders.middleware.CorsMiddleware",
+    'Walks_Service.deadline.DeadlineMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,6 +56,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Walks.wsgi.application'
 
+# Connections are kept open for SQL_CONN_MAX_AGE seconds (0 closes them after
+# every request) and checked before reuse. When SQL_HOST points at a pooler
+# such as PgBouncer in transaction mode, set SQL_POOLER=transaction: server-side
+# cursors cannot span the pooler's transactions.
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -63,6 +68,9 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD"),
         "HOST": os.environ.get("SQL_HOST"),
         "PORT": os.environ.get("SQL_PORT"),
+        "CONN_MAX_AGE": int(os.environ.get("SQL_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.environ.get("SQL_CONN_HEALTH_CHECKS", "true") == "true",
+        "DISABLE_SERVER_SIDE_CURSORS": os.environ.get("SQL_POOLER") == "transaction",
     }
 }
 
@@ -95,4 +103,26 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
 
-AUTH_USER_MODEL = "Walks_Service.CustomUser"
\ No newline at end of file
+AUTH_USER_MODEL = "Walks_Service.CustomUser"
+
+TEST_RUNNER = "Walks_Service.test_runner.UnmanagedModelTestRunner"
+
+# Token verification used by CustomJWTAuthentication. In "local" mode tokens are
+# checked in-process with the same key and algorithm as Account's SIMPLE_JWT
+# (JWT_SIGNING_KEY must be the Account service's SECRET_KEY); without a signing
+# key, or in "remote" mode, the orchestrator's verifyToken/ is asked instead.
+JWT_VERIFICATION = os.environ.get("JWT_VERIFICATION", "local")
+JWT_SIGNING_KEY = os.environ.get("JWT_SIGNING_KEY")
+JWT_ALGORITHM = "HS256"
+JWT_LEEWAY = 0
+
+# Verified-token cache in CustomJWTAuthentication (JWT_CACHE_SIZE=0 disables it).
+# Entries never outlive the token's exp; blacklisted tokens are evicted within
+# JWT_CACHE_BLACKLIST_INTERVAL seconds. Logging out blacklists the refresh token
+# only, so its access token is accepted until exp either way (see auth/cache.py).
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE", 1024))
+JWT_CACHE_TTL = int(os.environ.get("JWT_CACHE_TTL", 300))
+JWT_CACHE_BLACKLIST_INTERVAL = int(os.environ.get("JWT_CACHE_BLACKLIST_INTERVAL", 5))
+
+# Rows read per round trip by the streaming CSV/NDJSON exports
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, pre_save, post_save, post_delete
 
 class WalksServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -7,4 +7,12 @@ class WalksServiceConfig(AppConfig):
 
     def ready(self):
         from .signals import initial_web_app_group
-        post_migrate.connect(initial_web_app_group, sender=self)
\ No newline at end of file
+        post_migrate.connect(initial_web_app_group, sender=self)
+
+        from .models import Walk
+        from .signals import remember_walk_buckets, refresh_walk_rollups, replace_walk_version
+        pre_save.connect(remember_walk_buckets, sender=Walk)
+        post_save.connect(refresh_walk_rollups, sender=Walk)
+        post_delete.connect(refresh_walk_rollups, sender=Walk)
+        post_save.connect(replace_walk_version, sender=Walk)
+        post_delete.connect(replace_walk_version, sender=Walk)
\ No newline at end of file
@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.db import DatabaseError
+import hashlib
+import threading
+import time
+
+from ..models import BlacklistedToken
+
+# Bounded LRU cache of access tokens that already passed verification, keyed by
+# a hash of the token. An entry lives at most JWT_CACHE_TTL seconds and never
+# past the token's own exp. Tokens blacklisted by the Account service are
+# evicted by polling the shared blacklist table every JWT_CACHE_BLACKLIST_INTERVAL seconds.
+#
+# Revocation window: SimpleJWT blacklists refresh tokens (on logout and
+# rotation), never the access tokens issued with them, so an access token stays
+# valid until its exp (Account's ACCESS_TOKEN_LIFETIME) after a logout, cached
+# or not; Account's own token/verify/ accepts it too. The cache adds nothing to
+# that: entries end at the token's exp, and an access token whose jti is
+# blacklisted is still accepted for at most JWT_CACHE_BLACKLIST_INTERVAL seconds.
+class VerifiedTokenCache:
+    def __init__(self, max_size, ttl, blacklist_interval):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.blacklist_interval = blacklist_interval
+        self.entries = OrderedDict()
+        self.keys_by_jti = {}
+        self.lock = threading.Lock()
+        self.last_blacklisted_id = None
+        self.last_blacklist_check = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        if self.max_size <= 0:
+            return False
+        self.refresh_blacklist()
+        key = self.key(token)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+    def add(self, token, payload):
+        exp = payload.get('exp')
+        jti = payload.get('jti')
+        if self.max_size <= 0 or not exp or not jti:
+            return
+        now = time.time()
+        # the token's remaining lifetime, capped at the TTL
+        lifetime = min(self.ttl, exp - now)
+        if lifetime <= 0:
+            return
+        expires_at = now + lifetime
+        key = self.key(token)
+        with self.lock:
+            self.entries[key] = (expires_at, jti)
+            self.entries.move_to_end(key)
+            self.keys_by_jti[jti] = key
+            while len(self.entries) > self.max_size:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    # invalidation hook, drops the cached token carrying the given jti
+    def invalidate(self, jti):
+        with self.lock:
+            key = self.keys_by_jti.get(jti)
+            if key is not None:
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_jti.clear()
+
+    def refresh_blacklist(self):
+        now = time.time()
+        if now - self.last_blacklist_check < self.blacklist_interval:
+            return
+        self.last_blacklist_check = now
+        try:
+            if self.last_blacklisted_id is None:
+                latest = BlacklistedToken.objects.order_by('-id').values_list('id', flat=True).first()
+                self.last_blacklisted_id = latest or 0
+                return
+            blacklisted = BlacklistedToken.objects.filter(
+                id__gt=self.last_blacklisted_id
+            ).order_by('id').values_list('id', 'token__jti')
+            for id, jti in blacklisted:
+                self.invalidate(jti)
+                self.last_blacklisted_id = id
+        except DatabaseError:
+            # cached entries still expire on their own, try again next interval
+            pass
+
+    def stats(self):
+        with self.lock:
+            size = len(self.entries)
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key):
+        expires_at, jti = self.entries.pop(key)
+        if self.keys_by_jti.get(jti) == key:
+            del self.keys_by_jti[jti]
+
+
+token_cache = VerifiedTokenCache(
+    settings.JWT_CACHE_SIZE,
+    settings.JWT_CACHE_TTL,
+    settings.JWT_CACHE_BLACKLIST_INTERVAL,
+)
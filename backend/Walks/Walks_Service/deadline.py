@@ -0,0 +1,50 @@
+from django.db import connections
+from django.http import JsonResponse
+from contextlib import ExitStack
+import math
+import time
+
+# Honours the X-Request-Budget header (milliseconds left) sent by the
+# orchestrator: a request whose caller has already given up is answered 504
+# straight away, and one running past its deadline stops before its next
+# database query instead of finishing work nobody will read. The budget is
+# turned into a deadline on this container's monotonic clock when the request
+# arrives, so it does not depend on the orchestrator's clock.
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def expired():
+    return JsonResponse({'error': 'Request deadline exceeded!'}, status=504)
+
+class DeadlineMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            budget = float(request.headers['X-Request-Budget']) / 1000
+        except (KeyError, ValueError):
+            return self.get_response(request)
+        if math.isnan(budget):
+            return self.get_response(request)
+        if budget <= 0:
+            return expired()
+        deadline = time.monotonic() + budget
+
+        def check(execute, sql, params, many, context):
+            if time.monotonic() >= deadline:
+                raise DeadlineExceeded()
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(check))
+            return self.get_response(request)
+
+    # raised from the view, so the transaction it was in is rolled back
+    def process_exception(self, request, exception):
+        if isinstance(exception, DeadlineExceeded):
+            return expired()
+        return None
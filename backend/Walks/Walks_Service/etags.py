@@ -0,0 +1,31 @@
+import hashlib
+import uuid
+
+from .models import CacheVersion, DogCacheVersion
+
+# Strong ETags for the list endpoints (used with django.views.decorators.http.condition).
+# The ETag hashes the request path and query string with the version of each
+# namespace the list is built from. The version is a row replaced by the model
+# signals (signals.py), and by the views writing with bulk_create() or
+# bulk_update(), which send none, in the transaction of the write. Computing
+# the ETag is one primary key lookup, so an If-None-Match hit returns 304
+# without loading or serializing any rows. Versions of the Dogs service lists
+# (dog_namespaces: "dogs", "categories") are read in the same query, for lists
+# carrying dog names; they never share a name with the ones above.
+def versions(namespaces, dog_namespaces=()):
+    rows = CacheVersion.objects.filter(namespace__in=namespaces).values_list('namespace', 'token')
+    if dog_namespaces:
+        rows = rows.union(DogCacheVersion.objects.filter(namespace__in=dog_namespaces).values_list('namespace', 'token'))
+    tokens = dict(rows)
+    return [tokens.get(namespace, '') for namespace in list(namespaces) + list(dog_namespaces)]
+
+def invalidate(*namespaces):
+    for namespace in namespaces:
+        CacheVersion.objects.update_or_create(namespace=namespace, defaults={'token': uuid.uuid4().hex})
+
+def list_etag(*namespaces, dog_namespaces=()):
+    def etag(request, *args, **kwargs):
+        parts = [request.get_full_path(), request.META.get('HTTP_ACCEPT', '')]
+        parts.extend(versions(namespaces, dog_namespaces))
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+    return etag
@@ -0,0 +1,81 @@
+from rest_framework.filters import BaseFilterBackend
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from .models import Dog
+
+# Server-side filters for the walk record list, all optional:
+#   dogID          - dog id, repeat for records of any of several dogs
+#   dogName        - case-insensitive prefix of the dog's name
+#   handler        - case-insensitive substring of the handler's name
+#   createdAfter   - records created at or after this date/datetime (ISO 8601)
+#   createdBefore  - records created before this datetime, or up to the end of this date
+#   min<Score>/max<Score> - bounds on poopScore, reactivityScore or sensitivityScore,
+#                    e.g. minPoopScore=2.5&maxReactivityScore=3
+class WalkFilterBackend(BaseFilterBackend):
+    scores = ('poopScore', 'reactivityScore', 'sensitivityScore')
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        dog_ids = [i for i in params.getlist('dogID') if i.isdigit()]
+        if dog_ids:
+            queryset = queryset.filter(dogID__in=dog_ids)
+
+        dog_name = params.get('dogName')
+        if dog_name:
+            queryset = queryset.filter(dogID__in=Dog.objects.filter(name__istartswith=dog_name).values('id'))
+
+        handler = params.get('handler')
+        if handler:
+            queryset = queryset.filter(handler__icontains=handler)
+
+        created_after = self.parse_moment(params.get('createdAfter'), end_of_day=False)
+        if created_after:
+            queryset = queryset.filter(createdAt__gte=created_after)
+        created_before = self.parse_moment(params.get('createdBefore'), end_of_day=True)
+        if created_before:
+            queryset = queryset.filter(createdAt__lt=created_before)
+
+        for score in self.scores:
+            suffix = score[0].upper() + score[1:]
+            minimum = self.parse_decimal(params.get('min' + suffix))
+            if minimum is not None:
+                queryset = queryset.filter(**{score + '__gte': minimum})
+            maximum = self.parse_decimal(params.get('max' + suffix))
+            if maximum is not None:
+                queryset = queryset.filter(**{score + '__lte': maximum})
+
+        return queryset
+
+    # a bare date means the start of that day, or the start of the next day for
+    # an upper bound, in the service's time zone (parse_datetime would read it
+    # as midnight, so it is tried as a date first)
+    def parse_moment(self, value, end_of_day):
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+            if day is not None:
+                if end_of_day:
+                    day += timedelta(days=1)
+                moment = datetime.combine(day, time.min)
+            else:
+                moment = parse_datetime(value)
+                if moment is None:
+                    return None
+        except ValueError:
+            return None
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def parse_decimal(self, value):
+        if not value:
+            return None
+        try:
+            return Decimal(value)
+        except InvalidOperation:
+            return None
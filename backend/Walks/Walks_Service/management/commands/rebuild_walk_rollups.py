@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from Walks_Service import rollups
+
+# Recomputes the walk score rollups from the walk records, e.g. after the
+# rollup table is first created or after walks were changed in bulk.
+class Command(BaseCommand):
+    help = 'Rebuilds the per-dog walk score rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dog', type=int, action='append', dest='dogIDs', help='only rebuild this dog (repeatable)')
+
+    def handle(self, *args, **options):
+        created = rollups.rebuild(options['dogIDs'])
+        self.stdout.write('Rebuilt {} walk score rollups'.format(created))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Walks_Service', '0003_blacklist_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='walk',
+            name='updatedAt',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
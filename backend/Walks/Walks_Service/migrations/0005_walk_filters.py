@@ -0,0 +1,41 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+# createdAt was nullable, and the AlterField below would stamp every record
+# still without one with the time of this migration. They get the createdAt
+# of the closest earlier record by id instead, the earliest they can have been
+# created, or of the closest later record when there is no earlier one; their
+# updatedAt only when no record has a createdAt at all.
+def backfill_created_at(apps, schema_editor):
+    Walk = apps.get_model('Walks_Service', 'Walk')
+    for walk in Walk.objects.filter(createdAt__isnull=True).order_by('id'):
+        dated = Walk.objects.filter(createdAt__isnull=False)
+        neighbour = dated.filter(id__lt=walk.id).order_by('-id').first() or dated.filter(id__gt=walk.id).order_by('id').first()
+        Walk.objects.filter(id=walk.id).update(createdAt=neighbour.createdAt if neighbour else walk.updatedAt)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Walks_Service', '0004_walk_updatedat'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='walk',
+            name='createdAt',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='walk',
+            index=models.Index(fields=['dogID', 'createdAt'], name='walk_dogid_createdat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='walk',
+            index=models.Index(fields=['createdAt', 'id'], name='walk_createdat_id_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:51
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Trunc
+
+
+# fill the rollups of the walks recorded so far, as rollups.rebuild() does
+def build_rollups(apps, schema_editor):
+    Walk = apps.get_model('Walks_Service', 'Walk')
+    WalkScoreRollup = apps.get_model('Walks_Service', 'WalkScoreRollup')
+    scores = ('poopScore', 'reactivityScore', 'sensitivityScore')
+    aggregates = {'walkCount': Count('id')}
+    for score in scores:
+        aggregates[score + 'Sum'] = Sum(score)
+        aggregates[score + 'Count'] = Count(score)
+        aggregates[score + 'Min'] = Min(score)
+        aggregates[score + 'Max'] = Max(score)
+
+    for period in ('day', 'week', 'month'):
+        rows = Walk.objects.order_by().annotate(
+            bucket=Trunc('createdAt', period, output_field=models.DateField()),
+        ).values('dogID', 'bucket').annotate(**aggregates)
+        objs = []
+        for row in rows:
+            for score in scores:
+                row[score + 'Sum'] = row[score + 'Sum'] or 0
+            objs.append(WalkScoreRollup(period=period, **row))
+        WalkScoreRollup.objects.bulk_create(objs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Walks_Service', '0005_walk_filters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalkScoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dogID', models.IntegerField()),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('bucket', models.DateField()),
+                ('walkCount', models.IntegerField(default=0)),
+                ('poopScoreSum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('poopScoreCount', models.IntegerField(default=0)),
+                ('poopScoreMin', models.DecimalField(blank=True, decimal_places=1, max_digits=2, null=True)),
+                ('poopScoreMax', models.DecimalField(blank=True, decimal_places=1, max_digits=2, null=True)),
+                ('reactivityScoreSum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('reactivityScoreCount', models.IntegerField(default=0)),
+                ('reactivityScoreMin', models.DecimalField(blank=True, decimal_places=1, max_digits=2, null=True)),
+                ('reactivityScoreMax', models.DecimalField(blank=True, decimal_places=1, max_digits=2, null=True)),
+                ('sensitivityScoreSum', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('sensitivityScoreCount', models.IntegerField(default=0)),
+                ('sensitivityScoreMin', models.DecimalField(blank=True, decimal_places=1, max_digits=2, null=True)),
+                ('sensitivityScoreMax', models.DecimalField(blank=True, decimal_places=1, max_digits=2, null=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='walkscorerollup',
+            constraint=models.UniqueConstraint(fields=('dogID', 'period', 'bucket'), name='walkrollup_dog_period_bucket_uniq'),
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
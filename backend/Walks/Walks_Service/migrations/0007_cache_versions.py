@@ -0,0 +1,28 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:10
+
+from django.db import migrations, models
+import uuid
+
+
+# a fresh version, so no ETag handed out before the table existed matches
+def create_versions(apps, schema_editor):
+    CacheVersion = apps.get_model('Walks_Service', 'CacheVersion')
+    CacheVersion.objects.create(namespace='walks', token=uuid.uuid4().hex)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Walks_Service', '0006_walkscorerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('namespace', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('token', models.CharField(max_length=32)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Walks_Service', '0007_cache_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DogCacheVersion',
+            fields=[
+                ('namespace', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('token', models.CharField(max_length=32)),
+            ],
+            options={
+                'db_table': 'Dogs_Service_cacheversion',
+                'managed': False,
+            },
+        ),
+        migrations.AlterModelTable(
+            name='dog',
+            table='Dogs_Service_dog',
+        ),
+    ]
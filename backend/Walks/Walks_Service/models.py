@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 class CustomUser(AbstractUser):
@@ -6,13 +7,42 @@ class CustomUser(AbstractUser):
         managed = False
         db_table = 'Account_Service_CustomUser'
         
+class OutstandingToken(models.Model):
+    jti = models.CharField(unique=True, max_length=255)
+
+    class Meta:
+        managed = False
+        db_table = 'token_blacklist_outstandingtoken'
+
+class BlacklistedToken(models.Model):
+    token = models.OneToOneField(OutstandingToken, on_delete=models.CASCADE)
+
+    class Meta:
+        managed = False
+        db_table = 'token_blacklist_blacklistedtoken'
+
 class DogCategory(models.Model):
     class Meta:
         managed = False
 
+# The dogs of the Dogs service, read for the dog name filter and the dog
+# names shown with walk records
 class Dog(models.Model):
+    name = models.CharField(max_length=50)
+
     class Meta:
         managed = False
+        db_table = 'Dogs_Service_dog'
+
+# Versions of the Dogs service lists; the walk list ETag includes the "dogs"
+# version since the list carries dog names
+class DogCacheVersion(models.Model):
+    namespace = models.CharField(max_length=32, primary_key=True)
+    token = models.CharField(max_length=32)
+
+    class Meta:
+        managed = False
+        db_table = 'Dogs_Service_cacheversion'
 
 class Donation(models.Model):
     class Meta:
@@ -31,4 +61,52 @@ class Walk(models.Model):
     poopScore = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
     reactivityScore = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
     sensitivityScore = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
-    createdAt = models.DateTimeField(blank=True, null=True)
\ No newline at end of file
+    createdAt = models.DateTimeField(default=timezone.now)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # records of a dog, newest first
+            models.Index(fields=['dogID', 'createdAt'], name='walk_dogid_createdat_idx'),
+            # keyset pagination of the whole list
+            models.Index(fields=['createdAt', 'id'], name='walk_createdat_id_idx'),
+        ]
+
+# Per-dog score rollups of walk records by day, week or month, kept up to date
+# from the Walk signals (see rollups.py) so analytics read one row per bucket.
+# bucket is the first day of the period in the service's time zone, weeks
+# start on Monday. Each score keeps the sum and count of its non-null values.
+class WalkScoreRollup(models.Model):
+    PERIODS = (
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    )
+
+    dogID = models.IntegerField()
+    period = models.CharField(max_length=5, choices=PERIODS)
+    bucket = models.DateField()
+    walkCount = models.IntegerField(default=0)
+    poopScoreSum = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    poopScoreCount = models.IntegerField(default=0)
+    poopScoreMin = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
+    poopScoreMax = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
+    reactivityScoreSum = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    reactivityScoreCount = models.IntegerField(default=0)
+    reactivityScoreMin = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
+    reactivityScoreMax = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
+    sensitivityScoreSum = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    sensitivityScoreCount = models.IntegerField(default=0)
+    sensitivityScoreMin = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
+    sensitivityScoreMax = models.DecimalField(max_digits=2, decimal_places=1, blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dogID', 'period', 'bucket'], name='walkrollup_dog_period_bucket_uniq'),
+        ]
+
+# Current version of the walk list ("walks"), replaced in the same transaction
+# as the writes that change it; the list ETag is built from it (see etags.py)
+class CacheVersion(models.Model):
+    namespace = models.CharField(max_length=32, primary_key=True)
+    token = models.CharField(max_length=32)
@@ -0,0 +1,216 @@
+from django.db import connection, transaction
+from django.db.models import Count, DateField, Max, Min, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from collections import deque
+from datetime import date, datetime, time, timedelta
+import threading
+
+from .models import Walk, WalkScoreRollup
+
+# Incremental maintenance of WalkScoreRollup. A walk belongs to one bucket per
+# period; when it is created, changed or deleted only those buckets (and, on a
+# change of dog or date, the ones it left) are recomputed from their walks.
+# Queryset .update() and bulk_create() bypass the model signals, so code using
+# them calls refresh() itself; `manage.py rebuild_walk_rollups` recomputes all.
+
+PERIODS = tuple(period for period, label in WalkScoreRollup.PERIODS)
+SCORES = ('poopScore', 'reactivityScore', 'sensitivityScore')
+ROLLUP_FIELDS = ['walkCount'] + [score + suffix for score in SCORES for suffix in ('Sum', 'Count', 'Min', 'Max')]
+
+
+def aggregates():
+    values = {'walkCount': Count('id')}
+    for score in SCORES:
+        values[score + 'Sum'] = Sum(score)
+        values[score + 'Count'] = Count(score)
+        values[score + 'Min'] = Min(score)
+        values[score + 'Max'] = Max(score)
+    return values
+
+def rollup_fields(values):
+    fields = {'walkCount': values['walkCount']}
+    for score in SCORES:
+        fields[score + 'Sum'] = values[score + 'Sum'] or 0
+        fields[score + 'Count'] = values[score + 'Count']
+        fields[score + 'Min'] = values[score + 'Min']
+        fields[score + 'Max'] = values[score + 'Max']
+    return fields
+
+# rollup rows of the given walks for one period, one grouped query
+def grouped(walks, period):
+    rows = walks.order_by().annotate(
+        bucket=Trunc('createdAt', period, output_field=DateField()),
+    ).values('dogID', 'bucket').annotate(**aggregates())
+    return [
+        WalkScoreRollup(dogID=row['dogID'], period=period, bucket=row['bucket'], **rollup_fields(row))
+        for row in rows
+    ]
+
+
+### START OF BUCKET ARITHMETIC ###
+
+
+def bucket_of(day, period):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+# the bucket `count` periods after (or before, when negative) the given one
+def shift_bucket(bucket, period, count):
+    if period == 'day':
+        return bucket + timedelta(days=count)
+    if period == 'week':
+        return bucket + timedelta(weeks=count)
+    month = bucket.year * 12 + bucket.month - 1 + count
+    return date(month // 12, month % 12 + 1, 1)
+
+def bucket_bounds(bucket, period):
+    start = timezone.make_aware(datetime.combine(bucket, time.min))
+    end = timezone.make_aware(datetime.combine(shift_bucket(bucket, period, 1), time.min))
+    return start, end
+
+def bucket_keys(dogID, createdAt):
+    if dogID is None or createdAt is None:
+        return set()
+    day = timezone.localtime(createdAt).date()
+    return {(int(dogID), period, bucket_of(day, period)) for period in PERIODS}
+
+
+### END OF BUCKET ARITHMETIC ###
+
+### START OF ROLLUP MAINTENANCE ###
+
+
+# Refreshes of the same dog's rollups run one at a time: each holds the dog's
+# transaction-level advisory lock from before it reads the walks until its
+# writes commit, so a refresh that read the walks earlier can never overwrite
+# the rollups of one that read them later. Locks are taken in dogID order, so
+# two refreshes sharing several dogs cannot deadlock.
+LOCK_CLASS = 0x57414c4b
+
+def lock_dogs(dogIDs):
+    with connection.cursor() as cursor:
+        for dogID in sorted(dogIDs):
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [LOCK_CLASS, dogID])
+
+# Recompute the given (dogID, period, bucket) rollups from their walks: per
+# period, one grouped query over the dogs and dates involved, one upsert of the
+# non-empty buckets and one delete of the buckets left without walks.
+def refresh(keys):
+    if not keys:
+        return
+    with transaction.atomic():
+        lock_dogs({dogID for dogID, period, bucket in keys})
+        for period in PERIODS:
+            refresh_period(keys, period)
+
+# the rollups of one period of refresh()
+def refresh_period(keys, period):
+    buckets = {(dogID, bucket) for dogID, p, bucket in keys if p == period}
+    if not buckets:
+        return
+    start = bucket_bounds(min(bucket for dogID, bucket in buckets), period)[0]
+    end = bucket_bounds(max(bucket for dogID, bucket in buckets), period)[1]
+    walks = Walk.objects.filter(
+        dogID__in={dogID for dogID, bucket in buckets}, createdAt__gte=start, createdAt__lt=end,
+    )
+    objs = [obj for obj in grouped(walks, period) if (obj.dogID, obj.bucket) in buckets]
+    WalkScoreRollup.objects.bulk_create(
+        objs,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['dogID', 'period', 'bucket'],
+        update_fields=ROLLUP_FIELDS,
+    )
+
+    empty = buckets - {(obj.dogID, obj.bucket) for obj in objs}
+    if empty:
+        condition = Q()
+        for dogID, bucket in empty:
+            condition |= Q(dogID=dogID, bucket=bucket)
+        WalkScoreRollup.objects.filter(condition, period=period).delete()
+
+# Refresh once the surrounding transaction commits, so the walks are visible.
+# Keys queued by the walks of one transaction are merged and every bucket is
+# recomputed once, by whichever of its on_commit callbacks runs first. Keys
+# left over from a rolled back transaction are refreshed with the next one,
+# which is harmless as a refresh only re-reads the walks.
+pending = threading.local()
+
+def refresh_on_commit(keys):
+    if keys:
+        pending.keys = getattr(pending, 'keys', set()) | keys
+        transaction.on_commit(refresh_pending)
+
+def refresh_pending():
+    keys = getattr(pending, 'keys', set())
+    pending.keys = set()
+    refresh(keys)
+
+# recompute every rollup, or only those of the given dogs, one grouped query per period
+def rebuild(dogIDs=None):
+    walks = Walk.objects.all()
+    rollups = WalkScoreRollup.objects.all()
+    if dogIDs:
+        walks = walks.filter(dogID__in=dogIDs)
+        rollups = rollups.filter(dogID__in=dogIDs)
+
+    created = 0
+    with transaction.atomic():
+        if dogIDs:
+            lock_dogs(dogIDs)
+        rollups.delete()
+        for period in PERIODS:
+            objs = grouped(walks, period)
+            WalkScoreRollup.objects.bulk_create(objs, batch_size=1000)
+            created += len(objs)
+    return created
+
+
+### END OF ROLLUP MAINTENANCE ###
+
+### START OF ANALYTICS ###
+
+
+def average(total, count):
+    return round(float(total) / count, 2) if count else None
+
+# Per-dog series from rollup rows ordered by dogID and bucket. Each score gets
+# its count, average, min and max in the bucket, and a trend: the average over
+# the `window` periods ending with the bucket. Rows before `start` only feed
+# the trend of the first buckets.
+def summarize(rows, period, window, start=None):
+    dogs = []
+    current = None
+    for row in rows:
+        if current is None or current['dogID'] != row.dogID:
+            current = {'dogID': row.dogID, 'buckets': []}
+            dogs.append(current)
+            recent = deque()
+        recent.append(row)
+        oldest = shift_bucket(row.bucket, period, -(window - 1))
+        while recent[0].bucket < oldest:
+            recent.popleft()
+        if start is not None and row.bucket < start:
+            continue
+
+        bucket = {'bucket': row.bucket, 'walkCount': row.walkCount}
+        for score in SCORES:
+            count = getattr(row, score + 'Count')
+            trend_sum = sum(getattr(r, score + 'Sum') for r in recent)
+            trend_count = sum(getattr(r, score + 'Count') for r in recent)
+            bucket[score] = {
+                'count': count,
+                'avg': average(getattr(row, score + 'Sum'), count),
+                'min': getattr(row, score + 'Min'),
+                'max': getattr(row, score + 'Max'),
+                'trend': average(trend_sum, trend_count),
+            }
+        current['buckets'].append(bucket)
+    return [dog for dog in dogs if dog['buckets']]
+
+
+### END OF ANALYTICS ###
@@ -5,6 +5,10 @@ from .models import Walk
 class WalkSerializer(serializers.ModelSerializer):    
     class Meta:
         model = Walk
-        fields = '__all__'
+        exclude = ['updatedAt']
+
+# Walk records of the list, with the name of their dog (see WalkListCreateAPIView)
+class WalkListSerializer(WalkSerializer):
+    dogName = serializers.CharField(read_only=True)
         
         
\ No newline at end of file
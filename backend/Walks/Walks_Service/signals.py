@@ -1,2 +1,23 @@
 def initial_web_app_group(sender, **kwargs):
-    pass
\ No newline at end of file
+    pass
+
+
+# Keep the walk score rollups in step with the walk records. An update first
+# remembers the buckets the walk is leaving, in case its dog or date changes.
+def remember_walk_buckets(sender, instance, **kwargs):
+    from .rollups import bucket_keys
+    instance._rollup_keys = set()
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values('dogID', 'createdAt').first()
+        if previous:
+            instance._rollup_keys = bucket_keys(previous['dogID'], previous['createdAt'])
+
+def refresh_walk_rollups(sender, instance, **kwargs):
+    from .rollups import bucket_keys, refresh_on_commit
+    keys = getattr(instance, '_rollup_keys', set()) | bucket_keys(instance.dogID, instance.createdAt)
+    refresh_on_commit(keys)
+
+# a new version of the walk list for its ETag (etags.py)
+def replace_walk_version(sender, **kwargs):
+    from .etags import invalidate
+    invalidate('walks')
@@ -1,3 +1,566 @@
-from django.test import TestCase
+from django.db import DatabaseError, connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from datetime import datetime, timedelta
+from unittest import mock
+from urllib.parse import urlencode
+import base64
+import csv
+import io
+import json
+import jwt
+import threading
+import time
+import uuid
 
-# Create your tests here.
+from . import exports, rollups
+from .auth.auth import CustomJWTAuthentication
+from .auth.cache import VerifiedTokenCache, token_cache
+from .models import BlacklistedToken, Dog, DogCacheVersion, OutstandingToken, Walk, WalkScoreRollup
+
+# Access tokens are verified in-process like Account's SIMPLE_JWT does, and the
+# Account service (through the orchestrator) is only asked when that cannot be
+# done: no signing key, or the blacklist could not be read.
+SIGNING_KEY = 'k' * 32
+
+def make_token(key=SIGNING_KEY, lifetime=600, **claims):
+    payload = {'token_type': 'access', 'exp': int(time.time()) + lifetime, 'jti': uuid.uuid4().hex}
+    payload.update(claims)
+    payload = {name: value for name, value in payload.items() if value is not None}
+    return jwt.encode(payload, key, algorithm='HS256')
+
+def blacklist(jti):
+    BlacklistedToken.objects.create(token=OutstandingToken.objects.create(jti=jti))
+
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class LocalTokenVerificationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        remote = mock.patch.object(CustomJWTAuthentication, 'verify_remotely', return_value=False)
+        self.verify_remotely = remote.start()
+        self.addCleanup(remote.stop)
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer {}'.format(token))
+        return CustomJWTAuthentication().authenticate(request)
+
+    def assertRejected(self, token):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+        self.verify_remotely.assert_not_called()
+
+    def test_valid_token_is_accepted_without_remote_call(self):
+        token = make_token()
+        self.assertEqual(self.authenticate(token), (None, token))
+        self.verify_remotely.assert_not_called()
+
+    def test_expired_token_is_rejected(self):
+        self.assertRejected(make_token(lifetime=-1))
+
+    def test_token_without_exp_or_jti_is_rejected(self):
+        self.assertRejected(make_token(exp=None))
+        self.assertRejected(make_token(jti=None))
+
+    def test_refresh_token_is_rejected(self):
+        self.assertRejected(make_token(token_type='refresh'))
+
+    def test_bad_signature_is_rejected(self):
+        self.assertRejected(make_token(key='x' * 32))
+
+    def test_blacklisted_token_is_rejected(self):
+        jti = uuid.uuid4().hex
+        blacklist(jti)
+        self.assertRejected(make_token(jti=jti))
+
+    @override_settings(JWT_SIGNING_KEY=None)
+    def test_without_signing_key_account_decides(self):
+        token = make_token()
+        self.verify_remotely.return_value = True
+        self.assertEqual(self.authenticate(token), (None, token))
+        self.verify_remotely.assert_called_once_with(token)
+
+        self.verify_remotely.return_value = False
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(make_token())
+
+    def test_unreadable_blacklist_falls_back_to_account(self):
+        token = make_token()
+        self.verify_remotely.return_value = True
+        with mock.patch.object(BlacklistedToken.objects, 'filter', side_effect=DatabaseError):
+            self.assertEqual(self.authenticate(token), (None, token))
+        self.verify_remotely.assert_called_once_with(token)
+
+# The verified-token cache keeps the most recently used tokens, each until the
+# TTL or its exp, whichever comes first, and drops blacklisted ones on the
+# next blacklist poll.
+class VerifiedTokenCacheTests(TestCase):
+    def setUp(self):
+        self.now = 1000000.0
+        clock = mock.patch(VerifiedTokenCache.__module__ + '.time')
+        self.clock = clock.start()
+        self.clock.time.return_value = self.now
+        self.addCleanup(clock.stop)
+
+    def tick(self, seconds):
+        self.clock.time.return_value += seconds
+
+    def payload(self, lifetime=600):
+        return {'exp': self.now + lifetime, 'jti': uuid.uuid4().hex}
+
+    def test_least_recently_used_token_is_evicted(self):
+        cache = VerifiedTokenCache(max_size=2, ttl=60, blacklist_interval=60)
+        cache.add('a', self.payload())
+        cache.add('b', self.payload())
+        self.assertTrue(cache.get('a'))
+        cache.add('c', self.payload())
+        self.assertTrue(cache.get('a'))
+        self.assertTrue(cache.get('c'))
+        self.assertFalse(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_entry_expires_after_ttl(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=60, blacklist_interval=600)
+        cache.add('a', self.payload(lifetime=600))
+        self.tick(59)
+        self.assertTrue(cache.get('a'))
+        self.tick(2)
+        self.assertFalse(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_entry_never_outlives_token_exp(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=300, blacklist_interval=600)
+        cache.add('a', self.payload(lifetime=30))
+        cache.add('expired', self.payload(lifetime=-1))
+        self.assertEqual(cache.stats()['size'], 1)
+        self.tick(29)
+        self.assertTrue(cache.get('a'))
+        self.tick(2)
+        self.assertFalse(cache.get('a'))
+
+    def test_blacklisted_token_is_evicted_on_next_poll(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=300, blacklist_interval=5)
+        payload = self.payload()
+        cache.add('a', payload)
+        self.assertTrue(cache.get('a'))
+        blacklist(payload['jti'])
+        # still accepted until the next poll of the blacklist
+        self.assertTrue(cache.get('a'))
+        self.tick(5)
+        self.assertFalse(cache.get('a'))
+
+# The rollups always equal a rebuild from the walks, whichever way the walks
+# are written: one record at a time (model signals) or through the bulk
+# endpoints (refreshed by the views).
+def rollup_row(obj):
+    return tuple([obj.dogID, obj.period, obj.bucket] + [getattr(obj, field) for field in rollups.ROLLUP_FIELDS])
+
+class RollupTestMixin:
+    def assertRollupsFresh(self):
+        expected = [
+            rollup_row(obj) for period in rollups.PERIODS for obj in rollups.grouped(Walk.objects.all(), period)
+        ]
+        actual = [rollup_row(obj) for obj in WalkScoreRollup.objects.all()]
+        self.assertEqual(sorted(actual), sorted(expected))
+
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class WalkRollupTests(RollupTestMixin, TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        self.now = timezone.now()
+
+    def test_single_writes_keep_rollups_fresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            walk = Walk.objects.create(dogID=1, poopScore=2, createdAt=self.now)
+            Walk.objects.create(dogID=1, poopScore=4, reactivityScore=1, createdAt=self.now)
+            Walk.objects.create(dogID=2, sensitivityScore=3, createdAt=self.now - timedelta(days=40))
+        self.assertRollupsFresh()
+        self.assertEqual(WalkScoreRollup.objects.get(dogID=1, period='day').walkCount, 2)
+
+        # moving a walk to another dog and month refreshes the buckets it left too
+        walk.dogID = 2
+        walk.createdAt = self.now - timedelta(days=40)
+        walk.poopScore = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            walk.save()
+        self.assertRollupsFresh()
+        self.assertEqual(WalkScoreRollup.objects.get(dogID=1, period='day').walkCount, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Walk.objects.filter(dogID=1).delete()
+        self.assertRollupsFresh()
+        self.assertFalse(WalkScoreRollup.objects.filter(dogID=1).exists())
+
+    def test_bulk_writes_keep_rollups_fresh(self):
+        items = [
+            {'dogID': 1, 'poopScore': '2.0', 'createdAt': self.now.isoformat()},
+            {'dogID': 1, 'poopScore': '3.5', 'createdAt': (self.now - timedelta(days=8)).isoformat()},
+            {'dogID': 2, 'reactivityScore': '1.0', 'createdAt': self.now.isoformat()},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/walks/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertRollupsFresh()
+        ids = [walk['id'] for walk in response.json()]
+
+        updates = [
+            {'id': ids[0], 'poopScore': '4.0'},
+            {'id': ids[1], 'dogID': 2, 'createdAt': (self.now - timedelta(days=60)).isoformat()},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put('/api/walks/bulk/update/', updates, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertRollupsFresh()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/walks/bulk/delete/', {'ids': ids[:2]}, format='json')
+        self.assertEqual(response.json(), {'deleted': 2})
+        self.assertRollupsFresh()
+        self.assertEqual(WalkScoreRollup.objects.filter(dogID=1).count(), 0)
+
+# A refresh holds the dog's lock while it reads and writes, so it sees the
+# walks of a transaction still holding that lock only once it has committed,
+# instead of writing rollups a later refresh would have to correct.
+class WalkRollupLockTests(RollupTestMixin, TransactionTestCase):
+    def test_refresh_waits_for_the_dog_lock(self):
+        createdAt = timezone.now()
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    rollups.lock_dogs([1])
+                    # bulk_create sends no signals, so nothing else refreshes
+                    Walk.objects.bulk_create([Walk(dogID=1, poopScore=2, createdAt=createdAt)])
+                    locked.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        def refresh():
+            try:
+                rollups.refresh(rollups.bucket_keys(1, createdAt))
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        self.assertTrue(locked.wait(5))
+        refresher = threading.Thread(target=refresh)
+        refresher.start()
+        refresher.join(0.5)
+        self.assertTrue(refresher.is_alive())
+        release.set()
+        holder.join(5)
+        refresher.join(5)
+        self.assertRollupsFresh()
+        self.assertEqual(WalkScoreRollup.objects.get(dogID=1, period='day').walkCount, 1)
+
+# A bulk request is all or nothing: one invalid item, or one unknown id, and
+# nothing is written, with the errors of each item reported at its index.
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class WalkBulkTests(RollupTestMixin, TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        self.now = timezone.now().isoformat()
+
+    def test_create_with_invalid_item_writes_nothing(self):
+        items = [
+            {'dogID': 1, 'poopScore': '2.0', 'createdAt': self.now},
+            {'dogID': 'rex', 'poopScore': '20'},
+            {'dogID': 2, 'createdAt': self.now},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/walks/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(errors[0], {})
+        self.assertEqual(set(errors[1]), {'dogID', 'poopScore'})
+        self.assertEqual(errors[2], {})
+        self.assertFalse(Walk.objects.exists())
+        self.assertFalse(WalkScoreRollup.objects.exists())
+
+    def test_batch_size_is_limited(self):
+        for items in ([], [{'dogID': 1}] * 501, {'dogID': 1}):
+            response = self.client.post('/api/walks/bulk/', items, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': 'Expected a list of 1 to 500 items!'})
+        self.assertFalse(Walk.objects.exists())
+
+        # bulk_create sends no signals, the view refreshes the rollups itself
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/walks/bulk/', [{'dogID': 1, 'createdAt': self.now}] * 500, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Walk.objects.count(), 500)
+        self.assertEqual(WalkScoreRollup.objects.get(dogID=1, period='day').walkCount, 500)
+        self.assertRollupsFresh()
+
+    def test_update_with_unknown_or_invalid_item_writes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            walks = [Walk.objects.create(dogID=1, poopScore=2) for i in range(2)]
+        updates = [
+            {'id': walks[0].id, 'poopScore': '4.0'},
+            {'id': walks[1].id, 'reactivityScore': 'high'},
+            {'id': walks[1].id + 1000, 'poopScore': '1.0'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put('/api/walks/bulk/update/', updates, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(errors[0], {})
+        self.assertEqual(list(errors[1]), ['reactivityScore'])
+        self.assertEqual(errors[2], {'id': ['Walk record does not exist!']})
+        walks[0].refresh_from_db()
+        self.assertEqual(walks[0].poopScore, 2)
+        self.assertRollupsFresh()
+
+    def test_delete_with_unknown_id_deletes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            walk = Walk.objects.create(dogID=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/walks/bulk/delete/', {'ids': [walk.id, walk.id + 1000]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [{}, {'id': ['Walk record does not exist!']}])
+        self.assertTrue(Walk.objects.filter(id=walk.id).exists())
+        self.assertRollupsFresh()
+
+# The list ETag is built from the version row of the walk list, which every
+# write replaces, the bulk ones included, so revalidating reads no walks.
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class WalkListETagTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        Walk.objects.create(dogID=1)
+
+    def etag(self):
+        response = self.client.get('/api/walks/')
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_unchanged_list_is_revalidated_with_one_query(self):
+        etag = self.etag()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/walks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('Walks_Service_cacheversion', queries[0]['sql'])
+
+    def test_writes_change_the_etag(self):
+        etags = [self.etag()]
+        walk = Walk.objects.create(dogID=2)
+        etags.append(self.etag())
+        walk.poopScore = 3
+        walk.save()
+        etags.append(self.etag())
+        self.client.post('/api/walks/bulk/', [{'dogID': 3}], format='json')
+        etags.append(self.etag())
+        self.client.put('/api/walks/bulk/update/', [{'id': walk.id, 'poopScore': '4.0'}], format='json')
+        etags.append(self.etag())
+        self.client.post('/api/walks/bulk/delete/', {'ids': [walk.id]}, format='json')
+        etags.append(self.etag())
+        self.assertEqual(len(set(etags)), 6)
+
+    def test_etag_depends_on_the_query(self):
+        self.assertNotEqual(self.etag(), self.client.get('/api/walks/?dogID=1')['ETag'])
+
+    def test_dog_writes_change_the_etag(self):
+        etag = self.etag()
+        DogCacheVersion.objects.create(namespace='dogs', token=uuid.uuid4().hex)
+        self.assertNotEqual(self.etag(), etag)
+
+# Dog names come from the Dogs table: the list filters on them and shows them,
+# so the client never downloads the dogs to search or label records.
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class WalkDogNameTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        self.rex = Dog.objects.create(name='Rex')
+        self.rocky = Dog.objects.create(name='rocky')
+        self.max = Dog.objects.create(name='Max')
+        for dog in (self.rex, self.rocky, self.max):
+            Walk.objects.create(dogID=dog.id)
+        Walk.objects.create(dogID=self.max.id + 100)
+
+    def list(self, query=''):
+        response = self.client.get('/api/walks/' + query)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_records_carry_their_dog_name(self):
+        names = {walk['dogID']: walk['dogName'] for walk in self.list()}
+        self.assertEqual(names, {self.rex.id: 'Rex', self.rocky.id: 'rocky', self.max.id: 'Max', self.max.id + 100: None})
+
+    def test_dog_name_is_a_case_insensitive_prefix(self):
+        self.assertEqual({walk['dogName'] for walk in self.list('?dogName=r')}, {'Rex', 'rocky'})
+        self.assertEqual({walk['dogName'] for walk in self.list('?dogName=MA&pageSize=10')['results']}, {'Max'})
+        self.assertEqual(self.list('?dogName=ex'), [])
+
+    def test_detail_and_writes_have_no_dog_name(self):
+        walk = Walk.objects.get(dogID=self.rex.id)
+        detail = self.client.get('/api/walks/{}/'.format(walk.id)).json()
+        self.assertNotIn('dogName', detail)
+        self.assertNotIn('updatedAt', detail)
+        response = self.client.post('/api/walks/', {'dogID': self.rex.id})
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('dogName', response.json())
+
+# The list filters run in the database; each narrows the list on its own.
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class WalkFilterTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        day = timezone.make_aware(datetime(2024, 3, 10, 12))
+        self.first = Walk.objects.create(dogID=1, handler='Alice Tan', createdAt=day - timedelta(days=2), poopScore=2)
+        self.second = Walk.objects.create(dogID=2, handler='Bob Lim', createdAt=day - timedelta(days=1), reactivityScore=4)
+        self.third = Walk.objects.create(dogID=1, handler='alicia', createdAt=day, poopScore=4)
+        self.fourth = Walk.objects.create(dogID=3, handler=None, createdAt=day + timedelta(hours=13), sensitivityScore='1.5')
+
+    def ids(self, **params):
+        response = self.client.get('/api/walks/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(walk['id'] for walk in response.json())
+
+    def expect(self, *walks):
+        return sorted(walk.id for walk in walks)
+
+    def test_dog_ids_match_any_and_ignore_invalid_ids(self):
+        self.assertEqual(self.ids(dogID=1), self.expect(self.first, self.third))
+        self.assertEqual(self.ids(dogID=[2, 3]), self.expect(self.second, self.fourth))
+        self.assertEqual(self.ids(dogID='rex'), self.expect(self.first, self.second, self.third, self.fourth))
+
+    def test_handler_is_a_case_insensitive_substring(self):
+        self.assertEqual(self.ids(handler='ALIC'), self.expect(self.first, self.third))
+        self.assertEqual(self.ids(handler='lim'), self.expect(self.second))
+
+    def test_dates_bound_whole_days(self):
+        self.assertEqual(self.ids(createdAfter='2024-03-09'), self.expect(self.second, self.third, self.fourth))
+        self.assertEqual(self.ids(createdBefore='2024-03-09'), self.expect(self.first, self.second))
+        self.assertEqual(self.ids(createdAfter='2024-03-09', createdBefore='2024-03-10'), self.expect(self.second, self.third))
+
+    def test_datetimes_bound_exactly(self):
+        self.assertEqual(self.ids(createdAfter=self.third.createdAt.isoformat()), self.expect(self.third, self.fourth))
+        self.assertEqual(self.ids(createdBefore=self.third.createdAt.isoformat()), self.expect(self.first, self.second))
+        self.assertEqual(len(self.ids(createdAfter='March 9th')), 4)
+
+    def test_score_bounds(self):
+        self.assertEqual(self.ids(minPoopScore=3), self.expect(self.third))
+        self.assertEqual(self.ids(maxPoopScore='2.0'), self.expect(self.first))
+        self.assertEqual(self.ids(minReactivityScore=1, maxSensitivityScore=5), [])
+        self.assertEqual(self.ids(maxSensitivityScore='1.5'), self.expect(self.fourth))
+        self.assertEqual(len(self.ids(minPoopScore='high')), 4)
+
+# Cursors page the list newest first without repeating or skipping a record,
+# even across records created at the same moment: the position is the
+# creation time and the id.
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY)
+class WalkCursorTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        now = timezone.now()
+        for minutes in (0, 5, 5, 5, 5, 10, 10):
+            Walk.objects.create(dogID=1, createdAt=now - timedelta(minutes=minutes))
+
+    def page(self, cursor=None, **params):
+        params['pageSize'] = 2
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get('/api/walks/', params)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return [walk['id'] for walk in body['results']], body
+
+    def test_pages_cover_ties_once_newest_first(self):
+        ids, body = self.page()
+        pages = [ids]
+        while body['next']:
+            ids, body = self.page(body['next'])
+            pages.append(ids)
+        self.assertEqual([len(ids) for ids in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), list(Walk.objects.order_by('-createdAt', '-id').values_list('id', flat=True)))
+
+        backwards = []
+        while body['previous']:
+            ids, body = self.page(body['previous'])
+            backwards.insert(0, ids)
+        self.assertEqual(backwards, pages[:-1])
+
+    def test_filters_apply_to_every_page(self):
+        Walk.objects.filter(id__in=Walk.objects.order_by('id').values('id')[:3]).update(dogID=2)
+        ids, body = self.page(dogID=1)
+        ids += self.page(body['next'], dogID=1)[0]
+        self.assertEqual(sorted(ids), sorted(Walk.objects.filter(dogID=1).values_list('id', flat=True)))
+
+    def test_malformed_cursor_is_not_found(self):
+        cursor = base64.b64encode(urlencode({'p': json.dumps(['yesterday', '1'])}).encode()).decode()
+        response = self.client.get('/api/walks/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+# Exports stream every matching record, oldest first, in chunks of
+# EXPORT_CHUNK_SIZE rows: through a server-side cursor, or in keyset pages on
+# the primary key where server-side cursors are disabled (transaction pooler).
+@override_settings(JWT_VERIFICATION='local', JWT_SIGNING_KEY=SIGNING_KEY, EXPORT_CHUNK_SIZE=10)
+class WalkExportTests(TestCase):
+    fields = [field.attname for field in Walk._meta.concrete_fields]
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(make_token()))
+        self.walks = [Walk.objects.create(dogID=i % 2, handler='Handler {}'.format(i), poopScore='2.5') for i in range(25)]
+
+    def export(self, **params):
+        response = self.client.get('/api/walks/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        return response, chunks
+
+    def assertCSV(self, chunks, walks):
+        rows = list(csv.reader(io.StringIO(''.join(chunks))))
+        self.assertEqual(rows[0], self.fields)
+        self.assertEqual([int(row[0]) for row in rows[1:]], [walk.id for walk in walks])
+        self.assertEqual(rows[1][self.fields.index('handler')], walks[0].handler)
+
+    def test_csv_streams_every_chunk_in_order(self):
+        with mock.patch.object(exports, 'ROWS_PER_WRITE', 4):
+            response, chunks = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="walks.csv"')
+        self.assertEqual(len(chunks), 1 + 7)
+        self.assertCSV(chunks, self.walks)
+
+    def test_ndjson_applies_the_list_filters(self):
+        response, chunks = self.export(fileFormat='ndjson', dogID=1)
+        lines = [json.loads(line) for line in ''.join(chunks).splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([line['id'] for line in lines], [walk.id for walk in self.walks if walk.dogID == 1])
+        self.assertEqual(lines[0]['poopScore'], '2.5')
+
+    def test_keyset_pages_without_server_side_cursors(self):
+        with mock.patch.dict(connection.settings_dict, {'DISABLE_SERVER_SIDE_CURSORS': True}):
+            with CaptureQueriesContext(connection) as queries:
+                response, chunks = self.export()
+        pages = [query['sql'] for query in queries if 'FROM "Walks_Service_walk"' in query['sql']]
+        self.assertEqual(len(pages), 4)
+        self.assertTrue(all('LIMIT 10' in sql for sql in pages))
+        self.assertCSV(chunks, self.walks)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get('/api/walks/export/', {'fileFormat': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
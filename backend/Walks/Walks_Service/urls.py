@@ -3,6 +3,11 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    path('analytics/', views.WalkAnalyticsAPIView.as_view()),
+    path('export/', views.WalkExportAPIView.as_view()),
+    path('bulk/', views.WalkBulkCreateAPIView.as_view()),
+    path('bulk/update/', views.WalkBulkUpdateAPIView.as_view()),
+    path('bulk/delete/', views.WalkBulkDestroyAPIView.as_view()),
     path('<str:pk>/update/', views.WalkUpdateAPIView.as_view()),
     path('<str:pk>/delete/', views.WalkDestroyAPIView.as_view()),
     path('<str:pk>/', views.WalkDetailAPIView.as_view()),
@@ -1,14 +1,26 @@
 from rest_framework import generics
 from .auth.auth import CustomJWTAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from datetime import datetime
+from django.utils.dateparse import parse_date
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
-from .models import Walk
-from .serializers import WalkSerializer
+from .models import Dog, Walk, WalkScoreRollup
+from .serializers import WalkListSerializer, WalkSerializer
+from . import etags
+from .etags import list_etag
+from .filters import WalkFilterBackend
+from .pagination import WalkCursorPagination
+from . import rollups
+from .exports import FORMATS, export_response
 
 # get a walk record object based on primary key
 class WalkDetailAPIView(generics.RetrieveAPIView):
@@ -18,14 +30,45 @@ class WalkDetailAPIView(generics.RetrieveAPIView):
     permission_classes = (AllowAny,)
     lookup_field = 'pk'
 
-# Get ALL walk record objects
+# Get ALL walk record objects, optionally filtered and cursor-paginated
 # Create a walk record object given valid form data
+# Listed records carry the name of their dog (dogName), read from the Dogs table
+# GET answers If-None-Match with 304 while the walk and dog tables are unchanged
+@method_decorator(condition(etag_func=list_etag('walks', dog_namespaces=('dogs',))), name='get')
 class WalkListCreateAPIView(generics.ListCreateAPIView):
     queryset = Walk.objects.all()
     serializer_class = WalkSerializer
     authentication_classes = (CustomJWTAuthentication, )
     permission_classes = (AllowAny,)
     parser_classes = (MultiPartParser, FormParser)
+    filter_backends = (WalkFilterBackend,)
+    pagination_class = WalkCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = queryset.annotate(dogName=Subquery(Dog.objects.filter(id=OuterRef('dogID')).values('name')[:1]))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return WalkListSerializer
+        return WalkSerializer
+
+# Stream walk records as CSV (default) or NDJSON (?fileFormat=ndjson), oldest first,
+# with the same optional filters as the list
+class WalkExportAPIView(generics.GenericAPIView):
+    queryset = Walk.objects.all()
+    authentication_classes = (CustomJWTAuthentication, )
+    permission_classes = (AllowAny,)
+    filter_backends = (WalkFilterBackend,)
+
+    def get(self, request):
+        fileFormat = request.query_params.get('fileFormat', 'csv')
+        if fileFormat not in FORMATS:
+            return Response({'error': 'fileFormat must be csv or ndjson!'}, status=status.HTTP_400_BAD_REQUEST)
+        fields = [field.attname for field in Walk._meta.concrete_fields]
+        return export_response(self.filter_queryset(self.get_queryset()), fields, fileFormat, 'walks')
 
 # Update walk record object given valid form data and its primary key
 class WalkUpdateAPIView(generics.UpdateAPIView):
@@ -48,11 +91,152 @@ class WalkDestroyAPIView(generics.DestroyAPIView):
         super().perform_destroy(instance)
 
 
+### START OF BULK WALK RECORDS VIEWS ###
+
+
+# Batch versions of the create/update/delete views taking JSON, authenticated
+# once per batch and written in one transaction. A batch is all or nothing: if
+# any item is invalid nothing is written, and the 400 response lists the errors
+# of each item by index ({} for a valid one).
+class WalkBulkAPIView(APIView):
+    authentication_classes = (CustomJWTAuthentication, )
+    permission_classes = (AllowAny,)
+    parser_classes = (JSONParser,)
+    max_batch = 500
+    batch_size = 100
+
+    def batch(self, items):
+        if not isinstance(items, list) or not 0 < len(items) <= self.max_batch:
+            return 'Expected a list of 1 to {} items!'.format(self.max_batch)
+        return None
 
+    def batch_error(self, message):
+        return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
 
+    def item_errors(self, errors):
+        return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
 
+# Create walk records from a list of walk records
+class WalkBulkCreateAPIView(WalkBulkAPIView):
+    def post(self, request):
+        error = self.batch(request.data)
+        if error:
+            return self.batch_error(error)
+        serializer = WalkSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return self.item_errors(serializer.errors)
 
+        walks = [Walk(**attrs) for attrs in serializer.validated_data]
+        keys = set()
+        for walk in walks:
+            keys |= rollups.bucket_keys(walk.dogID, walk.createdAt)
+        with transaction.atomic():
+            Walk.objects.bulk_create(walks, batch_size=self.batch_size)
+            rollups.refresh_on_commit(keys)
+            etags.invalidate('walks')
+        return Response(WalkSerializer(walks, many=True).data, status=status.HTTP_201_CREATED)
+
+# Update walk records from a list of partial walk records, each with its id
+class WalkBulkUpdateAPIView(WalkBulkAPIView):
+    def put(self, request):
+        error = self.batch(request.data)
+        if error:
+            return self.batch_error(error)
+        items = request.data
+
+        with transaction.atomic():
+            ids = [item.get('id') for item in items if isinstance(item, dict)]
+            existing = Walk.objects.select_for_update().in_bulk([i for i in ids if isinstance(i, int)])
+            errors = []
+            updates = []
+            for item in items:
+                walk = existing.get(item.get('id')) if isinstance(item, dict) else None
+                if walk is None:
+                    errors.append({'id': ['Walk record does not exist!']})
+                    continue
+                serializer = WalkSerializer(walk, data=item, partial=True)
+                if serializer.is_valid():
+                    errors.append({})
+                    updates.append((walk, serializer.validated_data))
+                else:
+                    errors.append(serializer.errors)
+            if any(errors):
+                return self.item_errors(errors)
+
+            keys = set()
+            fields = {'updatedAt'}
+            now = timezone.now()
+            for walk, attrs in updates:
+                keys |= rollups.bucket_keys(walk.dogID, walk.createdAt)
+                for field, value in attrs.items():
+                    setattr(walk, field, value)
+                    fields.add(field)
+                walk.updatedAt = now
+                keys |= rollups.bucket_keys(walk.dogID, walk.createdAt)
+            walks = [walk for walk, attrs in updates]
+            Walk.objects.bulk_update(walks, sorted(fields), batch_size=self.batch_size)
+            rollups.refresh_on_commit(keys)
+            etags.invalidate('walks')
+        return Response(WalkSerializer(walks, many=True).data, status=status.HTTP_200_OK)
+
+# Delete walk records given a list of their ids
+class WalkBulkDestroyAPIView(WalkBulkAPIView):
+    def post(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        error = self.batch(ids)
+        if error:
+            return self.batch_error(error)
+
+        with transaction.atomic():
+            existing = Walk.objects.select_for_update().in_bulk([i for i in ids if isinstance(i, int)])
+            errors = [{} if i in existing else {'id': ['Walk record does not exist!']} for i in ids]
+            if any(errors):
+                return self.item_errors(errors)
+            # the delete signals queue the rollup refresh of every bucket touched
+            deleted, _ = Walk.objects.filter(pk__in=list(existing)).delete()
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+
+
+### END OF BULK WALK RECORDS VIEWS ###
+
+
+# Walk score analytics from the pre-aggregated rollups, all parameters optional:
+#   dogID      - dog id, repeat for several dogs (default: every dog)
+#   period     - day, week (default) or month
+#   startDate  - first bucket to return (YYYY-MM-DD), endDate - last one
+#   window     - number of periods averaged into each bucket's trend (default 4)
+class WalkAnalyticsAPIView(APIView):
+    authentication_classes = (CustomJWTAuthentication, )
+    permission_classes = (AllowAny,)
+    max_window = 52
 
+    def get(self, request):
+        params = request.query_params
 
+        period = params.get('period', 'week')
+        if period not in rollups.PERIODS:
+            return Response({'error': 'period must be day, week or month!'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            window = int(params.get('window', 4))
+            startDate = parse_date(params.get('startDate', ''))
+            endDate = parse_date(params.get('endDate', ''))
+        except ValueError:
+            return Response({'error': 'Invalid window, startDate or endDate!'}, status=status.HTTP_400_BAD_REQUEST)
+        window = min(max(window, 1), self.max_window)
 
+        rows = WalkScoreRollup.objects.filter(period=period).order_by('dogID', 'bucket')
+        dogIDs = [i for i in params.getlist('dogID') if i.isdigit()]
+        if dogIDs:
+            rows = rows.filter(dogID__in=dogIDs)
+        start = None
+        if startDate:
+            start = rollups.bucket_of(startDate, period)
+            rows = rows.filter(bucket__gte=rollups.shift_bucket(start, period, -(window - 1)))
+        if endDate:
+            rows = rows.filter(bucket__lte=endDate)
 
+        return Response({
+            'period': period,
+            'window': window,
+            'dogs': rollups.summarize(rows, period, window, start),
+        }, status=status.HTTP_200_OK)
@@ -8,12 +8,23 @@ import CardActions from "@mui/material/CardActions";
 import Chip from "@mui/material/Chip";
 import DogDeleteModal from "./dog-delete-modal";
 
+// resized copies of the image, built in the background after an upload
+interface ImageVariantsType {
+	[variant: string]: {
+		width: number;
+		height: number;
+		webp: string;
+		jpeg: string;
+	};
+}
+
 interface DogsType {
 	id: number;
 	microchipID: string;
 	name: string;
 	desc: string;
 	image: string;
+	imageVariants?: ImageVariantsType;
 	is_sponsored: boolean;
 	categories: number[];
 	age: number;
@@ -72,7 +83,7 @@ export default function AdminPaginatedDogCards({
 										}}
 										image={
 											dog.image
-												? dog.image
+												? dog.imageVariants?.card?.webp ?? dog.image
 												: "https://icons.veryicon.com/png/o/animal/pet-icon/dog-24.png"
 										}
 									/>
@@ -7,12 +7,23 @@ import Typography from "@mui/material/Typography";
 import CardActions from "@mui/material/CardActions";
 import Chip from "@mui/material/Chip";
 
+// resized copies of the image, built in the background after an upload
+interface ImageVariantsType {
+	[variant: string]: {
+		width: number;
+		height: number;
+		webp: string;
+		jpeg: string;
+	};
+}
+
 interface DogsType {
 	id: number;
 	microchipID: string;
 	name: string;
 	desc: string;
 	image: string;
+	imageVariants?: ImageVariantsType;
 	is_sponsored: boolean;
 	categories: number[];
 	age: number;
@@ -67,7 +78,7 @@ export default function PaginatedDogCards({
 										}}
 										image={
 											dog.image
-												? dog.image
+												? dog.imageVariants?.card?.webp ?? dog.image
 												: "https://icons.veryicon.com/png/o/animal/pet-icon/dog-24.png"
 										}
 									/>
@@ -52,14 +52,6 @@ const theme = createTheme({
 
 const actions = [{ icon: <AddOutlinedIcon />, name: "Add Record" }];
 
-interface DogType {
-	[key: string]: any;
-}
-
-interface DogsDictType {
-	[key: string]: any;
-}
-
 interface RecordType {
 	[key: string]: any;
 }
@@ -81,13 +73,17 @@ export default function ManageFilteredRecords() {
 	const { authTokens } = useContext(AuthContext);
 	// get dog ID from parameter in URL
 	const { id } = useParams<ParamsType>();
-	// store/set records data to display on page
+	// store/set the page of records retrieved from Walks Service
 	const [records, setRecords] = useState<RecordTypeArray>();
-	// store/set original records data retrieved from Walks Service
-	const [allRecords, setAllRecords] = useState<RecordTypeArray>();
-	// store/set a mapping of dog ID to dog name
-	const [dogsDict, setDogsDict] = useState<DogsDictType>();
-	// enables filter fields
+	// cursors of the next/previous page and of the page on display
+	const [nextCursor, setNextCursor] = useState<string | null>(null);
+	const [previousCursor, setPreviousCursor] = useState<string | null>(null);
+	const [pageCursor, setPageCursor] = useState<string | null>(null);
+	// records start filtered by the dog in the URL, until a dog name is searched
+	const [dogID, setDogID] = useState<string>(id ?? "");
+	// enables filter fields; the queries follow the inputs once typing pauses
+	const [dogInput, setDogInput] = useState<string>("");
+	const [handlerInput, setHandlerInput] = useState<string>("");
 	const [dogQuery, setDogQuery] = useState<string>("");
 	const [handlerQuery, setHandlerQuery] = useState<string>("");
 	// track status of loading data from API
@@ -96,8 +92,6 @@ export default function ManageFilteredRecords() {
 	const [status, setStatus] = useState<string>("");
 	// enables snackbar to display status after deleting data
 	const [openAlert, setOpenAlert] = useState(false);
-	// tracks initial load
-	const [initialLoad, setInitialLoad] = useState<boolean>(false);
 	// track pagination
 	const [page, setPage] = useState(0);
 	const [rowsPerPage, setRowsPerPage] = useState(5);
@@ -130,8 +124,24 @@ export default function ManageFilteredRecords() {
 		history.push(`/admin/addRecord`);
 	};
 
-	// async function to retrieve all records
-	const retrieveAllRecords = async () => {
+	// async function to retrieve one page of records (newest first), filtered
+	// by Walks Service, which also gives the name of each record's dog
+	const retrieveRecords = async (cursor?: string | null) => {
+		const params = new URLSearchParams();
+		params.append("pageSize", String(rowsPerPage));
+		if (cursor) {
+			params.append("cursor", cursor);
+		}
+		if (handlerQuery) {
+			params.append("handler", handlerQuery);
+		}
+		if (dogID) {
+			params.append("dogID", dogID);
+		}
+		if (dogQuery) {
+			params.append("dogName", dogQuery);
+		}
+
 		setLoading(true);
 
 		const accessToken = JSON.parse(authTokens!).access;
@@ -140,55 +150,27 @@ export default function ManageFilteredRecords() {
 				headers: {
 					Authorization: `Bearer ${accessToken}`,
 				},
+				params: params,
 			});
 			const responseData = response.data;
-
-			function compareCreatedAt(a: RecordType, b: RecordType) {
-				const dateA = new Date(a.createdAt);
-				const dateB = new Date(b.createdAt);
-				return dateB.getTime() - dateA.getTime();
-			}
-			responseData.sort(compareCreatedAt);
-			setRecords(responseData);
-			setAllRecords(responseData);
+			setRecords(responseData.results);
+			setNextCursor(responseData.next);
+			setPreviousCursor(responseData.previous);
+			setPageCursor(cursor ?? null);
 		} catch (error) {
 			console.error("List Records API error:", error);
 			setRecords([]);
-			setAllRecords([]);
+			setNextCursor(null);
+			setPreviousCursor(null);
+			setPageCursor(null);
 		} finally {
 			setLoading(false);
 		}
 	};
 
-	// async function to retrieve all dogs and get mapping of dog ID to dog Name
-	const retrieveAllDogs = async () => {
-		setLoading(true);
-
-		try {
-			const response = await axios.get(
-				`http://${orchestratorURL}/publicListDogs/`
-			);
-			const responseData = response.data;
-			const dogsDict = responseData
-				.filter((obj: DogType) => obj.id && obj.name)
-				.reduce((result: DogsDictType, obj: DogType) => {
-					result[obj.id] = obj.name;
-					return result;
-				}, {});
-			setDogsDict(dogsDict);
-		} catch (error) {
-			console.error("List Dogs API error:", error);
-			setDogsDict({});
-		} finally {
-			setLoading(false);
-		}
-	};
-
-	// function to delete record from data stored in state
+	// function to reload the page on display after deleting a record
 	const handleDelete = (recordID: number) => {
-		const updatedRecords = records?.filter((record) => record.id !== recordID);
-		setRecords(updatedRecords);
-		setPage(0);
+		retrieveRecords(pageCursor);
 	};
 
 	// function to set status after deleting data
@@ -215,8 +197,9 @@ export default function ManageFilteredRecords() {
 		setOpenAlert(false);
 	};
 
-	// onClick event listener that changes page number
+	// onClick event listener that moves one page forward or back
 	const handleChangePage = (event: unknown, newPage: number) => {
+		retrieveRecords(newPage > page ? nextCursor : previousCursor);
 		setPage(newPage);
 	};
 
@@ -248,64 +231,25 @@ export default function ManageFilteredRecords() {
 		return singaporeDate;
 	};
 
-	// onchange event listener to enable dog dropdown field
+	// onchange event listener to enable dog search field; searching by name
+	// replaces the dog given in the URL
 	const handleDog = (event: React.ChangeEvent<HTMLInputElement>) => {
-		const dogQuery = event.target.value;
-		setDogQuery(dogQuery);
-		if (dogQuery) {
-			let filtered_records = allRecords?.filter((record) =>
-				record.dogName.toLowerCase().includes(dogQuery.toLowerCase())
-			);
-			if (handlerQuery.length > 0) {
-				filtered_records = filtered_records?.filter((record) =>
-					record.handler.toLowerCase().includes(handlerQuery.toLowerCase())
-				);
-			}
-			setRecords(filtered_records);
-		} else {
-			let filtered_records = allRecords;
-			if (handlerQuery.length > 0) {
-				filtered_records = filtered_records?.filter((record) =>
-					record.handler.toLowerCase().includes(handlerQuery.toLowerCase())
-				);
-			}
-			setRecords(filtered_records);
-		}
-		setPage(0);
+		setDogInput(event.target.value);
+		setDogID("");
 	};
 
-	// onchange event listener to enable dog dropdown field
+	// onchange event listener to enable handler search field
 	const handleHandler = (event: React.ChangeEvent<HTMLInputElement>) => {
-		const handlerQuery = event.target.value;
-		setHandlerQuery(handlerQuery);
-		if (handlerQuery) {
-			let filtered_records = allRecords?.filter((record) =>
-				record.handler.toLowerCase().includes(handlerQuery.toLowerCase())
-			);
-			if (dogQuery.length > 0) {
-				filtered_records = filtered_records?.filter((record) =>
-					record.dogName.toLowerCase().includes(dogQuery.toLowerCase())
-				);
-			}
-			setRecords(filtered_records);
-		} else {
-			let filtered_records = allRecords;
-			if (dogQuery.length > 0) {
-				filtered_records = filtered_records?.filter((record) =>
-					record.dogName.toLowerCase().includes(dogQuery.toLowerCase())
-				);
-			}
-			setRecords(filtered_records);
-		}
-		setPage(0);
+		setHandlerInput(event.target.value);
 	};
 
 	// onClick event listener that clears all filters
 	const handleClearFilters = () => {
+		setDogID("");
+		setDogInput("");
+		setHandlerInput("");
 		setDogQuery("");
 		setHandlerQuery("");
-		setRecords(allRecords);
-		setPage(0);
 	};
 
 	// onClick event listener to redirect user back to previous page
@@ -313,40 +257,21 @@ export default function ManageFilteredRecords() {
 		history.goBack();
 	};
 
-	// on initial render, retrieve all dogs to get mapping of dog ID to dog Name
-	// and retrieve all records
+	// search once typing pauses instead of on every keystroke
 	useEffect(() => {
-		retrieveAllDogs();
-		retrieveAllRecords();
-	}, []);
-
-	// if dogQuery and handlerQuery is blank, when dogsDict and records initialises
-	// iterate through records and add dogName key-value pair based on dogID
+		const timer = setTimeout(function () {
+			setDogQuery(dogInput.trim());
+			setHandlerQuery(handlerInput.trim());
+		}, 300);
+		return () => clearTimeout(timer);
+	}, [dogInput, handlerInput]);
+
+	// on initial render and whenever a filter changes, retrieve the first page
+	// of matching records
 	useEffect(() => {
-		if (!dogQuery && !handlerQuery) {
-			if (
-				dogsDict &&
-				Object.keys(dogsDict).length > 0 &&
-				records &&
-				Object.keys(records).length > 0
-			) {
-				const new_records = records.map((record) => {
-					const dogName = dogsDict[record.dogID];
-					return { ...record, dogName };
-				});
-				setRecords(new_records);
-				setAllRecords(new_records);
-				if (!initialLoad) {
-					setDogQuery(dogsDict[id]);
-					const filtered_records = new_records?.filter((record) =>
-						record.dogName.toLowerCase().includes(dogsDict[id].toLowerCase())
-					);
-					setRecords(filtered_records);
-					setInitialLoad(true);
-				}
-			}
-		}
-	}, [dogsDict, records, dogQuery, handlerQuery]);
+		setPage(0);
+		retrieveRecords();
+	}, [dogID, dogQuery, handlerQuery, rowsPerPage]);
 
 	// if status state changes, opens snackbar and resets status
 	useEffect(() => {
@@ -389,7 +314,7 @@ export default function ManageFilteredRecords() {
 								variant="outlined"
 								onChange={handleDog}
 								sx={{ width: "20%" }}
-								value={dogQuery}
+								value={dogInput}
 							/>
 							<TextField
 								id="handler-search"
@@ -405,7 +330,7 @@ export default function ManageFilteredRecords() {
 								variant="outlined"
 								onChange={handleHandler}
 								sx={{ width: "20%" }}
-								value={handlerQuery}
+								value={handlerInput}
 							/>
 						</Stack>
 					</Stack>
@@ -442,12 +367,7 @@ export default function ManageFilteredRecords() {
 											</TableHead>
 											<TableBody>
 												{records && records.length > 0 ? (
-													records
-														.slice(
-															page * rowsPerPage,
-															page * rowsPerPage + rowsPerPage
-														)
-														.map((record, index) => {
+													records.map((record, index) => {
 															return (
 																<TableRow
 																	role="checkbox"
@@ -476,9 +396,6 @@ export default function ManageFilteredRecords() {
 																				>
 																					{column.id === "createdAt" && value
 																						? formatDate(value)
-																						: column.id === "dogName" &&
-																						  dogsDict
-																						? dogsDict[record["dogID"]]
 																						: value}
 																				</TableCell>
 																			);
@@ -520,7 +437,11 @@ export default function ManageFilteredRecords() {
 									<TablePagination
 										rowsPerPageOptions={[6]}
 										component="div"
-										count={records ? records.length : 0}
+										count={
+											nextCursor
+												? -1
+												: page * rowsPerPage + (records ? records.length : 0)
+										}
 										rowsPerPage={rowsPerPage}
 										page={page}
 										onPageChange={handleChangePage}
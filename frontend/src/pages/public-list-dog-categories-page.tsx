@@ -28,11 +28,22 @@ const theme = createTheme({
 	},
 });
 
+// resized copies of the image, built in the background after an upload
+interface ImageVariantsType {
+	[variant: string]: {
+		width: number;
+		height: number;
+		webp: string;
+		jpeg: string;
+	};
+}
+
 interface CategoryType {
 	id: number;
 	name: string;
 	desc: string;
 	image: string;
+	imageVariants?: ImageVariantsType;
 }
 
 interface CategoryTypeArray extends Array<CategoryType> {}
@@ -142,7 +153,7 @@ export default function PublicDogCategories() {
 																}}
 																image={
 																	category.image
-																		? category.image
+																		? category.imageVariants?.card?.webp ?? category.image
 																		: "https://icons.veryicon.com/png/o/animal/pet-icon/dog-24.png"
 																}
 															/>
@@ -24,7 +24,6 @@ import FilterAltOffOutlinedIcon from "@mui/icons-material/FilterAltOffOutlined";
 import SearchOutlinedIcon from "@mui/icons-material/SearchOutlined";
 import FilterAltOutlinedIcon from "@mui/icons-material/FilterAltOutlined";
 import PaginatedDogCards from "../components/paginated-dog-cards";
-import Pagination from "@mui/material/Pagination";
 import ReplyIcon from "@mui/icons-material/Reply";
 import Box from "@mui/material/Box";
 import Tooltip from "@mui/material/Tooltip";
@@ -62,20 +61,22 @@ interface CategoryType {
 interface CategoryTypeArray extends Array<CategoryType> {}
 
 export default function PublicDogs() {
-	// store/set dogs data to display on page based on filters
+	// store/set the page of dogs returned by Dogs Service for the current filters
 	const [dogs, setDogs] = useState<DogsTypeArray>();
-	// store/set original dogs data retrieved from Dogs Service
-	const [allDogs, setAllDogs] = useState<DogsTypeArray>();
+	// store/set cursors of the next/previous page returned by Dogs Service
+	const [nextCursor, setNextCursor] = useState<string | null>(null);
+	const [previousCursor, setPreviousCursor] = useState<string | null>(null);
 	// track status of loading data from API
 	const [loading, setLoading] = useState<boolean>(false);
 	// track filters selected by user
 	const [categories, setCategories] = useState<CategoryTypeArray>();
 	const [selectedCat, setSelectedCat] = useState<number[]>([]);
+	const [searchInput, setSearchInput] = useState<string>("");
 	const [query, setQuery] = useState<string>("");
 	const [age, setAge] = useState<number[]>([0, 30]);
+	const [ageFilter, setAgeFilter] = useState<number[]>([0, 30]);
 	const [gender, setGender] = useState<string>("");
 	// track pagination
-	const [page, setPage] = useState(1);
 	const [itemsPerPage, setItemsPerPage] = useState(6);
 
 	// retrieve URL of Orchestrator Service from env
@@ -84,9 +85,18 @@ export default function PublicDogs() {
 	// initialize history for routing
 	const history = useHistory();
 
-	// onClick event listener that changes page number
-	const handleChangePage = (event: unknown, newPage: number) => {
-		setPage(newPage);
+	// onClick event listener that loads the next page of dogs
+	const handleNextPage = () => {
+		if (nextCursor) {
+			retrieveDogs(nextCursor);
+		}
+	};
+
+	// onClick event listener that loads the previous page of dogs
+	const handlePreviousPage = () => {
+		if (previousCursor) {
+			retrieveDogs(previousCursor);
+		}
 	};
 
 	// onClick event listener that routes user to selected dog by category page
@@ -104,24 +114,45 @@ export default function PublicDogs() {
 		history.goBack();
 	};
 
-	// async function to retrieve all dogs from Dogs Service
-	const retrieveAllDogs = async () => {
+	// async function to retrieve one page of dogs matching the selected filters from Dogs Service
+	// filtering, ordering and pagination are done server-side
+	const retrieveDogs = async (cursor?: string) => {
 		setLoading(true);
 
+		const params = new URLSearchParams();
+		params.append("pageSize", String(itemsPerPage));
+		params.append("ordering", "name");
+		if (cursor) {
+			params.append("cursor", cursor);
+		}
+		if (query) {
+			params.append("name", query);
+		}
+		if (gender) {
+			params.append("gender", gender);
+		}
+		selectedCat.forEach((category) =>
+			params.append("category", String(category))
+		);
+		if (ageFilter[0] !== 0 || ageFilter[1] !== 30) {
+			params.append("minAge", String(ageFilter[0]));
+			params.append("maxAge", String(ageFilter[1]));
+		}
+
 		try {
 			const response = await axios.get(
-				`http://${orchestratorURL}/publicListDogs/`
+				`http://${orchestratorURL}/publicListDogs/`,
+				{ params: params }
 			);
 			const responseData = response.data;
-			const sortedData = [...responseData].sort((a, b) =>
-				a.name.localeCompare(b.name)
-			);
-			setDogs(sortedData);
-			setAllDogs(sortedData);
+			setDogs(responseData.results);
+			setNextCursor(responseData.next);
+			setPreviousCursor(responseData.previous);
 		} catch (error) {
 			console.error("List Dogs API error:", error);
 			setDogs([]);
-			setAllDogs([]);
+			setNextCursor(null);
+			setPreviousCursor(null);
 		} finally {
 			setLoading(false);
 		}
@@ -150,76 +181,11 @@ export default function PublicDogs() {
 			? value.map(Number)
 			: [Number(value)];
 		setSelectedCat(selectedValues);
-		if (selectedValues.length > 0) {
-			let filtered_dogs = allDogs?.filter((dog) =>
-				dog.categories.some((category) => selectedValues.includes(category))
-			);
-			if (query) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.name.toLowerCase().includes(query.toLowerCase())
-				);
-			}
-			if (gender) {
-				filtered_dogs = filtered_dogs?.filter((dog) => dog.gender === gender);
-			}
-			filtered_dogs = filtered_dogs?.filter(
-				(dog) => dog.age >= age[0] && dog.age <= age[1]
-			);
-			setDogs(filtered_dogs);
-		} else {
-			let filtered_dogs = allDogs;
-			if (query) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.name.toLowerCase().includes(query.toLowerCase())
-				);
-			}
-			if (gender) {
-				filtered_dogs = filtered_dogs?.filter((dog) => dog.gender === gender);
-			}
-			filtered_dogs = filtered_dogs?.filter(
-				(dog) => dog.age >= age[0] && dog.age <= age[1]
-			);
-			setDogs(filtered_dogs);
-		}
-		setPage(1);
 	};
 
-	// onchange event listener to filter dogs by name
+	// onchange event listener to filter dogs by name (a case-insensitive name prefix)
 	const handleSearch = (event: React.ChangeEvent<HTMLInputElement>) => {
-		const query = event.target.value;
-		setQuery(query);
-		if (query) {
-			let filtered_dogs = allDogs?.filter((dog) =>
-				dog.name.toLowerCase().includes(query.toLowerCase())
-			);
-			if (selectedCat.length > 0) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.categories.some((category) => selectedCat.includes(category))
-				);
-			}
-			if (gender) {
-				filtered_dogs = filtered_dogs?.filter((dog) => dog.gender === gender);
-			}
-			filtered_dogs = filtered_dogs?.filter(
-				(dog) => dog.age >= age[0] && dog.age <= age[1]
-			);
-			setDogs(filtered_dogs);
-		} else {
-			let filtered_dogs = allDogs;
-			if (selectedCat.length > 0) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.categories.some((category) => selectedCat.includes(category))
-				);
-			}
-			if (gender) {
-				filtered_dogs = filtered_dogs?.filter((dog) => dog.gender === gender);
-			}
-			filtered_dogs = filtered_dogs?.filter(
-				(dog) => dog.age >= age[0] && dog.age <= age[1]
-			);
-			setDogs(filtered_dogs);
-		}
-		setPage(1);
+		setSearchInput(event.target.value);
 	};
 
 	// onchange event listener that enables age slider
@@ -245,16 +211,21 @@ export default function PublicDogs() {
 		}
 	};
 
+	// onChangeCommitted event listener that filters dogs by age once the slider is released
+	const handleAgeCommitted = () => {
+		setAgeFilter(age);
+	};
+
 	// onClick event listener that clears all filters
 	const handleClearFilters = () => {
 		setSelectedCat([]);
+		setSearchInput("");
 		setQuery("");
 		const searchBar = document.getElementById("search") as HTMLInputElement;
 		searchBar.value = "";
 		setAge([0, 30]);
+		setAgeFilter([0, 30]);
 		setGender("");
-		setDogs(allDogs);
-		setPage(1);
 	};
 
 	// onChange event listener that enables gender dropdown
@@ -262,89 +233,23 @@ export default function PublicDogs() {
 		setGender(event.target.value as string);
 	};
 
-	// on initial render, retrieve all dogs and all dog categories
+	// on initial render, retrieve all dog categories
 	useEffect(() => {
-		retrieveAllDogs();
 		retrieveAllDogCategories();
 	}, []);
 
-	// if age state changes, filters dogs by age
+	// search once typing pauses instead of on every keystroke
 	useEffect(() => {
-		if (age[0] !== 0 || age[1] !== 30) {
-			let filtered_dogs = allDogs?.filter(
-				(dog) => dog.age >= age[0] && dog.age <= age[1]
-			);
-			if (selectedCat.length > 0) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.categories.some((category) => selectedCat.includes(category))
-				);
-			}
-			if (query) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.name.toLowerCase().includes(query.toLowerCase())
-				);
-			}
-			if (gender) {
-				filtered_dogs = filtered_dogs?.filter((dog) => dog.gender === gender);
-			}
-			setDogs(filtered_dogs);
-		} else {
-			let filtered_dogs = allDogs;
-			if (selectedCat.length > 0) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.categories.some((category) => selectedCat.includes(category))
-				);
-			}
-			if (query) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.name.toLowerCase().includes(query.toLowerCase())
-				);
-			}
-			if (gender) {
-				filtered_dogs = filtered_dogs?.filter((dog) => dog.gender === gender);
-			}
-			setDogs(filtered_dogs);
-		}
-		setPage(1);
-	}, [age]);
+		const timer = setTimeout(function () {
+			setQuery(searchInput.trim());
+		}, 300);
+		return () => clearTimeout(timer);
+	}, [searchInput]);
 
-	// if gender state changes, filters dogs by gender
+	// on initial render and whenever a filter changes, retrieve the first page of matching dogs
 	useEffect(() => {
-		if (gender) {
-			let filtered_dogs = allDogs?.filter((dog) => dog.gender === gender);
-			if (query) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.name.toLowerCase().includes(query.toLowerCase())
-				);
-			}
-			if (selectedCat.length > 0) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.categories.some((category) => selectedCat.includes(category))
-				);
-			}
-			filtered_dogs = filtered_dogs?.filter(
-				(dog) => dog.age >= age[0] && dog.age <= age[1]
-			);
-			setDogs(filtered_dogs);
-		} else {
-			let filtered_dogs = allDogs;
-			if (selectedCat.length > 0) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.categories.some((category) => selectedCat.includes(category))
-				);
-			}
-			if (query) {
-				filtered_dogs = filtered_dogs?.filter((dog) =>
-					dog.name.toLowerCase().includes(query.toLowerCase())
-				);
-			}
-			filtered_dogs = filtered_dogs?.filter(
-				(dog) => dog.age >= age[0] && dog.age <= age[1]
-			);
-			setDogs(filtered_dogs);
-		}
-		setPage(1);
-	}, [gender]);
+		retrieveDogs();
+	}, [query, selectedCat, gender, ageFilter]);
 
 	return (
 		<ThemeProvider theme={theme}>
@@ -437,6 +342,7 @@ export default function PublicDogs() {
 								getAriaLabel={() => "Age range"}
 								value={age}
 								onChange={handleAge}
+								onChangeCommitted={handleAgeCommitted}
 								min={0}
 								max={30}
 								valueLabelDisplay="on"
@@ -462,7 +368,7 @@ export default function PublicDogs() {
 							) : dogs && categories ? (
 								<>
 									<PaginatedDogCards
-										page={page}
+										page={1}
 										itemsPerPage={itemsPerPage}
 										dogsData={dogs}
 										categories={categories}
@@ -472,16 +378,23 @@ export default function PublicDogs() {
 							) : null}
 						</Grid>
 						<Stack spacing={4} justifyContent="center" sx={{ mt: 4 }}>
-							{dogs && dogs.length > itemsPerPage ? (
-								<Pagination
-									count={Math.ceil(dogs.length / itemsPerPage)}
-									page={page}
-									onChange={handleChangePage}
-									color="primary"
-									sx={{
-										width: "100%",
-									}}
-								/>
+							{previousCursor || nextCursor ? (
+								<Stack spacing={4} justifyContent="center" direction="row">
+									<Button
+										variant="outlined"
+										onClick={handlePreviousPage}
+										disabled={!previousCursor}
+									>
+										Previous
+									</Button>
+									<Button
+										variant="outlined"
+										onClick={handleNextPage}
+										disabled={!nextCursor}
+									>
+										Next
+									</Button>
+								</Stack>
 							) : null}
 						</Stack>
 					</Grid>
@@ -187,7 +187,7 @@ export default function ViewDogCategory() {
 				image !== null ? formData.append("image", image) : null;
 
 				const response = await axios.post(
-					`http://${orchestratorURL}/updateDogCategory/`,
+					`http://${orchestratorURL}/updateDogCategory/?id=${id}`,
 					formData,
 					{
 						headers: {
@@ -243,7 +243,7 @@ export default function ViewDog() {
 				image !== null ? formData.append("image", image) : null;
 
 				const response = await axios.post(
-					`http://${orchestratorURL}/updateDog/`,
+					`http://${orchestratorURL}/updateDog/?id=${id}`,
 					formData,
 					{
 						headers: {